@@ -0,0 +1,141 @@
+# bench_runners.py
+# Measure throughput of the dspsr runners in data_gen.dspsr_util,
+# sequentially, in parallel through data_gen.Graph, and with the run cache,
+# using the offline stand-ins in bin/ instead of dspsr.
+import argparse
+import functools
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+import data_gen
+import data_gen.dspsr_util
+from data_gen import metrics
+from data_gen.dada import write_dada_file
+
+cur_dir = os.path.dirname(os.path.abspath(__file__))
+bin_dir = os.path.join(cur_dir, "bin")
+
+module_logger = logging.getLogger(__name__)
+
+
+def bench_runners(n_runs: int = 8,
+                  max_workers: int = 4,
+                  ndat: int = 2304,
+                  nchan: int = 256,
+                  startup: float = 0.5,
+                  per_msample: float = 0.1) -> tuple:
+    os.environ["PATH"] = bin_dir + os.pathsep + os.environ["PATH"]
+    os.environ["STANDIN_DSPSR_COST"] = f"{startup},{per_msample}"
+
+    work_dir = tempfile.mkdtemp()
+    metrics_file_path = metrics.metrics_file_path
+    metrics.metrics_file_path = os.path.join(work_dir, "metrics.jsonl")
+    try:
+        input_file_path = write_dada_file(
+            os.path.join(work_dir, "channelized.dump"),
+            {"TSAMP": 0.025, "OS_FACTOR": "4/3"},
+            shape=(ndat, nchan, 2))
+
+        run = functools.partial(
+            data_gen.run_dspsr_with_dump,
+            input_file_path,
+            output_dir=work_dir,
+            dump_stage="Detection",
+            extra_args="-IF 1:1024:256 -V")
+
+        def run_all(name, graph_workers):
+            graph = data_gen.Graph(max_workers=graph_workers)
+            for i in range(n_runs):
+                graph.add(i, functools.partial(
+                    run, output_file_name=f"{name}.{i}"))
+            t0 = time.time()
+            graph.run()
+            return time.time() - t0
+
+        timings = {}
+        timings["sequential"] = run_all("sequential", 1)
+        timings["parallel"] = run_all("parallel", max_workers)
+
+        cache = data_gen.RunCache(os.path.join(work_dir, "cache"))
+        data_gen.dspsr_util.DspsrRunner.cache = cache
+        try:
+            timings["cache (cold)"] = run_all("cold", 1)
+            timings["cache (warm)"] = run_all("warm", 1)
+        finally:
+            data_gen.dspsr_util.DspsrRunner.cache = None
+
+        summary = metrics.summarize_metrics(metrics.load_metrics())
+    finally:
+        metrics.metrics_file_path = metrics_file_path
+        shutil.rmtree(work_dir)
+
+    return timings, summary
+
+
+def create_parser():
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark dspsr runners with stand-in executables")
+
+    parser.add_argument("-n", "--n-runs",
+                        dest="n_runs", type=int, required=False,
+                        default=8)
+
+    parser.add_argument("-w", "--max-workers",
+                        dest="max_workers", type=int, required=False,
+                        default=4)
+
+    parser.add_argument("--ndat",
+                        dest="ndat", type=int, required=False,
+                        default=2304)
+
+    parser.add_argument("--nchan",
+                        dest="nchan", type=int, required=False,
+                        default=256)
+
+    parser.add_argument("--startup",
+                        dest="startup", type=float, required=False,
+                        default=0.5,
+                        help="Stand-in dspsr startup time, in seconds")
+
+    parser.add_argument("--per-msample",
+                        dest="per_msample", type=float, required=False,
+                        default=0.1,
+                        help=("Stand-in dspsr processing time, in seconds "
+                              "per million input samples"))
+
+    parser.add_argument("-v", "--verbose",
+                        dest="verbose", action="store_true")
+
+    return parser
+
+
+def main():
+    parsed = create_parser().parse_args()
+    level = logging.INFO
+    if parsed.verbose:
+        level = logging.DEBUG
+    logging.basicConfig(level=level)
+
+    timings, summary = bench_runners(
+        n_runs=parsed.n_runs,
+        max_workers=parsed.max_workers,
+        ndat=parsed.ndat,
+        nchan=parsed.nchan,
+        startup=parsed.startup,
+        per_msample=parsed.per_msample
+    )
+    for name, delta in timings.items():
+        print(f"{name:<16}{delta:>8.3f} s "
+              f"({parsed.n_runs / delta:.2f} runs/s)")
+    for program, totals in summary.items():
+        print(f"{program}: {totals['count']} runs, "
+              f"{totals['wall_time']:.3f} s wall, "
+              f"{totals['max_rss']} kB max rss")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,35 @@
 import argparse
+import concurrent.futures
+import csv
+import json
 import typing
 import logging
 import os
+import warnings
 
-import matplotlib.pyplot as plt
 import numpy as np
 import scipy.signal
 
 import psr_formats
 import comparator
 
+from data_gen.dada import LazyDADAFile
+from data_gen.pairwise import PairwiseComparison
+from data_gen.plotting import plot_envelope
+from data_gen.pyramid import Pyramid, plot_overview
+from data_gen.spectral import Aligner, four_step_fft, welch_spectrum
+from data_gen.streaming import compare_streams
+
 __all__ = [
     "load_n_chop",
-    "compare_dump_files"
+    "map_n_chop",
+    "compare_dump_files",
+    "stream_compare_dump_files",
+    "segment_compare_dump_files",
+    "load_manifest",
+    "compare_group",
+    "batch_compare_dump_files",
+    "overview_dump_files"
 ]
 
 cur_dir = os.path.dirname(os.path.abspath(__file__))
@@ -125,6 +142,91 @@ def load_n_chop_dada(
     return data, dada_files
 
 
+def map_n_chop(
+    *file_paths: typing.Tuple[str],
+    pol: list = None,
+    chan: list = None,
+    dat: list = None,
+    dtype: np.dtype = None,
+    offset: int = 0,
+    arrangement: dict = None
+) -> list:
+    """
+    Like the `load_n_chop` functions, but memory map the files instead of
+    reading them, so nothing gets loaded until it is accessed. Slices are
+    views into the memory maps, and are not flattened.
+    """
+    module_logger.debug((f"map_n_chop: mapping data from "
+                         f"{len(file_paths)} files"))
+    pol = _process_dim(pol)
+    chan = _process_dim(chan)
+    dat = _process_dim(dat)
+
+    data = []
+    if dtype is not None:
+        data = [np.memmap(f, dtype=dtype, mode="r", offset=offset)
+                for f in file_paths]
+    elif file_paths[0].endswith(".dump"):
+        data = [LazyDADAFile(f).data for f in file_paths]
+        data = [d[dat, chan, pol] for d in data]
+    else:
+        if arrangement is None:
+            arrangement = {'dat': 0, 'chan': 1}
+        for f in file_paths:
+            arr = np.load(f, mmap_mode="r")
+            if arr.ndim == 2:
+                s = [slice(None) for i in range(2)]
+                s[arrangement['dat']] = dat
+                s[arrangement['chan']] = chan
+                arr = arr[tuple(s)]
+            data.append(arr)
+
+    min_dat = np.amin([d.shape[0] for d in data])
+    return [d[:min_dat] for d in data]
+
+
+def stream_compare_dump_files(
+    *file_paths: typing.Tuple[str],
+    pol: list = None,
+    chan: list = None,
+    dat: list = None,
+    dtype: np.dtype = None,
+    offset: int = 0,
+    block_size: int = 2**20,
+    atol: float = 1e-7,
+    freq_domain: bool = False,
+    work_dir: str = None
+) -> dict:
+    """
+    Compare each pair of files block by block with
+    `data_gen.streaming.compare_streams`, without loading either file into
+    memory.
+
+    If `freq_domain` is set, the full length spectrum of each file gets
+    computed out of core with `data_gen.spectral.four_step_fft`, in
+    temporary memory maps in `work_dir`, and the spectra get compared
+    instead.
+
+    Returns:
+        dict: pairs of file indices to comparison products
+    """
+    data = map_n_chop(*file_paths, pol=pol, chan=chan, dat=dat,
+                      dtype=dtype, offset=offset)
+    if freq_domain:
+        module_logger.info(
+            "stream_compare_dump_files: computing out of core spectra")
+        data = [four_step_fft(d, block_size=block_size, work_dir=work_dir)
+                for d in data]
+    res = {}
+    for i in range(len(data)):
+        for j in range(i + 1, len(data)):
+            module_logger.info((f"stream_compare_dump_files: comparing "
+                                f"{file_paths[i]} and {file_paths[j]}"))
+            res[(i, j)] = compare_streams(
+                data[i], data[j], block_size=block_size, atol=atol)
+    return res
+
+
 def correlate(a, b):
     # print(a.shape, a.dtype)
     # print(b.shape, b.dtype)
@@ -133,6 +235,15 @@ def correlate(a, b):
     return f_a*np.conj(f_b)
 
 
+def aligned_correlate(a, b):
+    """
+    Time domain cross correlation of `a` with `b`, zero padded to a fast FFT
+    length by `data_gen.spectral.Aligner`. Unlike `correlate`, which gives
+    the cross spectrum, this gives one lag per sample.
+    """
+    return Aligner(b).correlate(a)
+
+
 def compare_dump_files(
     *file_paths: typing.Tuple[str],
     pol: list = None,
@@ -143,16 +254,34 @@ def compare_dump_files(
     normalize: bool = False,
     freq_domain: bool = True,
     time_domain: list = None,
+    products: dict = None,
     comp: comparator.MultiDomainComparator = None,
     dtype: np.dtype = None,
     offset: int = 0,
     save_plots: bool = False,
     plot_file_name_base: str = "",
     plot_output_dir: str = None
-):
+) -> dict:
+    """
+    Compare each pair of files with `data_gen.pairwise.PairwiseComparison`,
+    which computes the spectrum of each file once, and the products of each
+    unordered pair once.
+
+    `comp` is deprecated, and ignored: comparator products don't take an
+    `axis` argument. Pass `products`, functions like `np.mean`, instead.
+
+    Returns:
+        dict: "freq" and/or "time" products, as returned by
+            `PairwiseComparison.products`
+    """
     module_logger.debug((f"compare_dump_files: time_domain: {time_domain}, "
                          f"freq_domain: {freq_domain}"))
 
+    if comp is not None:
+        warnings.warn(("compare_dump_files: comp is deprecated and ignored, "
+                       "pass products instead"),
+                      DeprecationWarning, stacklevel=2)
+
     if plot_output_dir is None:
         plot_output_dir = products_dir
 
@@ -174,74 +303,312 @@ def compare_dump_files(
         fft_size = len(data_slice[0])
         fft_offset = 0
 
-    if comp is None:
-        module_logger.debug("compare_dump_files: creating default comparator")
-        # comp = comparator.TimeFreqDomainComparator()
-        comp = comparator.MultiDomainComparator(domains={
-            "time": comparator.SingleDomainComparator("time"),
-            "freq": comparator.FrequencyDomainComparator()
-        })
-        comp.freq.domain = [fft_offset, fft_size+fft_offset]
-        print(comp.freq._operation_domain)
-        if time_domain is not None:
-            comp.time.domain = time_domain
-
-        comp.operators["this"] = lambda a: a
-
-        if len(data_slice) > 1:
-            pass
-            # comp.operators["diff"] = lambda a, b: a - b
-            # comp.operators["scipy.signal.fftconvolve"] = lambda a, b: \
-            #     scipy.signal.fftconvolve(a, b[::-1], mode="full")
-            # comp.operators["scipy.signal.correlate"] = lambda a, b: \
-            #     np.fft.ifft(scipy.signal.correlate(a, b, mode="same", method="fft"))
-
-            # comp.operators["xcorr"] = lambda a, b: np.correlate(a, b, mode="full")
-            # comp.operators["correlate"] = correlate
-
-        comp.products["argmax"] = lambda a: np.argmax(a)
-        comp.products["mean"] = lambda a: np.mean(a)
-        comp.products["sum"] = lambda a: np.sum(a)
-
+    pairwise = PairwiseComparison(
+        *data_slice, fft_size=fft_size, fft_offset=fft_offset)
     file_names = [os.path.basename(f) for f in file_paths]
+    res = {}
     figs = []
     if freq_domain:
         module_logger.info(
             "compare_dump_files: doing frequency domain comparison")
-        res_op, res_prod = comp.freq.cartesian(*data_slice, labels=file_names)
-        # print(res_prod["this"])
-        # print(res_prod["diff"])
-        f, a = comparator.util.plot_operator_result(res_op, figsize=(16, 9))
-        figs.extend(f)
+        res["freq"] = pairwise.products("freq", products)
+        module_logger.info(f"compare_dump_files: freq products: {res['freq']}")
+        figs.append(_plot_pairwise(
+            pairwise.spectra, file_names, "Frequency Bin"))
 
     if time_domain is not None:
         module_logger.info(
             "compare_dump_files: doing time domain comparison")
-        # res_op, res_prod = comp.time.polar(*data_slice, labels=file_names)
-        res_op, res_prod = comp.time.cartesian(*data_slice, labels=file_names)
-        # print(res_prod["this"])
-        print(res_prod["this"])
-        print(res_op["this"].result[0])
-        # print(res_prod["diff"])
-        f, a = comparator.util.plot_operator_result(res_op, figsize=(16, 9))
-        figs.extend(f)
-
-        # res_op, res_prod = comp.time.cartesian(*data_slice, labels=file_names)
-        # print(res_prod["this"])
-        # # print(res_prod["diff"])
-        # f, a = comparator.util.plot_operator_result(res_op, figsize=(16, 9))
-        # figs.extend(f)
-
+        time_slice = _process_dim(time_domain)
+        res["time"] = pairwise.products("time", products, window=time_slice)
+        module_logger.info(f"compare_dump_files: time products: {res['time']}")
+        figs.append(_plot_pairwise(
+            pairwise.data[..., time_slice], file_names, "Time Samples"))
 
     if time_domain or freq_domain:
-        if save_plots:
-            if plot_file_name_base != "":
-                plot_file_name_base = f"{plot_file_name_base}."
-            for i in range(len(figs)):
-                file_name = f"compare_dump_files.{plot_file_name_base}{i}.png"
-                file_path = os.path.join(plot_output_dir, file_name)
-                figs[i].savefig(file_path)
-        plt.show()
+        _save_n_show(figs, save_plots, plot_file_name_base, plot_output_dir)
+    return res
+
+
+def _power_dB(a):
+    return 10.0*np.log10(np.abs(a)**2 + 1e-13)
+
+
+def _dB(a):
+    return 10.0*np.log10(np.abs(a) + 1e-13)
+
+
+def _plot_pairwise(x: np.ndarray,
+                   labels: list,
+                   xlabel: str,
+                   power_dB: callable = _power_dB):
+    """
+    Plot the power of each signal in the stack `x`, and the power of the
+    difference of each unordered pair. `power_dB` gets the power of a
+    signal in dB; pass `_dB` for signals that are powers already.
+    """
+    import matplotlib.pyplot as plt
+
+    fig, axes = plt.subplots(2, 1, sharex=True, figsize=(16, 9))
+    for i, label in enumerate(labels):
+        plot_envelope(axes[0], x[i], transform=power_dB, label=label)
+    axes[0].set_title("Power")
+    axes[0].legend()
+    row, col = np.triu_indices(len(labels), k=1)
+    for i, j in zip(row, col):
+        plot_envelope(axes[1], x[i] - x[j], transform=power_dB,
+                      label=f"{labels[i]} - {labels[j]}")
+    axes[1].set_title("Power of Difference")
+    axes[1].legend()
+    for ax in axes:
+        ax.grid(True)
+        ax.set_ylabel("Power (dB)")
+    axes[1].set_xlabel(xlabel)
+    return fig
+
+
+def _save_n_show(figs: list,
+                 save_plots: bool,
+                 plot_file_name_base: str,
+                 plot_output_dir: str) -> None:
+    if save_plots:
+        if plot_file_name_base != "":
+            plot_file_name_base = f"{plot_file_name_base}."
+        for i in range(len(figs)):
+            file_name = f"compare_dump_files.{plot_file_name_base}{i}.png"
+            file_path = os.path.join(plot_output_dir, file_name)
+            figs[i].savefig(file_path)
+    import matplotlib.pyplot as plt
+    plt.show()
+
+
+def segment_compare_dump_files(
+    *file_paths: typing.Tuple[str],
+    fft_size: int,
+    overlap: int = 0,
+    window: str = "hann",
+    pol: list = None,
+    chan: list = None,
+    dat: list = None,
+    dtype: np.dtype = None,
+    offset: int = 0,
+    products: dict = None,
+    comp: comparator.SingleDomainComparator = None,
+    save_plots: bool = False,
+    plot_file_name_base: str = "",
+    plot_output_dir: str = None
+) -> dict:
+    """
+    Compare the average power spectra of each file, computed over
+    `fft_size` segments with `data_gen.spectral.welch_spectrum`, instead of
+    the spectrum of the whole `data_slice`. Like `compare_dump_files`, each
+    unordered pair gets compared once, with
+    `data_gen.pairwise.PairwiseComparison`.
+
+    `comp` is deprecated, and ignored, as in `compare_dump_files`.
+
+    Returns:
+        dict: "spectrum" products, as returned by
+            `PairwiseComparison.products`
+    """
+    if comp is not None:
+        warnings.warn(("segment_compare_dump_files: comp is deprecated and "
+                       "ignored, pass products instead"),
+                      DeprecationWarning, stacklevel=2)
+
+    if plot_output_dir is None:
+        plot_output_dir = products_dir
+
+    data = map_n_chop(*file_paths, pol=pol, chan=chan, dat=dat,
+                      dtype=dtype, offset=offset)
+    spectra = [welch_spectrum(d, fft_size, overlap=overlap, window=window)
+               for d in data]
+
+    pairwise = PairwiseComparison(*spectra)
+    file_names = [os.path.basename(f) for f in file_paths]
+    module_logger.info(
+        "segment_compare_dump_files: doing segmented spectral comparison")
+    res = {"spectrum": pairwise.products("time", products)}
+    module_logger.info((f"segment_compare_dump_files: spectrum products: "
+                        f"{res['spectrum']}"))
+    fig = _plot_pairwise(pairwise.data, file_names, "Frequency Bin",
+                         power_dB=_dB)
+    _save_n_show([fig], save_plots, plot_file_name_base, plot_output_dir)
+    return res
+
+
+def overview_dump_files(
+    *file_paths: typing.Tuple[str],
+    pol: int = 0,
+    chan: int = 0,
+    save_plots: bool = False,
+    plot_file_name_base: str = "",
+    plot_output_dir: str = None
+) -> None:
+    """
+    Plot DADA files one above the other, with a shared time axis, from
+    their overview pyramids. Zooming in on one zooms in on all of them, and
+    only the zoomed region gets read from the raw data.
+    """
+    if plot_output_dir is None:
+        plot_output_dir = products_dir
+    import matplotlib.pyplot as plt
+
+    pyramids = [Pyramid(f) for f in file_paths]
+    fig, axes = plt.subplots(len(file_paths) + 1, 1,
+                             sharex=True, figsize=(16, 9))
+    for ax, pyramid, file_path in zip(axes, pyramids, file_paths):
+        ax.grid(True)
+        ax.set_title(os.path.basename(file_path))
+        for component in pyramid.components:
+            plot_overview(ax, pyramid, chan=chan, pol=pol,
+                          component=component)
+    axes[-1].grid(True)
+    axes[-1].set_title("Mean power")
+    for pyramid in pyramids:
+        plot_overview(axes[-1], pyramid, chan=chan, pol=pol,
+                      component="power")
+    axes[-1].legend([os.path.basename(f) for f in file_paths])
+    _save_n_show([fig], save_plots, plot_file_name_base, plot_output_dir)
+
+
+def load_manifest(file_path: str) -> list:
+    """
+    Load a batch manifest: one group of files to compare per line,
+    separated by whitespace or commas. Relative paths are relative to the
+    manifest, and lines starting with `#` are ignored.
+    """
+    manifest_dir = os.path.dirname(os.path.abspath(file_path))
+    groups = []
+    with open(file_path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line == "" or line.startswith("#"):
+                continue
+            groups.append([os.path.join(manifest_dir, p)
+                           for p in line.replace(",", " ").split()])
+    return groups
+
+
+def _flatten_products(prefix: str, products: dict) -> dict:
+    row = {}
+    for key, val in products.items():
+        if hasattr(val, "items"):
+            row.update(_flatten_products(f"{prefix}{key}_", val))
+        else:
+            row[f"{prefix}{key}"] = val.item() if hasattr(val, "item") \
+                else val
+    return row
+
+
+def compare_group(
+    file_paths: list,
+    fft_size: int = None,
+    overlap: int = 0,
+    window: str = "hann",
+    **kwargs
+) -> list:
+    """
+    Compare each pair of files in a group without plotting anything, for
+    batch runs.
+
+    Args:
+        file_paths (list): files to compare
+        fft_size (int): if given, also compare power spectra averaged over
+            `fft_size` segments
+        overlap (int): segment overlap
+        window (str): segment window
+        kwargs (dict): passed to `stream_compare_dump_files`
+    Returns:
+        list: one flat dict of products per pair
+    """
+    res = stream_compare_dump_files(*file_paths, **kwargs)
+    if fft_size is not None:
+        data = map_n_chop(*file_paths,
+                          pol=kwargs.get("pol"), chan=kwargs.get("chan"),
+                          dat=kwargs.get("dat"), dtype=kwargs.get("dtype"),
+                          offset=kwargs.get("offset", 0))
+        spectra = PairwiseComparison(*[
+            welch_spectrum(d, fft_size, overlap=overlap, window=window)
+            for d in data]).products("time")["diff"]
+    rows = []
+    for (i, j), products in res.items():
+        row = {"file_path_a": file_paths[i], "file_path_b": file_paths[j]}
+        row.update(_flatten_products("diff_", products["diff"]))
+        row["isclose_count"] = products["isclose"]["count"]
+        row["isclose_mean"] = products["isclose"]["mean"]
+        if fft_size is not None:
+            for name, matrix in spectra.items():
+                row[f"spectrum_diff_{name}"] = matrix[i, j].item()
+        rows.append(row)
+    return rows
+
+
+def _compare_group_row(idx: int, file_paths: list, kwargs: dict) -> list:
+    try:
+        rows = compare_group(file_paths, **kwargs)
+    except Exception as exc:
+        module_logger.error(
+            f"_compare_group_row: group {idx} {file_paths} failed: {exc}")
+        rows = [{"file_path_a": file_paths[0], "error": repr(exc)}]
+    return [{"group": idx, **row} for row in rows]
+
+
+def batch_compare_dump_files(
+    groups: list,
+    output_file_path: str,
+    max_workers: int = None,
+    **kwargs
+) -> int:
+    """
+    Compare groups of files in a process pool, without rendering anything.
+    Each pair gets a row of products, written as JSON lines, or as CSV if
+    `output_file_path` ends in `.csv`. JSON lines get written as groups
+    finish, in no particular order; every row has the index of its group.
+    Groups that fail get a row with an `error` column instead.
+
+    Usage:
+
+    .. code-block:: python
+
+        groups = load_manifest("nightly.manifest")
+        batch_compare_dump_files(groups, "nightly.jsonl", max_workers=16)
+
+    Args:
+        groups (list): lists of files to compare
+        output_file_path (str): output file path
+        max_workers (int): number of worker processes
+        kwargs (dict): passed to `compare_group`
+    Returns:
+        int: number of rows written
+    """
+    as_csv = output_file_path.endswith(".csv")
+    rows = []
+    n_rows = 0
+    with open(output_file_path, "w") as f, \
+            concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+        futures = [executor.submit(_compare_group_row, idx, group, kwargs)
+                   for idx, group in enumerate(groups)]
+        for future in concurrent.futures.as_completed(futures):
+            group_rows = future.result()
+            n_rows += len(group_rows)
+            if as_csv:
+                rows.extend(group_rows)
+            else:
+                for row in group_rows:
+                    f.write(json.dumps(row, default=str) + "\n")
+                f.flush()
+        if as_csv:
+            rows.sort(key=lambda row: row["group"])
+            field_names = []
+            for row in rows:
+                field_names.extend(k for k in row if k not in field_names)
+            writer = csv.DictWriter(f, fieldnames=field_names)
+            writer.writeheader()
+            writer.writerows(rows)
+    module_logger.info((f"batch_compare_dump_files: wrote {n_rows} rows "
+                        f"for {len(groups)} groups to {output_file_path}"))
+    return n_rows
 
 
 def create_parser():
@@ -249,10 +616,28 @@ def create_parser():
     parser = argparse.ArgumentParser(
         description="compare the contents of two dump files")
 
-    parser.add_argument("-i", "--input-files",
+    inputs = parser.add_mutually_exclusive_group(required=True)
+
+    inputs.add_argument("-i", "--input-files",
                         dest="input_file_paths",
-                        nargs="+", type=str,
-                        required=True)
+                        nargs="+", type=str)
+
+    inputs.add_argument("--batch",
+                        dest="manifest_file_path", type=str,
+                        help=("Compare the groups of files in a manifest, "
+                              "one group per line, without plotting"))
+
+    parser.add_argument("-o", "--output_file",
+                        dest="output_file_path", type=str, required=False,
+                        default=os.path.join(products_dir,
+                                             "compare_dump_files.jsonl"),
+                        help=("--batch output file. Written as CSV if it "
+                              "ends in .csv, JSON lines otherwise"))
+
+    parser.add_argument("-w", "--max_workers",
+                        dest="max_workers", type=int, required=False,
+                        default=None,
+                        help="Number of --batch worker processes")
 
     parser.add_argument("-fft", "--fft_size",
                         dest="fft_size", type=int, required=False)
@@ -293,6 +678,46 @@ def create_parser():
                         help=("Specify the data location (in bytes) in "
                               "the binary file."))
 
+    parser.add_argument("--segment",
+                        dest="segment", action="store_true",
+                        help=("Compare power spectra averaged over "
+                              "--fft_size segments"))
+
+    parser.add_argument("--overlap",
+                        dest="overlap", type=int, required=False,
+                        default=0,
+                        help="Number of samples shared by --segment segments")
+
+    parser.add_argument("--window",
+                        dest="window", type=str, required=False,
+                        default="hann",
+                        help="scipy.signal window for --segment")
+
+    parser.add_argument("--overview",
+                        dest="overview", action="store_true",
+                        help=("Plot .dump files from overview pyramids, "
+                              "building them if needed"))
+
+    parser.add_argument("-s", "--stream",
+                        dest="stream", action="store_true",
+                        help=("Compare files block by block with running "
+                              "statistics instead of loading them"))
+
+    parser.add_argument("--out_of_core",
+                        dest="out_of_core", action="store_true",
+                        help=("Compare full length spectra computed out of "
+                              "core, block by block. Implies --stream"))
+
+    parser.add_argument("--block_size",
+                        dest="block_size", type=int, required=False,
+                        default=2**20,
+                        help="Number of samples per block with --stream")
+
+    parser.add_argument("--atol",
+                        dest="atol", type=float, required=False,
+                        default=1e-7,
+                        help="Absolute tolerance for --stream isclose counts")
+
     parser.add_argument("-v", "--verbose",
                         dest="verbose", action="store_true")
 
@@ -328,6 +753,72 @@ def main():
     if dtype is not None:
         dtype = dtype_map[dtype]
 
+    if parsed.manifest_file_path is not None:
+        batch_compare_dump_files(
+            load_manifest(parsed.manifest_file_path),
+            parsed.output_file_path,
+            max_workers=parsed.max_workers,
+            fft_size=parsed.fft_size if parsed.segment else None,
+            overlap=parsed.overlap,
+            window=parsed.window,
+            pol=_parse_dim(parsed.pol),
+            chan=_parse_dim(parsed.chan),
+            dat=_parse_dim(parsed.dat),
+            dtype=dtype,
+            offset=parsed.offset,
+            block_size=parsed.block_size,
+            atol=parsed.atol,
+            freq_domain=parsed.out_of_core
+        )
+        return
+
+    if parsed.overview:
+        pol, chan = _parse_dim(parsed.pol), _parse_dim(parsed.chan)
+        overview_dump_files(
+            *parsed.input_file_paths,
+            pol=0 if pol is None else pol,
+            chan=0 if chan is None else chan,
+            save_plots=parsed.save_plots,
+            plot_file_name_base=parsed.plot_file_name_base
+        )
+        return
+
+    if parsed.segment:
+        if parsed.fft_size is None:
+            raise ValueError("--segment needs --fft_size")
+        segment_compare_dump_files(
+            *parsed.input_file_paths,
+            fft_size=parsed.fft_size,
+            overlap=parsed.overlap,
+            window=parsed.window,
+            pol=_parse_dim(parsed.pol),
+            chan=_parse_dim(parsed.chan),
+            dat=_parse_dim(parsed.dat),
+            dtype=dtype,
+            offset=parsed.offset,
+            save_plots=parsed.save_plots,
+            plot_file_name_base=parsed.plot_file_name_base
+        )
+        return
+
+    if parsed.stream or parsed.out_of_core:
+        res = stream_compare_dump_files(
+            *parsed.input_file_paths,
+            pol=_parse_dim(parsed.pol),
+            chan=_parse_dim(parsed.chan),
+            dat=_parse_dim(parsed.dat),
+            dtype=dtype,
+            offset=parsed.offset,
+            block_size=parsed.block_size,
+            atol=parsed.atol,
+            freq_domain=parsed.out_of_core
+        )
+        for (i, j), products in res.items():
+            print(f"{parsed.input_file_paths[i]} "
+                  f"{parsed.input_file_paths[j]}")
+            print(json.dumps(products, indent=2, default=lambda o: o.item()))
+        return
+
     compare_dump_files(
         *parsed.input_file_paths,
         pol=_parse_dim(parsed.pol),
@@ -4,11 +4,28 @@ from .dspsr_util import (
     run_psrdiff,
     run_psrtxt,
     load_psrtxt_data,
+    load_psrtxt_stream,
     find_in_log,
     BaseRunner)
+from .executor import Graph
+from .cache import RunCache
+from .dada import LazyDADAFile
+from .streaming import OnlineStats, compare_streams
+from .spectral import four_step_fft, welch_spectrum, fast_length, Aligner
+from .pairwise import PairwiseComparison
+from .report_store import ReportStore
+from .plotting import minmax_envelope, plot_envelope
+from .pyramid import Pyramid, build_pyramid
+from .sweep import (
+    map_sweep,
+    matrix,
+    adaptive_sweep,
+    SequentialEstimator)
+from .checkpoint import Checkpoint
 from .generate_test_vector import (
     generate_test_vector,
     complex_sinusoid,
+    newman_phases,
     time_domain_impulse)
 from .channelize import channelize
 from .synthesize import synthesize
@@ -24,10 +41,32 @@ __all__ = [
     "run_psrdiff",
     "run_psrtxt",
     "load_psrtxt_data",
+    "load_psrtxt_stream",
     "find_in_log",
     "BaseRunner",
+    "Graph",
+    "RunCache",
+    "LazyDADAFile",
+    "OnlineStats",
+    "compare_streams",
+    "four_step_fft",
+    "welch_spectrum",
+    "fast_length",
+    "Aligner",
+    "PairwiseComparison",
+    "ReportStore",
+    "minmax_envelope",
+    "plot_envelope",
+    "Pyramid",
+    "build_pyramid",
+    "map_sweep",
+    "matrix",
+    "adaptive_sweep",
+    "SequentialEstimator",
+    "Checkpoint",
     "generate_test_vector",
     "complex_sinusoid",
+    "newman_phases",
     "time_domain_impulse",
     "channelize",
     "synthesize",
@@ -0,0 +1,151 @@
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+
+__all__ = [
+    "RunCache"
+]
+
+module_logger = logging.getLogger(__name__)
+
+_chunk_size = 2**20
+
+
+class RunCache:
+    """
+    Content addressed store for the output files of external processes.
+    Entries are keyed by a hash of the contents of the input files and of
+    anything else that determines the output, like the command line and
+    the program version. When the total size of the cache grows past
+    `max_size` the least recently used entries get removed.
+
+    Usage:
+
+    .. code-block:: python
+
+        cache = RunCache("/tmp/dspsr_cache", max_size=2**33)
+        key = cache.key("dspsr -c 0.005 -D 0.0 -IF 1:1024:256",
+                        file_paths=["channelized.dump"])
+        cached = cache.get(key)
+        if cached is None:
+            ...  # run the process
+            cache.put(key, {"out.ar": "channelized.ar"})
+
+    Args:
+        cache_dir (str): Directory where entries get stored
+        max_size (int): Maximum total size of the cache, in bytes
+    """
+    def __init__(self, cache_dir: str, max_size: int = 2**34):
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self.max_size = max_size
+        self._file_hashes = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _file_hash(self, file_path: str) -> str:
+        stat = os.stat(file_path)
+        stat_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+        if stat_key not in self._file_hashes:
+            sha = hashlib.sha256()
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(_chunk_size), b""):
+                    sha.update(chunk)
+            self._file_hashes[stat_key] = sha.hexdigest()
+        return self._file_hashes[stat_key]
+
+    def key(self, *parts: str, file_paths: list = None) -> str:
+        """
+        Create a cache key from the contents of `file_paths`, and `parts`.
+        Files are identified by their contents, not their paths.
+        """
+        if file_paths is None:
+            file_paths = []
+        sha = hashlib.sha256()
+        for file_path in file_paths:
+            sha.update(self._file_hash(file_path).encode())
+        for part in parts:
+            sha.update(b"\0")
+            sha.update(str(part).encode())
+        return sha.hexdigest()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key: str) -> dict:
+        """
+        Get the files stored under `key`.
+
+        Returns:
+            dict: names to paths of the cached files, or None if there is
+                no entry for `key`.
+        """
+        entry_dir = self._entry_dir(key)
+        with self._lock:
+            if not os.path.isdir(entry_dir):
+                module_logger.debug(f"RunCache.get: miss {key}")
+                return None
+            os.utime(entry_dir)
+        module_logger.debug(f"RunCache.get: hit {key}")
+        return {name: os.path.join(entry_dir, name)
+                for name in os.listdir(entry_dir)}
+
+    def put(self, key: str, files: dict) -> None:
+        """
+        Copy files into the cache under `key`.
+
+        Args:
+            key (str): cache key
+            files (dict): names to paths of the files to store
+        """
+        tmp_dir = tempfile.mkdtemp(prefix=".tmp.", dir=self.cache_dir)
+        try:
+            for name, file_path in files.items():
+                shutil.copyfile(file_path, os.path.join(tmp_dir, name))
+            with self._lock:
+                if not os.path.isdir(self._entry_dir(key)):
+                    os.rename(tmp_dir, self._entry_dir(key))
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        self.evict()
+
+    def restore(self, cached: dict, files: dict) -> None:
+        """
+        Copy cached files to their destinations.
+
+        Args:
+            cached (dict): result of `get`
+            files (dict): names to destination paths
+        """
+        for name, file_path in files.items():
+            shutil.copyfile(cached[name], file_path)
+
+    def _entries(self) -> list:
+        entries = []
+        for key in os.listdir(self.cache_dir):
+            entry_dir = self._entry_dir(key)
+            if key.startswith(".") or not os.path.isdir(entry_dir):
+                continue
+            size = sum(entry.stat().st_size
+                       for entry in os.scandir(entry_dir))
+            entries.append((os.stat(entry_dir).st_mtime, size, entry_dir))
+        return entries
+
+    def size(self) -> int:
+        return sum(entry[1] for entry in self._entries())
+
+    def evict(self) -> None:
+        """
+        Remove least recently used entries until the cache fits in
+        `max_size`.
+        """
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(entry[1] for entry in entries)
+            while total > self.max_size and len(entries) > 0:
+                mtime, size, entry_dir = entries.pop(0)
+                module_logger.debug(f"RunCache.evict: removing {entry_dir}")
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                total -= size
@@ -2,11 +2,8 @@ import argparse
 import os
 import logging
 
-import partialize
-import pfb.format_handler
-import psr_formats
-
 from . import util
+from .dada import LazyDADAFile
 from .config import config, config_dir, build_dir
 
 __all__ = [
@@ -16,7 +13,7 @@ __all__ = [
 module_logger = logging.getLogger(__name__)
 
 
-@partialize.partialize
+@util.lazy_partialize
 def channelize(input_data_file_path: str,
                channels: int = None,
                os_factor_str: str = None,
@@ -72,10 +69,11 @@ def channelize(input_data_file_path: str,
         util.run_cmd(cmd_str, log_file_path=os.path.join(
             output_dir, log_file_name))
 
-        return psr_formats.DADAFile(
-            os.path.join(output_dir, output_file_name)).load_data()
+        return LazyDADAFile(os.path.join(output_dir, output_file_name))
 
     elif backend == "python":
+        import pfb.format_handler
+        import psr_formats
         input_data_file = psr_formats.DADAFile(input_data_file_path)
         channelizer = pfb.format_handler.PSRFormatChannelizer(
             os_factor=os_factor_str,
@@ -0,0 +1,119 @@
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+__all__ = [
+    "Checkpoint"
+]
+
+module_logger = logging.getLogger(__name__)
+
+
+def _json_default(val):
+    if isinstance(val, np.ndarray):
+        return val.tolist()
+    if isinstance(val, np.generic):
+        return val.item()
+    if isinstance(val, complex):
+        return [val.real, val.imag]
+    return str(val)
+
+
+def _dumps(val) -> str:
+    return json.dumps(val, sort_keys=True, default=_json_default)
+
+
+class Checkpoint:
+    """
+    Results of a sweep, saved one argument at a time, so that an
+    interrupted sweep can pick up where it left off.
+
+    Each result gets appended to a JSONL file as soon as it comes in, in a
+    single write that gets synced to disk before `append` returns. Results
+    are keyed by the sweep parameters along with the argument, so results
+    from runs with other parameters in the same file are never mistaken
+    for these. A last line left half written by a crash is ignored.
+
+    Usage:
+
+    .. code-block:: python
+
+        checkpoint = Checkpoint("checkpoint.jsonl", {"input_fft_length": 1024})
+        for arg in checkpoint.remaining(args):
+            checkpoint.append(arg, run(arg))
+        results = checkpoint.results(args)
+
+    Args:
+        file_path (str): checkpoint file path
+        params (dict): sweep parameters
+    """
+    def __init__(self, file_path: str, params: dict = None):
+        if params is None:
+            params = {}
+        self.file_path = file_path
+        self.params = params
+        self._lock = threading.Lock()
+        self._results = self._load()
+
+    def key(self, arg) -> str:
+        return _dumps({"params": self.params, "arg": arg})
+
+    def _load(self) -> dict:
+        results = {}
+        if not os.path.exists(self.file_path):
+            return results
+        with open(self.file_path, "r") as f:
+            for line in f:
+                if line.strip() == "":
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    module_logger.warning(
+                        f"Checkpoint._load: skipping partial line in "
+                        f"{self.file_path}")
+                    continue
+                results[entry["key"]] = entry["result"]
+        module_logger.debug(
+            f"Checkpoint._load: {len(results)} results in {self.file_path}")
+        return results
+
+    def __contains__(self, arg) -> bool:
+        return self.key(arg) in self._results
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def get(self, arg):
+        return self._results[self.key(arg)]
+
+    def remaining(self, args: list) -> list:
+        """arguments that don't have results yet"""
+        return [arg for arg in args if arg not in self]
+
+    def results(self, args: list) -> list:
+        """results for `args`, in the same order"""
+        return [self.get(arg) for arg in args]
+
+    def append(self, arg, result) -> None:
+        key = self.key(arg)
+        line = _dumps({"key": key, "result": result}) + "\n"
+        with self._lock:
+            fd = os.open(self.file_path,
+                         os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                # don't run on from the half written line of a crashed run
+                size = os.fstat(fd).st_size
+                if size > 0:
+                    with open(self.file_path, "rb") as f:
+                        f.seek(size - 1)
+                        if f.read(1) != b"\n":
+                            line = "\n" + line
+                os.write(fd, line.encode())
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            self._results[key] = json.loads(line)["result"]
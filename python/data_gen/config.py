@@ -1,3 +1,4 @@
+import collections.abc
 import json
 import os
 
@@ -56,6 +57,38 @@ def save_config(new_config):
              "required configuration fields"))
 
 
+class _LazyConfig(collections.abc.MutableMapping):
+    """
+    Test configuration that only gets read from `test.config.json` the first
+    time it gets used, so importing `data_gen` doesn't touch the disk.
+    """
+    def __init__(self):
+        self._config = None
+
+    def _load(self) -> dict:
+        if self._config is None:
+            self._config = load_config()
+        return self._config
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __setitem__(self, key, val):
+        self._load()[key] = val
+
+    def __delitem__(self, key):
+        del self._load()[key]
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+    def __repr__(self):
+        return repr(self._load())
+
+
 def matplotlib_config():
     import matplotlib as mpl
     params = {
@@ -68,4 +101,4 @@ def matplotlib_config():
     mpl.rcParams.update(params)
 
 
-config = load_config()
+config = _LazyConfig()
@@ -0,0 +1,186 @@
+import logging
+import os
+
+import numpy as np
+
+__all__ = [
+    "LazyDADAFile",
+    "write_dada_file"
+]
+
+module_logger = logging.getLogger(__name__)
+
+default_header_size = 4096
+
+_dtype_lookup = {
+    (8, 1): np.int8,
+    (16, 1): np.int16,
+    (32, 1): np.float32,
+    (64, 1): np.float64,
+    (32, 2): np.complex64,
+    (64, 2): np.complex128
+}
+
+
+def _parse_header(header_str: str) -> dict:
+    header = {}
+    for line in header_str.split("\n"):
+        line = line.strip("\0").strip()
+        if line == "" or line.startswith("#"):
+            continue
+        split = line.split(maxsplit=1)
+        header[split[0]] = split[1].strip() if len(split) > 1 else ""
+    return header
+
+
+def write_dada_file(file_path: str,
+                    header: dict,
+                    data: np.ndarray = None,
+                    shape: tuple = None,
+                    dtype: np.dtype = np.complex64) -> str:
+    """
+    Write a DADA file. `NCHAN`, `NPOL`, `NDIM` and `NBIT` get filled in from
+    the data. If `data` is None, a sparse file with zeros of the given
+    `shape` and `dtype` gets created instead, which is cheap even for very
+    large files.
+
+    Args:
+        file_path (str): output file path
+        header (dict): header keys and values
+        data (np.ndarray): data with shape `(ndat, nchan, npol)`
+        shape (tuple): shape of data, if `data` is None
+        dtype (np.dtype): type of data, if `data` is None
+    Returns:
+        str: file_path
+    """
+    if data is not None:
+        shape, dtype = data.shape, data.dtype
+    dtype = np.dtype(dtype)
+    ndim = 2 if np.issubdtype(dtype, np.complexfloating) else 1
+    header = dict(header)
+    header.update({
+        "HDR_SIZE": header.get("HDR_SIZE", default_header_size),
+        "NCHAN": shape[1],
+        "NPOL": shape[2],
+        "NDIM": ndim,
+        "NBIT": 8 * dtype.itemsize // ndim
+    })
+    hdr_size = int(header["HDR_SIZE"])
+    header_str = "".join(f"{key} {val}\n" for key, val in header.items())
+    with open(file_path, "wb") as f:
+        f.write(header_str.encode("ascii").ljust(hdr_size, b"\0"))
+        if data is not None:
+            f.write(np.ascontiguousarray(data).tobytes())
+        else:
+            f.truncate(hdr_size + int(np.prod(shape)) * dtype.itemsize)
+    return file_path
+
+
+class LazyDADAFile:
+    """
+    Handle to a DADA file that only reads the header up front. The data get
+    memory mapped the first time they are accessed, so callers that only
+    need `file_path` never touch the data on disk.
+
+    The memory map is copy on write: in place modifications of `data` don't
+    make it back to the file.
+
+    Data have shape `(ndat, nchan, npol)`, like `psr_formats.DADAFile`.
+
+    Usage:
+
+    .. code-block:: python
+
+        dada_file = LazyDADAFile("channelized.dump")
+        dada_file["NCHAN"]  # only the header has been read
+        dada_file.data[:10, 0, 0]  # maps the data
+
+    Args:
+        file_path (str): path to the DADA file
+    """
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.header = self._read_header()
+        self._data = None
+
+    def _read_header(self) -> dict:
+        with open(self.file_path, "rb") as f:
+            header_str = f.read(default_header_size).decode("ascii", "ignore")
+            header = _parse_header(header_str)
+            hdr_size = int(header.get("HDR_SIZE", default_header_size))
+            if hdr_size > default_header_size:
+                f.seek(0)
+                header = _parse_header(
+                    f.read(hdr_size).decode("ascii", "ignore"))
+        return header
+
+    def __getitem__(self, key: str) -> str:
+        return self.header[key]
+
+    def __setitem__(self, key: str, val) -> None:
+        self.header[key] = str(val)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.header
+
+    @property
+    def hdr_size(self) -> int:
+        return int(self.header.get("HDR_SIZE", default_header_size))
+
+    @property
+    def nchan(self) -> int:
+        return int(self.header.get("NCHAN", 1))
+
+    @property
+    def npol(self) -> int:
+        return int(self.header.get("NPOL", 1))
+
+    @property
+    def ndim(self) -> int:
+        return int(self.header.get("NDIM", 1))
+
+    @property
+    def nbit(self) -> int:
+        return int(self.header.get("NBIT", 32))
+
+    @property
+    def dtype(self) -> np.dtype:
+        return np.dtype(_dtype_lookup[(self.nbit, self.ndim)])
+
+    @property
+    def ndat(self) -> int:
+        if self._data is not None:
+            return self._data.shape[0]
+        data_size = os.path.getsize(self.file_path) - self.hdr_size
+        return data_size // (self.nchan * self.npol * self.dtype.itemsize)
+
+    @property
+    def loaded(self) -> bool:
+        return self._data is not None
+
+    @property
+    def data(self) -> np.ndarray:
+        if self._data is None:
+            module_logger.debug(
+                f"LazyDADAFile.data: mapping data in {self.file_path}")
+            self._data = np.memmap(
+                self.file_path,
+                dtype=self.dtype,
+                mode="c",
+                offset=self.hdr_size,
+                shape=(self.ndat, self.nchan, self.npol))
+        return self._data
+
+    @data.setter
+    def data(self, new_data: np.ndarray) -> None:
+        self._data = new_data
+
+    def load_data(self):
+        """
+        Here for compatibility with `psr_formats.DADAFile`; data get mapped
+        when they are first accessed.
+        """
+        return self
+
+    def __repr__(self):
+        return f"LazyDADAFile({self.file_path!r})"
@@ -1,16 +1,20 @@
 # dspsr_util.py
 import os
-import glob
 import logging
 import subprocess
 import argparse
 import shlex
+import shutil
+import tempfile
+import threading
+import time
 import typing
 import functools
 
 import numpy as np
-import psr_formats
 
+from . import executor, metrics
+from .dada import LazyDADAFile
 from .config import config
 
 module_logger = logging.getLogger(__name__)
@@ -21,6 +25,7 @@ __all__ = [
     "run_psrdiff",
     "run_psrtxt",
     "load_psrtxt_data",
+    "load_psrtxt_stream",
     "find_in_log",
     "BaseRunner"
 ]
@@ -46,12 +51,27 @@ class Singleton(type):
         return cls._instances[cls]
 
 
+def _thread_local(name):
+    def fget(self):
+        return getattr(self._state, name, None)
+
+    def fset(self, value):
+        setattr(self._state, name, value)
+
+    return property(fget, fset)
+
+
 class BaseRunner(metaclass=Singleton):
 
+    # Runners are singletons; keep per call state thread local such that
+    # the same runner can be used from several threads at once.
+    output_dir = _thread_local("output_dir")
+    output_file_name_base = _thread_local("output_file_name_base")
+    extra_args = _thread_local("extra_args")
+
     def __init__(self):
-        self.output_dir = None
-        self.output_file_name_base = None
-        self.extra_args = None
+        self._state = threading.local()
+        self._reset()
 
     def _get_file_base(self, file_path: str, output_file_name: str = None):
         file_name = os.path.basename(file_path)
@@ -89,20 +109,32 @@ class BaseRunner(metaclass=Singleton):
     @staticmethod
     def chain(*callbacks):
         """
-        Chain callbacks together
+        Chain callbacks together. Each callback gets the (first) output of
+        the previous one. See `executor.Graph` for running callbacks that
+        don't depend on each other in parallel.
         """
         def _chain(*args):
-            res = []
-            res.append(callbacks[0](*args))
-            for callback in callbacks[1:]:
-                if hasattr(res[-1], "format"):
-                    res.append(callback(res[-1]))
-                else:
-                    res.append(callback(res[-1][0]))
-            return res
+            graph = executor.Graph(max_workers=1)
+            graph.add(0, functools.partial(callbacks[0], *args))
+            for i in range(1, len(callbacks)):
+                graph.add(i, callbacks[i], i - 1)
+            return graph.run(*range(len(callbacks)))
 
         return _chain
 
+    def _work_dir(self, output_dir: str = None) -> str:
+        """
+        Create a private working directory for a child process. dspsr and
+        psrdiff write some of their output to the current working
+        directory, so concurrent runs each need their own.
+        """
+        if output_dir is None:
+            output_dir = self.output_dir
+        if not output_dir:
+            output_dir = "./"
+        return tempfile.mkdtemp(
+            prefix=f".{self.__class__.__name__}.", dir=output_dir)
+
 
 class DspsrRunner(BaseRunner):
     """
@@ -121,7 +153,17 @@ class DspsrRunner(BaseRunner):
             output_dir="./",
             extra_args="-IF 1:16384"
         )
+
+    Reuse the output of identical previous runs:
+
+    .. code-block:: python
+
+        DspsrRunner.cache = RunCache("/tmp/dspsr_cache")
     """
+    # cache.RunCache for dspsr outputs. If set, runs with the same input
+    # file contents, arguments and dspsr version are only done once.
+    cache = None
+
     @_coro
     def _call(self,
               file_path: str,
@@ -139,7 +181,11 @@ class DspsrRunner(BaseRunner):
         """
         super(DspsrRunner, self).call(file_path, **kwargs)
 
-        yield
+        # mapping from names of files dspsr creates in its working
+        # directory to their final destination
+        moves = (yield)
+        if moves is None:
+            moves = {}
 
         if dm is None:
             dm = config["dm"]
@@ -149,40 +195,58 @@ class DspsrRunner(BaseRunner):
         output_ar = os.path.join(self.output_dir, self.output_file_name_base)
         output_log = os.path.join(
             self.output_dir, f"{self.output_file_name_base}.log")
+        ar = f"{output_ar}.ar"
+        # if not os.path.exists(os.path.join(self.output_dir, ar)):
+        #     ar = f"{output_ar}_0002.ar"
 
         module_logger.debug(f"run_dspsr: output archive: {output_ar}")
         module_logger.debug(f"run_dspsr: output log: {output_log}")
-        dspsr_cmd_str = (f"dspsr -c {period} -D {dm} {file_path} "
-                         f"-O {output_ar} {self.extra_args}")
+        dspsr_cmd_str = (f"dspsr -c {period} -D {dm} "
+                         f"{os.path.abspath(file_path)} "
+                         f"-O {os.path.abspath(output_ar)} {self.extra_args}")
 
         module_logger.info(f"run_dspsr: dspsr command: {dspsr_cmd_str}")
 
+        outputs = {"out.ar": ar, "out.log": output_log}
+        outputs.update(moves)
+
+        if self.cache is not None:
+            cache_key = self.cache.key(
+                f"dspsr -c {period} -D {dm} {self.extra_args}",
+                dspsr_version(),
+                file_paths=[file_path])
+            cached = self.cache.get(cache_key)
+            if cached is not None and set(outputs).issubset(cached):
+                module_logger.info("run_dspsr: using cached output")
+                self.cache.restore(cached, outputs)
+                yield (ar, output_log)
+                return
+
+        work_dir = self._work_dir()
         try:
             with open(output_log, "w") as log_file:
-                dspsr_cmd = subprocess.run(shlex.split(dspsr_cmd_str),
-                                           stdout=log_file,
-                                           stderr=log_file)
+                dspsr_cmd = metrics.run(shlex.split(dspsr_cmd_str),
+                                        input_file_paths=[file_path],
+                                        stdout=log_file,
+                                        stderr=log_file,
+                                        cwd=work_dir)
             if dspsr_cmd.returncode == 0:
-                after_cmd_str = (yield)
-                if after_cmd_str is not None:
-                    subprocess.run(shlex.split(after_cmd_str))
+                for src, dst in moves.items():
+                    shutil.move(os.path.join(work_dir, src), dst)
+                if self.cache is not None and all(
+                        os.path.exists(f) for f in outputs.values()):
+                    self.cache.put(cache_key, outputs)
         except subprocess.CalledProcessError as err:
             module_logger.error(
                 f"Couldn't execute command {dspsr_cmd_str}: {err}")
         finally:
-            dat_files = glob.glob("*.dat")
-            if len(dat_files) > 0:
-                for dat_file in dat_files:
-                    os.remove(dat_file)
-        ar = f"{output_ar}.ar"
-        # if not os.path.exists(os.path.join(self.output_dir, ar)):
-        #     ar = f"{output_ar}_0002.ar"
+            # this also removes any .dat files dspsr leaves behind
+            shutil.rmtree(work_dir, ignore_errors=True)
 
         yield (ar, output_log)
 
     def call(self, *args, **kwargs):
         coro = self._call(*args, **kwargs)
-        next(coro)
         return coro.send(None)
 
 
@@ -209,7 +273,7 @@ class DspsrDumpRunner(DspsrRunner):
         file_path (str): Path to file containing data on which to operate
         kwargs (dict): passed to _run_dspsr
     Returns:
-        psr_formats.DADAFile: DADAFile object corresponding to dump file
+        dada.LazyDADAFile: lazy handle to the dump file
     """
     def call(self, *args,
              dump_stage: str = "Detection",
@@ -219,7 +283,6 @@ class DspsrDumpRunner(DspsrRunner):
         dump_stage = dump_stage.capitalize()
         extra_args += f" -dump {dump_stage}"
         coro = self._call(*args, extra_args=extra_args, **kwargs)
-        next(coro)
         output_dump = os.path.join(
             self.output_dir,
             f"pre_{dump_stage}.{self.output_file_name_base}.dump")
@@ -227,10 +290,8 @@ class DspsrDumpRunner(DspsrRunner):
         module_logger.debug((f"run_dspsr_with_dump: "
                              f"dumping after {dump_stage} operation"))
 
-        after_cmd_str = f"mv pre_{dump_stage}.dump {output_dump}"
-
-        ar, log = coro.send(after_cmd_str)
-        return psr_formats.DADAFile(output_dump).load_data(), ar, log
+        ar, log = coro.send({f"pre_{dump_stage}.dump": output_dump})
+        return LazyDADAFile(output_dump), ar, log
 
 
 class PsrdiffRunner(BaseRunner):
@@ -257,31 +318,55 @@ class PsrdiffRunner(BaseRunner):
 
         log_file_path = os.path.join(output_dir, log_file_name)
         output_file_path = os.path.join(output_dir, output_file_name)
-        psrdiff_cmd_str = f"psrdiff {' '.join(file_paths)}"
+        psrdiff_cmd_str = (
+            f"psrdiff {' '.join(os.path.abspath(f) for f in file_paths)}")
         module_logger.debug(f"PsrdiffRunner.call: psrdiff command={psrdiff_cmd_str}")
-        after_cmd_str = f"mv {self.psrdiff_default_out} {output_file_path}"
-        module_logger.debug(f"PsrdiffRunner.call: mv command={after_cmd_str}")
 
+        work_dir = self._work_dir(output_dir)
         try:
             with open(log_file_path, "w") as log_file:
-                psrdiff_cmd = subprocess.run(shlex.split(psrdiff_cmd_str),
-                                             stdout=log_file,
-                                             stderr=log_file)
+                psrdiff_cmd = metrics.run(shlex.split(psrdiff_cmd_str),
+                                          input_file_paths=file_paths,
+                                          stdout=log_file,
+                                          stderr=log_file,
+                                          cwd=work_dir)
             if psrdiff_cmd.returncode == 0:
-                if after_cmd_str is not None:
-                    subprocess.run(shlex.split(after_cmd_str))
+                shutil.move(
+                    os.path.join(work_dir, self.psrdiff_default_out),
+                    output_file_path)
         except subprocess.CalledProcessError as err:
             module_logger.error(
                 f"Couldn't execute command {psrdiff_cmd_str}: {err}")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
 
         return output_file_path, log_file_path
 
 
 class PsrtxtRunner(BaseRunner):
+    """
+    Run `psrtxt`
+
+    Usage:
+
+    Write the text output to a file:
+
+    .. code-block:: python
 
+        txt, log = run_psrtxt("archive.ar", output_dir="./")
+        data = load_psrtxt_data(txt)
+
+    Parse the text output straight into an array, without an
+    intermediate file:
+
+    .. code-block:: python
+
+        data, log = run_psrtxt("archive.ar", output_dir="./", pipe=True)
+    """
     def call(self, file_path,
              output_file_name: str = None,
-             output_dir: str = None):
+             output_dir: str = None,
+             pipe: bool = False):
         super(PsrtxtRunner, self).call(file_path,
                                        output_file_name=output_file_name,
                                        output_dir=output_dir)
@@ -295,12 +380,27 @@ class PsrtxtRunner(BaseRunner):
 
         psrtxt_cmd_str = f"psrtxt {file_path}"
 
+        if pipe:
+            with open(log_file_path, "w") as log_file:
+                t0 = time.time()
+                psrtxt_cmd = subprocess.Popen(shlex.split(psrtxt_cmd_str),
+                                              stdout=subprocess.PIPE,
+                                              stderr=log_file)
+                with psrtxt_cmd.stdout:
+                    data = load_psrtxt_stream(psrtxt_cmd.stdout)
+                metrics.wait(psrtxt_cmd, t0, [file_path])
+            if psrtxt_cmd.returncode != 0:
+                module_logger.error(
+                    f"Couldn't execute command {psrtxt_cmd_str}")
+            return data, log_file_path
+
         try:
             with open(log_file_path, "w") as log_file, \
                     open(output_file_path, "w") as output_file:
-                subprocess.run(shlex.split(psrtxt_cmd_str),
-                               stdout=output_file,
-                               stderr=log_file)
+                metrics.run(shlex.split(psrtxt_cmd_str),
+                            input_file_paths=[file_path],
+                            stdout=output_file,
+                            stderr=log_file)
             # if psrtxt_cmd.returncode == 0:
             #     if after_cmd_str is not None:
             #         subprocess.run(shlex.split(after_cmd_str))
@@ -311,21 +411,68 @@ class PsrtxtRunner(BaseRunner):
         return output_file_path, log_file_path
 
 
-def load_psrtxt_data(psrtxt_file_path: str):
+@functools.lru_cache()
+def dspsr_version() -> str:
     """
-    Load in data from a `psrtxt` dump file
+    Get the version string of the `dspsr` on the path.
+    """
+    try:
+        version_cmd = subprocess.run(
+            ["dspsr", "--version"],
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    except OSError:
+        return "unknown"
+    return version_cmd.stdout.decode().strip()
+
+
+def load_psrtxt_stream(stream: typing.BinaryIO,
+                       rows: int = 4096,
+                       chunk_size: int = 2**20) -> np.ndarray:
     """
-    with open(psrtxt_file_path, "r") as f:
-        txt_data = f.read()
+    Parse `psrtxt` output from a binary file like object, like the stdout
+    pipe of a `psrtxt` process. Lines are parsed `chunk_size` bytes at a
+    time into a preallocated array, which doubles in size whenever it
+    fills up.
 
-    data = []
-    for line in txt_data.split("\n"):
-        if line == "":
+    Args:
+        stream (typing.BinaryIO): psrtxt output
+        rows (int): initial number of rows to allocate
+        chunk_size (int): approximate number of bytes to parse at once
+    Returns:
+        np.ndarray: array with one row per psrtxt column
+    """
+    data = None
+    n_rows = 0
+    while True:
+        lines = stream.readlines(chunk_size)
+        if len(lines) == 0:
+            break
+        lines = [line for line in lines if not line.isspace()]
+        if len(lines) == 0:
             continue
-        data.append([float(v) for v in line.split(" ")])
+        if data is None:
+            data = np.empty((rows, len(lines[0].split())))
+        block = np.array(b" ".join(lines).split(), dtype=data.dtype)
+        block = block.reshape((-1, data.shape[1]))
+        if n_rows + block.shape[0] > data.shape[0]:
+            new_rows = max(2*data.shape[0], n_rows + block.shape[0])
+            new_data = np.empty((new_rows, data.shape[1]))
+            new_data[:n_rows] = data[:n_rows]
+            data = new_data
+        data[n_rows:n_rows + block.shape[0]] = block
+        n_rows += block.shape[0]
+
+    if data is None:
+        return np.empty((0, 0))
+    return data[:n_rows].transpose()
 
-    data = np.array([np.array(a) for a in data]).transpose()
 
+def load_psrtxt_data(psrtxt_file_path: str):
+    """
+    Load in data from a `psrtxt` dump file
+    """
+    with open(psrtxt_file_path, "rb") as f:
+        data = load_psrtxt_stream(f)
     return data
 
 
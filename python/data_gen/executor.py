@@ -0,0 +1,137 @@
+import concurrent.futures
+import logging
+
+__all__ = [
+    "Graph",
+    "first_output"
+]
+
+module_logger = logging.getLogger(__name__)
+
+
+def first_output(res):
+    """
+    Get the value that gets passed on to downstream callbacks.
+    Runners return tuples like `(archive, log)`, in which case the first
+    element is passed on. Anything else is passed on as is.
+    """
+    if isinstance(res, (tuple, list)):
+        return res[0]
+    return res
+
+
+class Graph:
+    """
+    Directed acyclic graph of callbacks. Each node is called with the
+    (first) outputs of the nodes it depends on. Nodes whose dependencies
+    are satisfied run in parallel in a thread pool, and every node output
+    is kept, so a node shared by several branches only ever runs once.
+
+    Usage:
+
+    Produce two archives at the same time, and then diff them:
+
+    .. code-block:: python
+
+        graph = Graph()
+        graph.add("sim", functools.partial(run_dspsr, "simulated.dump"))
+        graph.add("inv", functools.partial(run_dspsr, "channelized.dump"))
+        graph.add("diff", run_psrdiff, "sim", "inv")
+        graph.add("txt", run_psrtxt, "diff")
+        graph.add("data", load_psrtxt_data, "txt")
+        data = graph.run("data")[0]
+
+    Args:
+        max_workers (int): Maximum number of nodes to run at the same time.
+            Defaults to the `concurrent.futures.ThreadPoolExecutor` default.
+    """
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers
+        self._nodes = {}
+        self._results = {}
+
+    def add(self, name, func: callable, *deps):
+        """
+        Add a node to the graph. Adding a node with a name that is already
+        in the graph does nothing, such that callers can describe shared
+        nodes more than once.
+
+        Args:
+            name: hashable node name
+            func (callable): called with the outputs of `deps`
+            deps (tuple): names of nodes this node depends on
+        Returns:
+            the node name
+        """
+        if name in self._nodes:
+            return name
+        for dep in deps:
+            if dep not in self._nodes:
+                raise KeyError(f"Graph.add: unknown dependency {dep}")
+        self._nodes[name] = (func, deps)
+        return name
+
+    def __contains__(self, name):
+        return name in self._nodes
+
+    def __getitem__(self, name):
+        return self._results[name]
+
+    def _order(self, targets):
+        order = []
+        visited = set()
+
+        def visit(name):
+            if name in visited:
+                return
+            visited.add(name)
+            for dep in self._nodes[name][1]:
+                visit(dep)
+            order.append(name)
+
+        for target in targets:
+            visit(target)
+        return order
+
+    def run(self, *targets) -> list:
+        """
+        Compute `targets`, and everything they depend on. Nodes computed by
+        previous calls are not run again.
+
+        Args:
+            targets (tuple): names of nodes to compute. Defaults to all nodes.
+        Returns:
+            list: the output of each target
+        """
+        if len(targets) == 0:
+            targets = tuple(self._nodes.keys())
+        remaining = [name for name in self._order(targets)
+                     if name not in self._results]
+        module_logger.debug(f"Graph.run: running {remaining}")
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_workers
+        ) as pool:
+            pending = {}
+            while len(remaining) > 0 or len(pending) > 0:
+                for name in list(remaining):
+                    func, deps = self._nodes[name]
+                    if all(dep in self._results for dep in deps):
+                        remaining.remove(name)
+                        args = [first_output(self._results[dep])
+                                for dep in deps]
+                        pending[pool.submit(func, *args)] = name
+                done, _ = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    name = pending.pop(future)
+                    if future.exception() is not None:
+                        for other in pending:
+                            other.cancel()
+                        raise future.exception()
+                    self._results[name] = future.result()
+                    module_logger.debug(f"Graph.run: finished {name}")
+
+        return [self._results[target] for target in targets]
+
+    __call__ = run
@@ -5,15 +5,15 @@ import sys
 
 sys.path.insert(0, "/home/SWIN/dshaff/personal/partialize")
 
-import partialize
 import numpy as np
-import psr_formats
 
 from . import util
+from .dada import LazyDADAFile
 from .config import config, config_dir, build_dir
 
 __all__ = [
     "complex_sinusoid",
+    "newman_phases",
     "time_domain_impulse",
     "generate_test_vector"
 ]
@@ -48,6 +48,28 @@ def complex_sinusoid(n: int,
     return sig
 
 
+def newman_phases(n_tones: int) -> np.ndarray:
+    """
+    Phases for a comb of `n_tones` equal tones that keep the peak of their
+    sum low, at about 1.35 times its RMS, rather than the `n_tones**0.5`
+    times of tones all in phase.
+
+    Usage:
+
+    .. code-block:: python
+
+        freqs = [100, 200, 300, 400]
+        sig = complex_sinusoid(1000, freqs, newman_phases(len(freqs)))
+
+    Args:
+        n_tones (int): number of tones
+    Returns:
+        np.ndarray: phase of each tone
+    """
+    k = np.arange(n_tones)
+    return np.pi * k**2 / n_tones
+
+
 def time_domain_impulse(n: int,
                         offsets: typing.List[float],
                         widths: typing.List[int],
@@ -71,7 +93,7 @@ def time_domain_impulse(n: int,
     return sig
 
 
-@partialize.partialize
+@util.lazy_partialize
 def generate_test_vector(*args,
                          n_bins: int,
                          domain_name: str,
@@ -128,12 +150,18 @@ def generate_test_vector(*args,
     output_base_template = ("{{func_name}}.{n_bins}.{args}."
                             "{n_pol}.{dtype}.{backend}")
 
+    # arguments can be lists, like the offsets of several impulses
+    lists = [hasattr(f, "__iter__") for f in args]
     if len(args) > 0:
-        args_str = "-".join([f"{f:.3f}" for f in args])
-        args_str_comma_sep = ",".join([f"{f:.3f}" for f in args])
+        args_str = "-".join(["_".join([f"{g:.3f}" for g in f]) if is_list
+                             else f"{f:.3f}"
+                             for f, is_list in zip(args, lists)])
     else:
         args_str = ""
-        args_str_comma_sep = ""
+    if any(lists):
+        args_str_comma_sep = None
+    else:
+        args_str_comma_sep = ",".join([f"{f:.3f}" for f in args])
 
     matlab_dtype_str = util.matlab_dtype_lookup[dtype]
 
@@ -144,9 +172,11 @@ def generate_test_vector(*args,
         dtype=matlab_dtype_str,
         backend=backend
     )
-    args_str = ",".join([f"{f:.3f}" for f in args])
 
     if backend == "matlab":
+        if args_str_comma_sep is None:
+            raise ValueError(
+                "Lists of arguments need the python backend")
         matlab_domain_name_map = {
             "time": "time_domain_impulse",
             "freq": "complex_sinusoid"
@@ -170,8 +200,7 @@ def generate_test_vector(*args,
         util.run_cmd(cmd_str, log_file_path=os.path.join(
             output_dir, log_file_name))
 
-        return psr_formats.DADAFile(
-            os.path.join(output_dir, output_file_name)).load_data()
+        return LazyDADAFile(os.path.join(output_dir, output_file_name))
 
     elif backend == "python":
         func_lookup = {
@@ -192,6 +221,7 @@ def generate_test_vector(*args,
         output_base, log_file_name, output_file_name = \
             util.create_output_file_names(output_file_name, output_base)
 
+        import psr_formats
         dada_file = psr_formats.DADAFile(
             os.path.join(output_dir, output_file_name))
 
@@ -0,0 +1,192 @@
+import argparse
+import json
+import logging
+import os
+import subprocess
+import threading
+import time
+
+__all__ = [
+    "run",
+    "wait",
+    "record",
+    "load_metrics",
+    "summarize_metrics",
+    "metrics_file_path",
+    "default_metrics_file_path"
+]
+
+module_logger = logging.getLogger(__name__)
+
+_products_dir = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__)))), "products")
+
+default_metrics_file_path = os.path.join(_products_dir, "metrics.jsonl")
+
+# If set, every external process run gets appended to this JSONL file.
+# Recording is off unless this is set, or the DATA_GEN_METRICS environment
+# variable names a file.
+metrics_file_path = os.environ.get("DATA_GEN_METRICS")
+
+_lock = threading.Lock()
+
+
+def _input_sizes(file_paths: list) -> dict:
+    sizes = {}
+    for file_path in file_paths:
+        if os.path.isfile(file_path):
+            sizes[file_path] = os.path.getsize(file_path)
+    return sizes
+
+
+def _exit_code(status: int) -> int:
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def record(entry: dict) -> None:
+    """
+    Append an entry to the metrics file.
+    """
+    if metrics_file_path is None:
+        return
+    line = json.dumps(entry) + "\n"
+    with _lock:
+        with open(metrics_file_path, "a") as f:
+            f.write(line)
+
+
+def wait(proc: subprocess.Popen,
+         t0: float,
+         input_file_paths: list = None) -> int:
+    """
+    Wait for a child process, recording its wall time, CPU time and peak
+    resident set size.
+
+    Args:
+        proc (subprocess.Popen): child process
+        t0 (float): `time.time()` from just before the process was started
+        input_file_paths (list): files whose sizes get recorded along with
+            the process' resource usage. Defaults to any arguments of the
+            process that are existing files.
+    Returns:
+        int: the process' return code
+    """
+    if input_file_paths is None:
+        input_file_paths = [] if isinstance(proc.args, str) else proc.args
+    _, status, rusage = os.wait4(proc.pid, 0)
+    wall_time = time.time() - t0
+    proc.returncode = _exit_code(status)
+    entry = {
+        "cmd": proc.args if isinstance(proc.args, str)
+        else " ".join(proc.args),
+        "returncode": proc.returncode,
+        "start_time": t0,
+        "wall_time": wall_time,
+        "user_time": rusage.ru_utime,
+        "sys_time": rusage.ru_stime,
+        # kilobytes on Linux
+        "max_rss": rusage.ru_maxrss,
+        "input_sizes": _input_sizes(input_file_paths)
+    }
+    module_logger.debug(f"wait: {entry}")
+    record(entry)
+    return proc.returncode
+
+
+def run(cmd: list,
+        input_file_paths: list = None,
+        **kwargs) -> subprocess.CompletedProcess:
+    """
+    Drop in replacement for `subprocess.run` that records the resource
+    usage of the child process. Output capturing is not supported; pass
+    file objects for `stdout` and `stderr` instead.
+
+    Usage:
+
+    .. code-block:: python
+
+        with open("dspsr.log", "w") as log_file:
+            metrics.run(["dspsr", "-V", "input.dump"],
+                        input_file_paths=["input.dump"],
+                        stdout=log_file, stderr=log_file)
+
+    Args:
+        cmd (list): command to run
+        input_file_paths (list): passed to `wait`
+        kwargs (dict): passed to `subprocess.Popen`
+    """
+    t0 = time.time()
+    proc = subprocess.Popen(cmd, **kwargs)
+    returncode = wait(proc, t0, input_file_paths)
+    return subprocess.CompletedProcess(proc.args, returncode)
+
+
+def load_metrics(file_path: str = None) -> list:
+    """
+    Load the entries in a metrics file.
+    """
+    if file_path is None:
+        file_path = metrics_file_path
+    if file_path is None:
+        file_path = default_metrics_file_path
+    entries = []
+    with open(file_path, "r") as f:
+        for line in f:
+            if line.strip() != "":
+                entries.append(json.loads(line))
+    return entries
+
+
+def summarize_metrics(entries: list) -> dict:
+    """
+    Total up resource usage per program, for example to see how much of a
+    sweep went into MATLAB runtime startup versus dspsr.
+
+    Returns:
+        dict: program names to totals
+    """
+    summary = {}
+    for entry in entries:
+        program = os.path.basename(entry["cmd"].split(" ")[0])
+        if program not in summary:
+            summary[program] = {
+                "count": 0,
+                "wall_time": 0.0,
+                "user_time": 0.0,
+                "sys_time": 0.0,
+                "max_rss": 0
+            }
+        totals = summary[program]
+        totals["count"] += 1
+        for key in ["wall_time", "user_time", "sys_time"]:
+            totals[key] += entry[key]
+        totals["max_rss"] = max(totals["max_rss"], entry["max_rss"])
+    return summary
+
+
+def create_parser():
+
+    parser = argparse.ArgumentParser(
+        description="Summarize external process resource usage")
+
+    parser.add_argument("-i", "--input-file",
+                        dest="input_file_path",
+                        type=str, required=False,
+                        default=None)
+
+    return parser
+
+
+if __name__ == "__main__":
+    parsed = create_parser().parse_args()
+    summary = summarize_metrics(load_metrics(parsed.input_file_path))
+    print(f"{'program':<24}{'count':>8}{'wall (s)':>12}"
+          f"{'user (s)':>12}{'sys (s)':>12}{'max rss (kB)':>14}")
+    for program, totals in sorted(summary.items(),
+                                  key=lambda item: -item[1]["wall_time"]):
+        print(f"{program:<24}{totals['count']:>8}"
+              f"{totals['wall_time']:>12.2f}{totals['user_time']:>12.2f}"
+              f"{totals['sys_time']:>12.2f}{totals['max_rss']:>14}")
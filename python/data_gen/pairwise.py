@@ -0,0 +1,110 @@
+import logging
+
+import numpy as np
+
+__all__ = [
+    "PairwiseComparison"
+]
+
+module_logger = logging.getLogger(__name__)
+
+default_products = {
+    "mean": np.mean,
+    "sum": np.sum,
+    "max": np.amax,
+    "argmax": np.argmax
+}
+
+
+class PairwiseComparison:
+    """
+    Compare N signals with each other. The signals get stacked, and the
+    spectrum of each one gets computed once, in a single batched FFT, the
+    first time it is needed. Difference products only get evaluated for the
+    N*(N-1)/2 pairs in the upper triangle, all at once by indexing the
+    stacked array, and then get mirrored into symmetric N by N matrices.
+
+    Products are functions that take an `axis` argument, like `np.mean`.
+    They get applied to the magnitude of each signal ("this") and to the
+    magnitude of the difference of each pair ("diff").
+
+    Usage:
+
+    .. code-block:: python
+
+        comp = PairwiseComparison(a, b, c)
+        comp.products("time")["diff"]["max"][0, 2]
+        comp.products("freq")["this"]["argmax"]
+
+    Args:
+        arrays (tuple): signals, truncated to the shortest one
+        fft_size (int): number of samples per spectrum. Defaults to the
+            whole signal
+        fft_offset (int): first sample of the spectra
+    """
+    def __init__(self,
+                 *arrays: np.ndarray,
+                 fft_size: int = None,
+                 fft_offset: int = 0):
+        min_dat = min(a.shape[-1] for a in arrays)
+        self.data = np.stack([np.asarray(a)[..., :min_dat] for a in arrays])
+        if fft_size is None:
+            fft_size = min_dat - fft_offset
+        self.fft_size = fft_size
+        self.fft_offset = fft_offset
+        self._spectra = None
+
+    def __len__(self) -> int:
+        return self.data.shape[0]
+
+    @property
+    def spectra(self) -> np.ndarray:
+        if self._spectra is None:
+            module_logger.debug((f"PairwiseComparison.spectra: computing "
+                                 f"{len(self)} spectra"))
+            self._spectra = np.fft.fft(
+                self.data[..., self.fft_offset:self.fft_offset+self.fft_size],
+                axis=-1)
+        return self._spectra
+
+    @property
+    def pairs(self) -> tuple:
+        """row and column indices of the upper triangle"""
+        return np.triu_indices(len(self), k=1)
+
+    def domain(self, name: str) -> np.ndarray:
+        if name == "time":
+            return self.data
+        elif name == "freq":
+            return self.spectra
+        raise ValueError(f"unknown domain {name}")
+
+    def products(self,
+                 domain: str = "time",
+                 products: dict = None,
+                 window: slice = None) -> dict:
+        """
+        Compute products in the "time" or "freq" domain, optionally only
+        over the samples or bins in `window`.
+
+        Returns:
+            dict: "this" maps product names to an array with a value per
+                signal; "diff" maps product names to a symmetric matrix,
+                with NaN on the diagonal
+        """
+        if products is None:
+            products = default_products
+        x = self.domain(domain)
+        if window is not None:
+            x = x[..., window]
+        row, col = self.pairs
+        n = len(self)
+        this = np.abs(x)
+        diff = np.abs(x[row] - x[col])
+        res = {"this": {}, "diff": {}}
+        for name, func in products.items():
+            res["this"][name] = func(this, axis=-1)
+            matrix = np.full((n, n), np.nan)
+            matrix[row, col] = matrix[col, row] = func(diff, axis=-1)
+            res["diff"][name] = matrix
+        return res
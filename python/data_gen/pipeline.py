@@ -1,8 +1,6 @@
 import os
 import logging
 
-import partialize
-
 __all__ = [
     "pipeline"
 ]
@@ -45,6 +43,9 @@ def pipeline(
          channelized_dada_file,
          synthesized_dada_file) = dada_files
 
+    `output_dir` can also be given when calling the resulting callable, to
+    put the output of one call somewhere else.
+
     Use non default parameters with the help of `functools.partial`:
 
     .. code-block::python
@@ -59,8 +60,11 @@ def pipeline(
 
 
     """
-    def _pipeline(*args, **kwargs):
-        module_logger.debug(f"_pipeline: args={args}, kwargs={kwargs}")
+    default_output_dir = output_dir
+
+    def _pipeline(*args, output_dir=default_output_dir, **kwargs):
+        module_logger.debug((f"_pipeline: args={args}, kwargs={kwargs}, "
+                             f"output_dir={output_dir}"))
         test_vector_dada_file = test_vector_callback(
             *args, **kwargs, output_dir=output_dir)
         channelized_file_name = "channelized." + \
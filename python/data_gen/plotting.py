@@ -0,0 +1,129 @@
+import collections
+import logging
+
+import numpy as np
+
+from .streaming import default_block_size
+
+__all__ = [
+    "minmax_envelope",
+    "plot_envelope"
+]
+
+module_logger = logging.getLogger(__name__)
+
+# reduced traces, keyed by whatever identifies the data they came from
+_envelope_cache = collections.OrderedDict()
+_envelope_cache_size = 64
+
+
+def minmax_envelope(y: np.ndarray,
+                    n_pixels: int,
+                    transform: callable = None,
+                    block_size: int = default_block_size) -> tuple:
+    """
+    Reduce a trace to the minimum and maximum of each of `n_pixels` buckets
+    of samples, in the order they occur in the bucket. A line through the
+    reduced trace covers the same pixels as a line through the whole trace,
+    as within each pixel column a line through all the samples just draws
+    a vertical stroke from the minimum to the maximum.
+
+    `y` can be a memory map; it gets read in blocks of about `block_size`
+    samples, and `transform` (like `np.real` or a conversion to dB) gets
+    applied block by block.
+
+    Args:
+        y (np.ndarray): trace
+        n_pixels (int): number of buckets, typically the width of the axes
+            in pixels
+        transform (callable): applied to `y` before reducing it
+        block_size (int): approximate number of samples read at once
+    Returns:
+        tuple: sample indices and values of the reduced trace
+    """
+    if transform is None:
+        def transform(a):
+            return a
+    n = y.shape[0]
+    if n <= 2*n_pixels:
+        return np.arange(n), transform(np.asarray(y))
+
+    bucket = int(np.ceil(n / n_pixels))
+    n_buckets = int(np.ceil(n / bucket))
+    step = max(1, block_size // bucket)
+    xs, ys = [], []
+    for k in range(0, n_buckets, step):
+        start = k * bucket
+        stop = min((k + step) * bucket, n)
+        block = transform(np.asarray(y[start:stop]))
+        pad = (-block.shape[0]) % bucket
+        if pad > 0:
+            block = np.pad(block, (0, pad), mode="edge")
+        block = block.reshape(-1, bucket)
+        rows = np.arange(block.shape[0])
+        idx = np.stack([np.argmin(block, axis=1),
+                        np.argmax(block, axis=1)], axis=1)
+        idx.sort(axis=1)
+        ys.append(block[rows[:, np.newaxis], idx].reshape(-1))
+        x = start + rows[:, np.newaxis]*bucket + idx
+        xs.append(np.minimum(x, stop - 1).reshape(-1))
+    return np.concatenate(xs), np.concatenate(ys)
+
+
+def _axes_width(ax) -> int:
+    try:
+        return max(100, int(ax.get_window_extent().width))
+    except Exception:
+        return 2000
+
+
+def plot_envelope(ax,
+                  y: np.ndarray,
+                  *args,
+                  n_pixels: int = None,
+                  transform: callable = None,
+                  cache_key=None,
+                  **kwargs):
+    """
+    Drop in replacement for `ax.plot(y)` that plots the min/max envelope of
+    `y` instead of every sample.
+
+    Reduced traces are kept around if `cache_key` is given, so re-plotting
+    the same data, for example for several figures or file formats, doesn't
+    read it again. The key should identify the data and the transform, like
+    the file path, its modification time and the transform's name.
+
+    Usage:
+
+    .. code-block:: python
+
+        fig, ax = plt.subplots(1, 1)
+        plot_envelope(ax, np.load("big.npy", mmap_mode="r"), transform=np.real)
+
+    Args:
+        ax (matplotlib.axes.Axes): axes to plot on
+        y (np.ndarray): trace
+        args (tuple): passed to `ax.plot`
+        n_pixels (int): number of buckets. Defaults to the width of `ax` in
+            pixels.
+        transform (callable): passed to `minmax_envelope`
+        cache_key (hashable): key for reduced trace cache
+        kwargs (dict): passed to `ax.plot`
+    Returns:
+        list: lines added to `ax`
+    """
+    if n_pixels is None:
+        n_pixels = _axes_width(ax)
+    key = None if cache_key is None else (cache_key, n_pixels)
+    if key is not None and key in _envelope_cache:
+        _envelope_cache.move_to_end(key)
+        x, y_env = _envelope_cache[key]
+    else:
+        x, y_env = minmax_envelope(y, n_pixels, transform=transform)
+        module_logger.debug((f"plot_envelope: reduced {y.shape[0]} samples "
+                             f"to {x.shape[0]}"))
+        if key is not None:
+            _envelope_cache[key] = (x, y_env)
+            if len(_envelope_cache) > _envelope_cache_size:
+                _envelope_cache.popitem(last=False)
+    return ax.plot(x, y_env, *args, **kwargs)
@@ -0,0 +1,303 @@
+import argparse
+import logging
+import os
+
+import numpy as np
+
+from .dada import LazyDADAFile
+from .plotting import minmax_envelope
+from .streaming import default_block_size
+
+__all__ = [
+    "Pyramid",
+    "build_pyramid",
+    "pyramid_path",
+    "plot_overview"
+]
+
+module_logger = logging.getLogger(__name__)
+
+stats = ["min", "max", "mean"]
+
+# decimation factor of the finest pyramid level
+min_decimation = 256
+
+# stop adding levels once there are this few buckets
+min_buckets = 512
+
+
+def pyramid_path(file_path: str) -> str:
+    return file_path + ".pyramid.npz"
+
+
+def _components(dtype: np.dtype) -> dict:
+    if np.issubdtype(dtype, np.complexfloating):
+        return {"re": np.real, "im": np.imag}
+    return {"re": lambda a: a}
+
+
+def _reduce(level: dict) -> dict:
+    """halve the number of buckets of a pyramid level"""
+    coarse = {}
+    for key, arr in level.items():
+        if arr.shape[0] % 2 == 1:
+            arr = np.concatenate([arr, arr[-1:]], axis=0)
+        pairs = arr.reshape(-1, 2, *arr.shape[1:])
+        if key.endswith("_min"):
+            coarse[key] = pairs.min(axis=1)
+        elif key.endswith("_max"):
+            coarse[key] = pairs.max(axis=1)
+        else:
+            coarse[key] = pairs.mean(axis=1)
+    return coarse
+
+
+def build_pyramid(file_path: str,
+                  output_file_path: str = None,
+                  block_size: int = default_block_size) -> str:
+    """
+    Build an overview pyramid for a DADA file and save it next to it, as
+    `<file_path>.pyramid.npz`. Each level has the min, max and mean of the
+    real (and imaginary) part, and the mean power, of buckets of
+    `2**level` samples, per channel and polarization. The finest level has
+    `min_decimation` samples per bucket, and each level halves the number
+    of buckets of the one before, down to about `min_buckets` buckets.
+
+    The data get read once, block by block.
+
+    Args:
+        file_path (str): DADA file path
+        output_file_path (str): pyramid file path. Defaults to
+            `pyramid_path(file_path)`
+        block_size (int): approximate number of samples read at once
+    Returns:
+        str: pyramid file path
+    """
+    if output_file_path is None:
+        output_file_path = pyramid_path(file_path)
+    dada_file = LazyDADAFile(file_path)
+    data = dada_file.data
+    ndat, nchan, npol = data.shape
+    components = _components(data.dtype)
+    decimation = min_decimation
+    n_buckets = int(np.ceil(ndat / decimation))
+    module_logger.debug((f"build_pyramid: {file_path} ndat={ndat} "
+                         f"nchan={nchan} npol={npol} buckets={n_buckets}"))
+
+    finest = {}
+    for name in components:
+        for stat in stats:
+            finest[f"{name}_{stat}"] = np.zeros(
+                (n_buckets, nchan, npol), dtype=np.float32)
+    finest["power_mean"] = np.zeros((n_buckets, nchan, npol),
+                                    dtype=np.float32)
+
+    step = max(1, block_size // (decimation * nchan * npol))
+    for b in range(0, n_buckets, step):
+        stop = min(b + step, n_buckets)
+        block = np.asarray(data[b*decimation:stop*decimation])
+        pad = (-block.shape[0]) % decimation
+        if pad > 0:
+            block = np.concatenate(
+                [block, np.repeat(block[-1:], pad, axis=0)], axis=0)
+        block = block.reshape(-1, decimation, nchan, npol)
+        for name, func in components.items():
+            part = func(block)
+            finest[f"{name}_min"][b:stop] = part.min(axis=1)
+            finest[f"{name}_max"][b:stop] = part.max(axis=1)
+            finest[f"{name}_mean"][b:stop] = part.mean(axis=1)
+        finest["power_mean"][b:stop] = np.mean(
+            block.real**2 + block.imag**2 if np.iscomplexobj(block)
+            else block**2, axis=1)
+
+    arrays = {}
+    levels = []
+    level = finest
+    while True:
+        levels.append(decimation)
+        for key, arr in level.items():
+            arrays[f"{decimation}/{key}"] = arr
+        if level["power_mean"].shape[0] <= min_buckets:
+            break
+        level = _reduce(level)
+        decimation *= 2
+
+    stat_result = os.stat(file_path)
+    with open(output_file_path, "wb") as f:
+        np.savez(f,
+                 levels=np.array(levels),
+                 shape=np.array(data.shape),
+                 source=np.array([stat_result.st_size,
+                                  stat_result.st_mtime_ns]),
+                 **arrays)
+    module_logger.debug(f"build_pyramid: wrote {output_file_path}")
+    return output_file_path
+
+
+class Pyramid:
+    """
+    Overview pyramid of a DADA file, for looking at large dumps without
+    reading all of them. The pyramid gets built if it doesn't exist yet or
+    if the file has changed since it was built.
+
+    `envelope` picks the coarsest level with at least one bucket per pixel
+    for the requested range of samples. When zoomed in past the finest
+    level, only the requested range of the memory mapped data gets read.
+
+    Usage:
+
+    .. code-block:: python
+
+        pyramid = Pyramid("pre_Convolution.dump")
+        x, y = pyramid.envelope(0, 10**9, 2000, chan=0, pol=0)
+
+    Args:
+        file_path (str): DADA file path
+    """
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.dada_file = LazyDADAFile(file_path)
+        self._npz = self._load()
+        self._cache = {}
+        self.levels = [int(level) for level in self._npz["levels"]]
+        self.shape = tuple(int(n) for n in self._npz["shape"])
+
+    def _load(self):
+        path = pyramid_path(self.file_path)
+        stat_result = os.stat(self.file_path)
+        source = [stat_result.st_size, stat_result.st_mtime_ns]
+        if os.path.exists(path):
+            npz = np.load(path)
+            if list(npz["source"]) == source:
+                return npz
+            module_logger.debug(f"Pyramid._load: {path} is stale")
+        return np.load(build_pyramid(self.file_path))
+
+    @property
+    def ndat(self) -> int:
+        return self.shape[0]
+
+    @property
+    def components(self) -> list:
+        """"re", and "im" if the data are complex"""
+        return list(_components(self.dada_file.dtype))
+
+    def level(self, decimation: int, key: str) -> np.ndarray:
+        """
+        Summary at one level, with shape `(n_buckets, nchan, npol)`. Keys
+        are `re_min`, `re_max`, `re_mean`, the same for `im` if the data are
+        complex, and `power_mean`.
+        """
+        name = f"{decimation}/{key}"
+        if name not in self._cache:
+            self._cache[name] = self._npz[name]
+        return self._cache[name]
+
+    def select_level(self, start: int, stop: int, n_pixels: int) -> int:
+        """
+        Coarsest decimation with at least one bucket per pixel in
+        `[start, stop)`, or None if the raw data are needed.
+        """
+        per_pixel = (stop - start) / n_pixels
+        fitting = [d for d in self.levels if d <= per_pixel]
+        if len(fitting) == 0:
+            return None
+        return max(fitting)
+
+    def envelope(self,
+                 start: int,
+                 stop: int,
+                 n_pixels: int,
+                 chan: int = 0,
+                 pol: int = 0,
+                 component: str = "re") -> tuple:
+        """
+        Min/max envelope of samples `[start, stop)` of one channel and
+        polarization, from the pyramid if possible. `component` is "re" or
+        "im", or "power" for the mean power of each bucket.
+
+        Returns:
+            tuple: sample indices and values
+        """
+        start = max(0, int(start))
+        stop = min(self.ndat, int(np.ceil(stop)))
+        if stop <= start:
+            return np.zeros(0), np.zeros(0)
+        decimation = self.select_level(start, stop, n_pixels)
+        if decimation is None:
+            module_logger.debug(
+                f"Pyramid.envelope: reading [{start}, {stop}) from raw data")
+            if component == "power":
+                def transform(a):
+                    return np.abs(a)**2
+            else:
+                transform = _components(self.dada_file.dtype)[component]
+            x, y = minmax_envelope(
+                self.dada_file.data[start:stop, chan, pol],
+                n_pixels, transform=transform)
+            return x + start, y
+
+        b0, b1 = start // decimation, int(np.ceil(stop / decimation))
+        x = (np.arange(b0, b1) + 0.5) * decimation
+        if component == "power":
+            return x, self.level(decimation, "power_mean")[b0:b1, chan, pol]
+        lo = self.level(decimation, f"{component}_min")[b0:b1, chan, pol]
+        hi = self.level(decimation, f"{component}_max")[b0:b1, chan, pol]
+        return np.repeat(x, 2), np.stack([lo, hi], axis=1).reshape(-1)
+
+
+def plot_overview(ax,
+                  pyramid: Pyramid,
+                  chan: int = 0,
+                  pol: int = 0,
+                  component: str = "re",
+                  **kwargs):
+    """
+    Plot an overview of a DADA file on `ax`, and redraw it from the
+    appropriate pyramid level, or the raw data, whenever the x limits
+    change, like when zooming in interactively.
+
+    Returns:
+        matplotlib.lines.Line2D: the overview line
+    """
+    def n_pixels():
+        return max(100, int(ax.get_window_extent().width))
+
+    x, y = pyramid.envelope(0, pyramid.ndat, n_pixels(),
+                            chan=chan, pol=pol, component=component)
+    line, = ax.plot(x, y, **kwargs)
+
+    def on_xlim_changed(ax):
+        start, stop = ax.get_xlim()
+        line.set_data(*pyramid.envelope(
+            start, stop, n_pixels(), chan=chan, pol=pol, component=component))
+        ax.figure.canvas.draw_idle()
+
+    ax.callbacks.connect("xlim_changed", on_xlim_changed)
+    return line
+
+
+def create_parser():
+
+    parser = argparse.ArgumentParser(
+        description="Build overview pyramids for DADA files")
+
+    parser.add_argument("-i", "--input-files",
+                        dest="input_file_paths",
+                        nargs="+", type=str,
+                        required=True)
+
+    parser.add_argument("-v", "--verbose",
+                        dest="verbose", action="store_true")
+
+    return parser
+
+
+if __name__ == "__main__":
+    parsed = create_parser().parse_args()
+    level = logging.INFO
+    if parsed.verbose:
+        level = logging.DEBUG
+    logging.basicConfig(level=level)
+    for file_path in parsed.input_file_paths:
+        print(build_pyramid(file_path))
@@ -0,0 +1,274 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+import uuid
+
+import numpy as np
+
+__all__ = [
+    "ReportStore",
+    "report_store_path"
+]
+
+module_logger = logging.getLogger(__name__)
+
+_products_dir = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__)))), "products")
+
+report_store_path = os.path.join(_products_dir, "reports.sqlite3")
+
+_identifier = re.compile(r"[^0-9a-zA-Z_]")
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _table_name(family: str) -> str:
+    return "report_" + _identifier.sub("_", family)
+
+
+def _scalar(val):
+    if hasattr(val, "item"):
+        val = val.item()
+    if isinstance(val, bool):
+        return int(val)
+    if isinstance(val, complex):
+        raise TypeError(
+            f"Complex value {val} has to be split into its parts first")
+    if isinstance(val, (int, float, str, bytes)) or val is None:
+        return val
+    return json.dumps(val, default=str)
+
+
+def _flatten(row: dict) -> tuple:
+    """
+    Flatten array values into `key_0`, `key_1`, ... columns. Complex values
+    become arrays of their real and imaginary parts, along a last axis.
+
+    Returns:
+        tuple: flat row, and the size of each flattened array
+    """
+    flat = {}
+    sizes = {}
+    for key, val in row.items():
+        if (isinstance(val, (complex, np.complexfloating, list, tuple,
+                             np.ndarray)) and np.iscomplexobj(val)):
+            val = np.stack([np.real(val), np.imag(val)], axis=-1)
+        if isinstance(val, (list, tuple, np.ndarray)):
+            val = np.asarray(val).reshape(-1)
+            sizes[key] = val.shape[0]
+            for i, v in enumerate(val):
+                flat[f"{key}_{i}"] = _scalar(v)
+        else:
+            flat[key] = _scalar(val)
+    return flat, sizes
+
+
+class ReportStore:
+    """
+    Append only store for verification results, in a SQLite database with
+    one table per family of results ("purity", "dedispersion", ...).
+
+    Each row has the results of one comparison, along with the parameters
+    of the run it came from. Parameter columns are indexed, so picking out
+    a handful of runs from thousands doesn't mean reading all of them.
+    Columns get added as new keys show up, and array values, like the real
+    and imaginary parts of a difference, are stored as `key_0`, `key_1`
+    ... columns and put back together by `query`. Complex values are stored
+    as arrays of their real and imaginary parts: `query` gives back
+    `[real, imag]` for a complex scalar.
+
+    Several processes can append to the same store at once. Each append
+    takes the database's write lock up front, so adding columns and rows
+    doesn't race with other processes doing the same.
+
+    Usage:
+
+    .. code-block:: python
+
+        store = ReportStore()
+        store.append("purity", {"offset": 10, "max_spurious_power": -80.0},
+                     params={"input_fft_length": 1024, "deripple": True})
+        store.query("purity", where={"input_fft_length": [1024, 2048]})
+
+    Args:
+        file_path (str): database file path
+    """
+    def __init__(self, file_path: str = None):
+        if file_path is None:
+            file_path = report_store_path
+        self.file_path = file_path
+        self.run_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(("CREATE TABLE IF NOT EXISTS _columns "
+                          "(family TEXT, name TEXT, kind TEXT, size INTEGER, "
+                          "PRIMARY KEY (family, name))"))
+        conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.file_path, timeout=60)
+
+    def _columns(self, conn: sqlite3.Connection, family: str) -> dict:
+        return {name: (kind, size) for name, kind, size in conn.execute(
+            "SELECT name, kind, size FROM _columns WHERE family = ?",
+            (family, ))}
+
+    def _ensure_columns(self,
+                        conn: sqlite3.Connection,
+                        family: str,
+                        flat: dict,
+                        sizes: dict,
+                        params: set) -> None:
+        table = _table_name(family)
+        conn.execute((f"CREATE TABLE IF NOT EXISTS {_quote(table)} "
+                      "(id INTEGER PRIMARY KEY, run_id TEXT, created REAL)"))
+        existing = {row[1] for row in conn.execute(
+            f"PRAGMA table_info({_quote(table)})")}
+        for name in flat:
+            if name not in existing:
+                conn.execute(
+                    f"ALTER TABLE {_quote(table)} ADD COLUMN {_quote(name)}")
+        known = self._columns(conn, family)
+        for name, size in sizes.items():
+            if known.get(name, (None, 0))[1] < size:
+                conn.execute(
+                    "INSERT OR REPLACE INTO _columns VALUES (?, ?, ?, ?)",
+                    (family, name, "array", size))
+        for name in params:
+            if name not in known:
+                conn.execute(
+                    "INSERT OR IGNORE INTO _columns VALUES (?, ?, ?, ?)",
+                    (family, name, "param", 0))
+                conn.execute((f"CREATE INDEX IF NOT EXISTS "
+                              f"{_quote(table + '_' + name)} "
+                              f"ON {_quote(table)} ({_quote(name)})"))
+
+    def append(self,
+               family: str,
+               rows,
+               params: dict = None) -> int:
+        """
+        Append results.
+
+        Args:
+            family (str): results family, one table per family
+            rows (list): dicts of results, or a single dict
+            params (dict): run parameters, added to every row and indexed
+        Returns:
+            int: number of rows appended
+        """
+        if hasattr(rows, "items"):
+            rows = [rows]
+        if params is None:
+            params = {}
+        created = time.time()
+        table = _table_name(family)
+        with self._connect() as conn:
+            # hold the write lock from the first look at the columns, so
+            # no other process adds the same ones in between
+            conn.execute("BEGIN IMMEDIATE")
+            for row in rows:
+                flat, sizes = _flatten({**row, **params})
+                self._ensure_columns(conn, family, flat, sizes, set(params))
+                names = ["run_id", "created"] + list(flat)
+                conn.execute(
+                    (f"INSERT INTO {_quote(table)} "
+                     f"({', '.join(_quote(n) for n in names)}) "
+                     f"VALUES ({', '.join('?' for n in names)})"),
+                    [self.run_id, created] + list(flat.values()))
+        conn.close()
+        module_logger.debug(
+            f"ReportStore.append: {len(rows)} rows to {family}")
+        return len(rows)
+
+    def families(self) -> list:
+        with self._connect() as conn:
+            names = [row[0] for row in conn.execute(
+                ("SELECT name FROM sqlite_master WHERE type = 'table' "
+                 "AND name LIKE 'report_%'"))]
+        conn.close()
+        return [name[len("report_"):] for name in names]
+
+    def params(self, family: str) -> list:
+        """names of the indexed parameter columns of a family"""
+        with self._connect() as conn:
+            columns = self._columns(conn, family)
+        conn.close()
+        return [name for name, (kind, _) in columns.items()
+                if kind == "param"]
+
+    def query(self,
+              family: str,
+              where: dict = None,
+              order_by: str = "id") -> list:
+        """
+        Get results, oldest first.
+
+        Args:
+            family (str): results family
+            where (dict): column values to match. List values match any of
+                their elements.
+            order_by (str): column to sort by
+        Returns:
+            list: dicts of results
+        """
+        if where is None:
+            where = {}
+        clauses, values = [], []
+        for name, val in where.items():
+            if isinstance(val, (list, tuple)):
+                clauses.append(
+                    f"{_quote(name)} IN ({', '.join('?' for v in val)})")
+                values.extend(_scalar(v) for v in val)
+            else:
+                clauses.append(f"{_quote(name)} = ?")
+                values.append(_scalar(val))
+        sql = f"SELECT * FROM {_quote(_table_name(family))}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {_quote(order_by)}"
+
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            arrays = {name: size for name, (kind, size)
+                      in self._columns(conn, family).items()
+                      if kind == "array"}
+            rows = [dict(row) for row in conn.execute(sql, values)]
+        conn.close()
+
+        # columns other families of runs added are NULL in this one
+        rows = [{key: val for key, val in row.items() if val is not None}
+                for row in rows]
+        for row in rows:
+            for name, size in arrays.items():
+                keys = [f"{name}_{i}" for i in range(size)]
+                if keys[0] in row:
+                    row[name] = [row.pop(key, None) for key in keys]
+        return rows
+
+    def group(self, family: str, by: str, where: dict = None) -> dict:
+        """
+        Get results grouped by the value of a column, like the
+        `{test_method: [results]}` JSON reports.
+        """
+        groups = {}
+        for row in self.query(family, where=where):
+            groups.setdefault(row[by], []).append(row)
+        return groups
+
+    def columns(self,
+                family: str,
+                names: list,
+                where: dict = None) -> dict:
+        """
+        Get results as one NumPy array per column. Missing values are None.
+        """
+        rows = self.query(family, where=where)
+        return {name: np.array([row.get(name) for row in rows])
+                for name in names}
@@ -0,0 +1,381 @@
+import logging
+import math
+import tempfile
+
+import numpy as np
+
+from .streaming import default_block_size, iter_blocks
+
+__all__ = [
+    "four_step_fft",
+    "welch_spectrum",
+    "fast_length",
+    "Aligner",
+    "temporary_memmap"
+]
+
+module_logger = logging.getLogger(__name__)
+
+
+def temporary_memmap(shape: tuple,
+                     dtype: np.dtype,
+                     work_dir: str = None) -> np.memmap:
+    """
+    Create a memory map backed by an anonymous temporary file, which gets
+    removed when the memory map is garbage collected.
+    """
+    return np.memmap(tempfile.TemporaryFile(dir=work_dir),
+                     dtype=dtype, mode="w+", shape=shape)
+
+
+def _largest_divisor(n: int) -> int:
+    """largest divisor of n that is no greater than sqrt(n)"""
+    for d in range(math.isqrt(n), 0, -1):
+        if n % d == 0:
+            return d
+
+
+# four step FFTs need a factorization n1*n2 with n1 at least
+# sqrt(N)/max_imbalance, so that neither dimension is much more than sqrt(N)
+max_imbalance = 4
+
+
+def _balanced(n: int) -> bool:
+    n1 = _largest_divisor(n)
+    return (n1 * max_imbalance)**2 >= n
+
+
+def _chirp(start: int, stop: int, n: int, sign: float) -> np.ndarray:
+    """exp(sign*i*pi*k**2/n) for k in [start, stop), exact for large k"""
+    k = np.arange(start, stop, dtype=np.int64)
+    return np.exp(sign * 1j * np.pi * ((k * k) % (2 * n)) / n)
+
+
+def _flat(x: np.ndarray,
+          block_size: int,
+          work_dir: str = None) -> np.ndarray:
+    """
+    Flattened view of x, copying it block by block into a temporary memory
+    map if it can't be flattened without a copy.
+    """
+    if x.ndim == 1 or x.flags.c_contiguous:
+        return x.reshape(-1)
+    flat = temporary_memmap((x.size, ), x.dtype, work_dir)
+    for offset, (block, ) in iter_blocks(x, block_size=block_size):
+        flat[offset:offset + block.shape[0]] = block
+    return flat
+
+
+def four_step_fft(x: np.ndarray,
+                  out: np.ndarray = None,
+                  inverse: bool = False,
+                  block_size: int = default_block_size,
+                  work_dir: str = None) -> np.ndarray:
+    """
+    Exact FFT of the flattened contents of `x`, computed out of core with
+    the four step algorithm. With `N = n1*n2`, the input is viewed as an
+    `(n1, n2)` matrix; columns get transformed, multiplied by twiddle
+    factors, and then rows get transformed. Columns and rows are processed
+    in groups of about `block_size` samples, so `x`, `out` and the
+    intermediate result can all be memory maps much larger than RAM. A
+    group holds at least one whole row or column, of `n1` or `n2` samples.
+
+    `N` needs a balanced factorization, with `n1` and `n2` within a factor
+    of `max_imbalance` of `sqrt(N)`, for rows and columns to stay small.
+    Other lengths, like primes or twice a prime, go through Bluestein's
+    algorithm: the FFT becomes a circular convolution of a length with a
+    balanced factorization, at most four times as long, which gets done
+    with three four step FFTs. Inputs no longer than `block_size` get
+    transformed in memory.
+
+    Usage:
+
+    .. code-block:: python
+
+        x = np.load("big.npy", mmap_mode="r")
+        out = np.lib.format.open_memmap(
+            "big.fft.npy", mode="w+", dtype=np.complex64, shape=x.shape)
+        four_step_fft(x, out=out)
+
+    Args:
+        x (np.ndarray): input, typically a memory map
+        out (np.ndarray): output with `x.size` elements. If None, a
+            temporary memory map gets created in `work_dir`.
+        inverse (bool): compute the inverse FFT, normalized like
+            `np.fft.ifft`
+        block_size (int): approximate number of samples per block
+        work_dir (str): directory for temporary memory maps
+    Returns:
+        np.ndarray: out
+    """
+    dtype = np.result_type(x.dtype, np.complex64)
+    n = x.size
+    x = _flat(x, block_size, work_dir)
+    if out is None:
+        out = temporary_memmap((n, ), dtype, work_dir)
+    fft = np.fft.ifft if inverse else np.fft.fft
+    sign = 1.0 if inverse else -1.0
+
+    if n <= block_size:
+        out.reshape(-1)[:] = fft(np.asarray(x))
+        return out
+    if not _balanced(n):
+        return _bluestein_fft(x, out, inverse, block_size, work_dir)
+    n1 = _largest_divisor(n)
+    n2 = n // n1
+    module_logger.debug(f"four_step_fft: n={n}, n1={n1}, n2={n2}")
+
+    a = x.reshape(n1, n2)
+    b = temporary_memmap((n1, n2), dtype, work_dir)
+    k1 = np.arange(n1)[:, np.newaxis]
+
+    # transform columns, and apply twiddle factors
+    step = max(1, block_size // n1)
+    for j in range(0, n2, step):
+        stop = min(j + step, n2)
+        j2 = np.arange(j, stop)[np.newaxis, :]
+        twiddle = np.exp(sign * 2j * np.pi * k1 * j2 / n)
+        b[:, j:stop] = fft(np.asarray(a[:, j:stop]), axis=0) * twiddle
+
+    # transform rows, writing them out transposed
+    c = out.reshape(n2, n1)
+    step = max(1, block_size // n2)
+    for i in range(0, n1, step):
+        stop = min(i + step, n1)
+        c[:, i:stop] = fft(np.asarray(b[i:stop, :]), axis=1).T
+
+    if hasattr(out, "flush"):
+        out.flush()
+    return out
+
+
+def _bluestein_fft(x: np.ndarray,
+                   out: np.ndarray,
+                   inverse: bool,
+                   block_size: int,
+                   work_dir: str = None) -> np.ndarray:
+    """
+    FFT of the flat array `x` as a circular convolution with a chirp, out of
+    core. With `c[k] = exp(-i*pi*k**2/N)`, `X[k] = c[k] * sum(x[j] * c[j] *
+    conj(c[k - j]))`.
+    """
+    n = x.shape[0]
+    m = fast_length(2*n - 1)
+    if not _balanced(m):
+        m = 1 << (2*n - 2).bit_length()
+    sign = 1.0 if inverse else -1.0
+    module_logger.debug(f"_bluestein_fft: n={n}, m={m}")
+
+    a = temporary_memmap((m, ), np.complex128, work_dir)
+    for offset, (block, ) in iter_blocks(x, block_size=block_size):
+        stop = offset + block.shape[0]
+        a[offset:stop] = block * _chirp(offset, stop, n, sign)
+    # the chirp for lags -(n - 1) to n - 1, wrapped around
+    b = temporary_memmap((m, ), np.complex128, work_dir)
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        chirp = np.conj(_chirp(start, stop, n, sign))
+        b[start:stop] = chirp
+        if start == 0:
+            chirp, start = chirp[1:], 1
+        b[m - stop + 1:m - start + 1] = chirp[::-1]
+
+    a_fft = four_step_fft(a, block_size=block_size, work_dir=work_dir)
+    b_fft = four_step_fft(b, block_size=block_size, work_dir=work_dir)
+    del a, b
+    for start in range(0, m, block_size):
+        stop = min(start + block_size, m)
+        a_fft[start:stop] *= b_fft[start:stop]
+    del b_fft
+    conv = four_step_fft(a_fft, inverse=True, block_size=block_size,
+                         work_dir=work_dir)
+    del a_fft
+
+    flat_out = out.reshape(-1)
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        res = conv[start:stop] * _chirp(start, stop, n, sign)
+        if inverse:
+            res /= n
+        flat_out[start:stop] = res
+    if hasattr(out, "flush"):
+        out.flush()
+    return out
+
+
+def welch_spectrum(x: np.ndarray,
+                   fft_size: int,
+                   overlap: int = 0,
+                   window: str = "hann",
+                   block_size: int = default_block_size,
+                   work_dir: str = None) -> np.ndarray:
+    """
+    Average power spectrum of the flattened contents of `x`, over segments
+    of `fft_size` samples that overlap by `overlap` samples. Segments are
+    a strided view of `x`, so they don't get copied; they get transformed
+    with one batched FFT per group of about `block_size` samples.
+
+    Usage:
+
+    .. code-block:: python
+
+        x = np.load("big.npy", mmap_mode="r")
+        spectrum = welch_spectrum(x, 1024, overlap=512, window="hann")
+
+    Args:
+        x (np.ndarray): input, typically a memory map
+        fft_size (int): segment size
+        overlap (int): number of samples shared by adjacent segments
+        window (str): any window `scipy.signal.get_window` knows about.
+            None means no window.
+        block_size (int): approximate number of samples per batched FFT
+        work_dir (str): directory for temporary memory maps
+    Returns:
+        np.ndarray: power spectrum with `fft_size` bins, in `np.fft.fft`
+            order, scaled like the two sided density from
+            `scipy.signal.welch` with unit sampling frequency
+    """
+    step = fft_size - overlap
+    if step <= 0:
+        raise ValueError(f"overlap {overlap} must be less than {fft_size}")
+    x = _flat(x, block_size, work_dir)
+    n_seg = (x.shape[0] - overlap) // step
+    if n_seg < 1:
+        raise ValueError((f"need at least {fft_size} samples, "
+                          f"got {x.shape[0]}"))
+    if window is None:
+        win = np.ones(fft_size)
+    else:
+        import scipy.signal
+        win = scipy.signal.get_window(window, fft_size)
+    module_logger.debug((f"welch_spectrum: {n_seg} segments of {fft_size} "
+                         f"samples, overlap={overlap}, window={window}"))
+
+    segments = np.lib.stride_tricks.as_strided(
+        x, shape=(n_seg, fft_size),
+        strides=(step * x.strides[0], x.strides[0]),
+        writeable=False)
+
+    power = np.zeros(fft_size, dtype=np.float64)
+    batch = max(1, block_size // fft_size)
+    for i in range(0, n_seg, batch):
+        spec = np.fft.fft(segments[i:i + batch] * win, axis=1)
+        power += np.sum(spec.real**2 + spec.imag**2, axis=0)
+    return power / (n_seg * np.sum(win**2))
+
+
+def fast_length(n: int) -> int:
+    """
+    Smallest length no less than `n` that FFTs handle efficiently, ie one
+    with only small prime factors.
+    """
+    import scipy.fftpack
+    return scipy.fftpack.next_fast_len(int(n))
+
+
+class Aligner:
+    """
+    Align signals against a reference with FFT cross correlation. The
+    reference spectrum gets computed once per FFT length and reused, so
+    aligning many signals against the same reference costs one forward and
+    one inverse FFT each.
+
+    Signals are correlated along their last axis, so stacks of signals, like
+    the Stokes parameters of a folded profile, get aligned in one call.
+
+    In the default linear mode, signals get zero padded to a fast FFT length
+    long enough to avoid wrap around. In circular mode, for periodic signals
+    like folded profiles, there is no padding, and signals must have the
+    same length as the reference.
+
+    Usage:
+
+    .. code-block:: python
+
+        aligner = Aligner(reference, circular=True)
+        lag, sub_lag = aligner.lag(signal)
+        aligned = aligner.align(signal)
+
+    Args:
+        reference (np.ndarray): reference signal(s)
+        circular (bool): circular or linear cross correlation
+    """
+    def __init__(self, reference: np.ndarray, circular: bool = False):
+        self.reference = np.asarray(reference)
+        self.circular = circular
+        self._spectra = {}
+
+    def _fft_length(self, n: int) -> int:
+        if self.circular:
+            if n != self.reference.shape[-1]:
+                raise ValueError((f"circular alignment needs length "
+                                  f"{self.reference.shape[-1]}, got {n}"))
+            return n
+        return fast_length(n + self.reference.shape[-1] - 1)
+
+    def _reference_spectrum(self, n_fft: int, real: bool) -> np.ndarray:
+        key = (n_fft, real)
+        if key not in self._spectra:
+            module_logger.debug(
+                f"Aligner._reference_spectrum: n_fft={n_fft}, real={real}")
+            fft = np.fft.rfft if real else np.fft.fft
+            self._spectra[key] = np.conj(fft(self.reference, n=n_fft))
+        return self._spectra[key]
+
+    def correlate(self, x: np.ndarray) -> np.ndarray:
+        """
+        Cross correlation of `x` with the reference. Element `k` is
+        `sum(x[n + k] * conj(reference[n]))`; negative lags wrap around to
+        the end.
+        """
+        x = np.asarray(x)
+        n_fft = self._fft_length(x.shape[-1])
+        real = not (np.iscomplexobj(x) or np.iscomplexobj(self.reference))
+        if real:
+            spec = np.fft.rfft(x, n=n_fft) * \
+                self._reference_spectrum(n_fft, real)
+            return np.fft.irfft(spec, n=n_fft)
+        spec = np.fft.fft(x, n=n_fft) * self._reference_spectrum(n_fft, real)
+        return np.fft.ifft(spec)
+
+    def lag(self, x: np.ndarray) -> tuple:
+        """
+        Lag of `x` relative to the reference: `x[n + lag]` lines up with
+        `reference[n]`.
+
+        Returns:
+            tuple: integer lag, and lag refined to sub sample precision by
+                fitting a parabola through the correlation peak
+        """
+        corr = np.abs(self.correlate(x))
+        n_fft = corr.shape[-1]
+        idx = np.argmax(corr, axis=-1)
+
+        def at(offset):
+            return np.take_along_axis(
+                corr, np.expand_dims((idx + offset) % n_fft, -1), -1)[..., 0]
+
+        y_prev, y_peak, y_next = at(-1), at(0), at(1)
+        denom = y_prev - 2*y_peak + y_next
+        with np.errstate(divide="ignore", invalid="ignore"):
+            delta = np.where(denom != 0, 0.5*(y_prev - y_next) / denom, 0.0)
+
+        if self.circular:
+            lag = np.where(idx > n_fft // 2, idx - n_fft, idx)
+        else:
+            lag = np.where(idx >= np.asarray(x).shape[-1], idx - n_fft, idx)
+        if lag.ndim == 0:
+            return int(lag), float(lag + delta)
+        return lag, lag + delta
+
+    def align(self, x: np.ndarray) -> np.ndarray:
+        """
+        Shift `x` by its integer lag so it lines up with the reference.
+        Shifts are circular.
+        """
+        lag, _ = self.lag(x)
+        x = np.asarray(x)
+        if np.ndim(lag) == 0:
+            return np.roll(x, -lag, axis=-1)
+        return np.stack([np.roll(row, -l) for row, l in zip(
+            x.reshape(-1, x.shape[-1]), lag.reshape(-1))]).reshape(x.shape)
@@ -0,0 +1,249 @@
+# standin.py
+# Offline stand-ins for dspsr, psrdiff and psrtxt, for benchmarking and
+# testing the runners in dspsr_util on machines without PSRCHIVE or dspsr.
+# They mimic the file level behavior of the real programs: which files get
+# written where, and how big they are. None of the output is a meaningful
+# reduction of the input.
+#
+# Put the wrappers in python/bin on the path to use them:
+#
+#     export PATH=/path/to/python/bin:$PATH
+#
+# The cost of each run can be set with STANDIN_<PROGRAM>_COST environment
+# variables, as "<startup seconds>,<seconds per million input samples>",
+# for example STANDIN_DSPSR_COST="1.5,0.2".
+import argparse
+import fractions
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+from .dada import LazyDADAFile, write_dada_file
+
+__all__ = [
+    "dspsr",
+    "psrdiff",
+    "psrtxt",
+    "read_archive",
+    "write_archive"
+]
+
+module_logger = logging.getLogger(__name__)
+
+version = "dspsr standin"
+
+archive_header_size = 4096
+
+max_nbin = 1024
+
+# stages after which dspsr's data are detected
+_detected_stages = {"Detection", "Fold"}
+
+
+def _sleep(program: str, n_samples: int = 0) -> None:
+    cost = os.environ.get(f"STANDIN_{program.upper()}_COST", "0,0")
+    startup, per_msample = [float(v) for v in cost.split(",")]
+    time.sleep(startup + per_msample * n_samples / 1e6)
+
+
+def write_archive(file_path: str,
+                  nsub: int, nchan: int, npol: int, nbin: int,
+                  period: float = 0.0, dm: float = 0.0) -> str:
+    """
+    Write a stand-in archive: a text header followed by
+    `(nsub, nchan, npol, nbin)` float32 profiles with a Gaussian pulse.
+    """
+    header = {
+        "STANDIN_ARCHIVE": 1,
+        "NSUB": nsub,
+        "NCHAN": nchan,
+        "NPOL": npol,
+        "NBIN": nbin,
+        "PERIOD": period,
+        "DM": dm
+    }
+    header_str = "".join(f"{key} {val}\n" for key, val in header.items())
+    phase = np.arange(nbin) / nbin
+    profile = np.exp(-0.5*((phase - 0.5) / 0.02)**2).astype(np.float32)
+    profiles = np.broadcast_to(profile, (nsub, nchan, npol, nbin))
+    with open(file_path, "wb") as f:
+        f.write(header_str.encode("ascii").ljust(archive_header_size, b"\0"))
+        f.write(np.ascontiguousarray(profiles).tobytes())
+    return file_path
+
+
+def read_archive(file_path: str) -> tuple:
+    """
+    Read a stand-in archive.
+
+    Returns:
+        tuple: header dict and `(nsub, nchan, npol, nbin)` profiles
+    """
+    with open(file_path, "rb") as f:
+        header_str = f.read(archive_header_size).decode("ascii", "ignore")
+        header = {}
+        for line in header_str.strip("\0").split("\n"):
+            if line.strip() != "":
+                key, val = line.split(" ", 1)
+                header[key] = val
+        shape = tuple(int(header[key])
+                      for key in ["NSUB", "NCHAN", "NPOL", "NBIN"])
+        profiles = np.fromfile(f, dtype=np.float32).reshape(shape)
+    return header, profiles
+
+
+def _dspsr_parser():
+    parser = argparse.ArgumentParser(
+        prog="dspsr", description="dspsr stand-in", allow_abbrev=False)
+    parser.add_argument("file_path", nargs="?")
+    parser.add_argument("-c", dest="period", type=float, default=1.0)
+    parser.add_argument("-D", dest="dm", type=float, default=0.0)
+    parser.add_argument("-O", dest="output_base", type=str, default=None)
+    parser.add_argument("-dump", dest="dump_stage", type=str, default=None)
+    parser.add_argument("-IF", dest="inverse_filterbank", type=str,
+                        default=None)
+    parser.add_argument("-x", dest="fft_length", type=int, default=None)
+    parser.add_argument("-fft-window", dest="fft_window", type=str,
+                        default="no_window")
+    parser.add_argument("-dr", dest="deripple", action="store_true")
+    parser.add_argument("-V", dest="verbose", action="store_true")
+    parser.add_argument("--version", dest="version", action="store_true")
+    return parser
+
+
+def dspsr(argv: list) -> int:
+    """
+    Write `<output_base>.ar`, and `pre_<stage>.dump` to the current
+    directory if `-dump <stage>` is given.
+    """
+    parsed, unknown = _dspsr_parser().parse_known_args(argv)
+    if parsed.version:
+        print(version)
+        return 0
+    if parsed.file_path is None:
+        print("dspsr: no input file", file=sys.stderr)
+        return 1
+
+    input_file = LazyDADAFile(parsed.file_path)
+    ndat, nchan, npol = input_file.ndat, input_file.nchan, input_file.npol
+    os_factor = fractions.Fraction(input_file.header.get("OS_FACTOR", "1/1"))
+    tsamp = float(input_file.header.get("TSAMP", 1.0))
+
+    log = [
+        f"dspsr: {version}",
+        f"dspsr: loading {parsed.file_path}",
+        f"dspsr: unknown options {' '.join(unknown)}" if unknown else "",
+        f"dsp::Input::set_block_size ndat={ndat} nchan={nchan} npol={npol} "
+    ]
+
+    output_nchan = nchan
+    output_ndat = ndat
+    if parsed.inverse_filterbank is not None:
+        spec = parsed.inverse_filterbank.split(":")
+        output_nchan = int(spec[0])
+        input_fft_length = 1024
+        if len(spec) > 1 and spec[1] != "D":
+            input_fft_length = int(spec[1])
+        input_overlap = int(spec[2]) if len(spec) > 2 else 0
+        ratio = nchan / (output_nchan * os_factor)
+        output_ndat = int(ndat * ratio)
+        output_fft_length = int(input_fft_length * ratio)
+        log.extend([
+            (f"dsp::InverseFilterbankEngineCPU::setup "
+             f"input_fft_length={input_fft_length} "
+             f"output_fft_length={output_fft_length} "
+             f"input_discard_pos={input_overlap} "
+             f"fft_window={parsed.fft_window} "
+             f"deripple={int(parsed.deripple)} "),
+        ])
+    elif parsed.fft_length is not None:
+        log.append(f"dsp::Convolution::prepare nfilt_pos={parsed.fft_length} ")
+
+    output_tsamp = tsamp * ndat / output_ndat if output_ndat > 0 else tsamp
+    _sleep("dspsr", ndat * nchan * npol)
+
+    if parsed.dump_stage is not None:
+        stage = parsed.dump_stage.capitalize()
+        if stage in _detected_stages:
+            dump_npol, dtype = (4 if npol == 2 else 1), np.float32
+        else:
+            dump_npol, dtype = npol, np.complex64
+        header = dict(input_file.header)
+        header["TSAMP"] = output_tsamp
+        write_dada_file(f"pre_{stage}.dump", header,
+                        shape=(output_ndat, output_nchan, dump_npol),
+                        dtype=dtype)
+        log.append(f"dsp::Dump::prepare dumping after {stage} ")
+
+    if parsed.output_base is not None:
+        nbin = int(parsed.period / (output_tsamp * 1e-6))
+        nbin = max(1, min(max_nbin, nbin))
+        npol_ar = 4 if npol == 2 else 1
+        write_archive(f"{parsed.output_base}.ar",
+                      1, output_nchan, npol_ar, nbin,
+                      period=parsed.period, dm=parsed.dm)
+        log.append(f"dspsr: unloading {parsed.output_base}.ar nbin={nbin} ")
+
+    if parsed.verbose:
+        print("\n".join(line for line in log if line != ""))
+    return 0
+
+
+def psrdiff(argv: list) -> int:
+    """
+    Write `psrdiff.out` to the current directory, with the shape of the
+    first archive.
+    """
+    if len(argv) < 2:
+        print("psrdiff: need two archives", file=sys.stderr)
+        return 1
+    header, profiles = read_archive(argv[0])
+    _sleep("psrdiff", profiles.size)
+    write_archive("psrdiff.out", *profiles.shape,
+                  period=float(header["PERIOD"]), dm=float(header["DM"]))
+    print(f"psrdiff: compared {argv[0]} and {argv[1]}")
+    return 0
+
+
+def psrtxt(argv: list) -> int:
+    """
+    Print `isub ichan ibin` followed by one column per polarization.
+    """
+    if len(argv) < 1:
+        print("psrtxt: need an archive", file=sys.stderr)
+        return 1
+    header, profiles = read_archive(argv[0])
+    _sleep("psrtxt", profiles.size)
+    nsub, nchan, npol, nbin = profiles.shape
+    out = sys.stdout
+    for isub in range(nsub):
+        for ichan in range(nchan):
+            for ibin in range(nbin):
+                vals = " ".join(f"{v:.6g}"
+                                for v in profiles[isub, ichan, :, ibin])
+                out.write(f"{isub} {ichan} {ibin} {vals}\n")
+    return 0
+
+
+programs = {
+    "dspsr": dspsr,
+    "psrdiff": psrdiff,
+    "psrtxt": psrtxt
+}
+
+
+def main(argv: list = None) -> int:
+    if argv is None:
+        argv = sys.argv[1:]
+    if len(argv) == 0 or argv[0] not in programs:
+        print(f"usage: python -m data_gen.standin "
+              f"{{{','.join(programs)}}} [args]", file=sys.stderr)
+        return 2
+    return programs[argv[0]](argv[1:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+import logging
+
+import numpy as np
+
+__all__ = [
+    "OnlineStats",
+    "compare_streams",
+    "iter_blocks"
+]
+
+module_logger = logging.getLogger(__name__)
+
+default_block_size = 2**20
+
+
+def iter_blocks(*arrays: np.ndarray, block_size: int = default_block_size):
+    """
+    Iterate through arrays (typically memory maps) in blocks along their
+    first axis, up to the length of the shortest array. Each block gets
+    flattened.
+
+    The arrays have to agree in every axis but the first, so that blocks
+    of different arrays line up sample for sample.
+
+    Yields:
+        tuple: offset of the block in flattened samples, and a block from
+            each array
+    """
+    shapes = set(a.shape[1:] for a in arrays)
+    if len(shapes) > 1:
+        raise ValueError(
+            f"Arrays have different trailing shapes: {sorted(shapes)}")
+    ndat = min(a.shape[0] for a in arrays)
+    # number of flattened samples per element of the first axis
+    stride = int(np.prod(arrays[0].shape[1:]))
+    step = max(1, block_size // stride)
+    offset = 0
+    for i in range(0, ndat, step):
+        stop = min(i + step, ndat)
+        blocks = [np.asarray(a[i:stop]).reshape(-1) for a in arrays]
+        yield offset, blocks
+        offset += blocks[0].shape[0]
+
+
+class OnlineStats:
+    """
+    Running statistics of a stream of non negative values, like the
+    magnitude of a signal, or of the difference between two signals.
+    Blocks of values get added with `update`, and `OnlineStats` objects
+    computed on different parts of a stream can be combined with `merge`.
+
+    Quantiles are approximate: values are binned in a log spaced histogram
+    with `bins_per_decade` bins per decade, so quantiles between `lo` and
+    `hi` have a relative error of at most `10**(1/bins_per_decade) - 1`.
+    Zeros get counted exactly, and other values below `lo` are reported as
+    `lo`.
+
+    Usage:
+
+    .. code-block:: python
+
+        stats = OnlineStats()
+        for offset, (block,) in iter_blocks(np.load("a.npy", mmap_mode="r")):
+            stats.update(np.abs(block), offset)
+        stats.products()
+
+    Args:
+        quantiles (tuple): quantiles reported by `products`
+        lo (float): lower edge of quantile histogram
+        hi (float): upper edge of quantile histogram
+        bins_per_decade (int): quantile histogram resolution
+    """
+    def __init__(self,
+                 quantiles: tuple = (0.5, 0.9, 0.99),
+                 lo: float = 1e-15,
+                 hi: float = 1e15,
+                 bins_per_decade: int = 100):
+        self.quantiles = quantiles
+        n_bins = int(round(np.log10(hi / lo) * bins_per_decade))
+        self._edges = np.logspace(np.log10(lo), np.log10(hi), n_bins + 1)
+        # under and overflow bins on either end
+        self._hist = np.zeros(n_bins + 2, dtype=np.int64)
+        self._zeros = 0
+        self.count = 0
+        self.sum = 0.0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.max = -np.inf
+        self.argmax = -1
+        self.min = np.inf
+        self.argmin = -1
+
+    def update(self, block: np.ndarray, offset: int = 0) -> None:
+        """
+        Add a block of values.
+
+        Args:
+            block (np.ndarray): values
+            offset (int): position of the first value of `block` in the
+                stream, for `argmax` and `argmin`
+        """
+        block = np.asarray(block, dtype=np.float64).reshape(-1)
+        n = block.shape[0]
+        if n == 0:
+            return
+        block_sum = np.sum(block)
+        block_mean = block_sum / n
+        block_m2 = np.sum((block - block_mean)**2)
+
+        # Chan et al. parallel variance update
+        count = self.count + n
+        delta = block_mean - self.mean
+        self._m2 += block_m2 + delta**2 * self.count * n / count
+        self.mean += delta * n / count
+        self.count = count
+        self.sum += block_sum
+
+        idx = np.argmax(block)
+        if block[idx] > self.max:
+            self.max, self.argmax = block[idx], offset + idx
+        idx = np.argmin(block)
+        if block[idx] < self.min:
+            self.min, self.argmin = block[idx], offset + idx
+
+        self._zeros += int(np.count_nonzero(block == 0))
+        self._hist += np.bincount(
+            np.searchsorted(self._edges, block, side="right"),
+            minlength=self._hist.shape[0])
+
+    def merge(self, other: "OnlineStats") -> "OnlineStats":
+        """
+        Combine with statistics of another part of the same stream, with
+        the same histogram configuration.
+        """
+        if other.count == 0:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self._m2 += other._m2 + delta**2 * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        self.sum += other.sum
+        if other.max > self.max:
+            self.max, self.argmax = other.max, other.argmax
+        if other.min < self.min:
+            self.min, self.argmin = other.min, other.argmin
+        self._hist += other._hist
+        self._zeros += other._zeros
+        return self
+
+    @property
+    def std(self) -> float:
+        if self.count == 0:
+            return np.nan
+        return np.sqrt(self._m2 / self.count)
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return np.nan
+        if self._zeros > 0 and q * self.count <= self._zeros:
+            return 0.0
+        cumulative = np.cumsum(self._hist)
+        idx = int(np.searchsorted(cumulative, q * self.count, side="left"))
+        if idx == 0:
+            return self._edges[0]
+        if idx >= self._hist.shape[0] - 1:
+            return self.max
+        # geometric center of the histogram bin
+        return np.sqrt(self._edges[idx - 1] * self._edges[idx])
+
+    def products(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.mean,
+            "std": self.std,
+            "max": self.max,
+            "argmax": self.argmax,
+            "min": self.min,
+            "argmin": self.argmin,
+            "quantiles": {q: self.quantile(q) for q in self.quantiles}
+        }
+
+
+def compare_streams(a: np.ndarray,
+                    b: np.ndarray,
+                    block_size: int = default_block_size,
+                    atol: float = 1e-7,
+                    rtol: float = 0.0,
+                    **kwargs) -> dict:
+    """
+    Compare two (memory mapped) arrays block by block, keeping running
+    statistics of the magnitude of each array, the magnitude of their
+    difference, and the number of samples that are close. Memory use is
+    set by `block_size`, not by the size of the arrays.
+
+    Args:
+        a (np.ndarray): first array
+        b (np.ndarray): second array
+        block_size (int): approximate number of samples per block
+        atol (float): absolute tolerance for `np.isclose`
+        rtol (float): relative tolerance for `np.isclose`
+        kwargs (dict): passed to `OnlineStats`
+    Returns:
+        dict: "this" has the products of each array, "diff" the products
+            of the difference, and "isclose" the number and fraction of
+            samples that are close.
+    """
+    this = [OnlineStats(**kwargs), OnlineStats(**kwargs)]
+    diff = OnlineStats(**kwargs)
+    n_close = 0
+    n_total = 0
+    for offset, (block_a, block_b) in iter_blocks(
+            a, b, block_size=block_size):
+        n = min(block_a.shape[0], block_b.shape[0])
+        block_a, block_b = block_a[:n], block_b[:n]
+        this[0].update(np.abs(block_a), offset)
+        this[1].update(np.abs(block_b), offset)
+        diff.update(np.abs(block_a - block_b), offset)
+        n_close += int(np.count_nonzero(
+            np.isclose(block_a, block_b, atol=atol, rtol=rtol)))
+        n_total += n
+    module_logger.debug(f"compare_streams: compared {n_total} samples")
+
+    return {
+        "this": [s.products() for s in this],
+        "diff": diff.products(),
+        "isclose": {
+            "count": n_close,
+            "mean": n_close / n_total if n_total > 0 else np.nan
+        }
+    }
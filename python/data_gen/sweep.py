@@ -0,0 +1,365 @@
+import concurrent.futures
+import itertools
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+
+__all__ = [
+    "adaptive_sweep",
+    "SequentialEstimator",
+    "map_sweep",
+    "matrix",
+    "sweep_dir"
+]
+
+module_logger = logging.getLogger(__name__)
+
+# functions being swept, by map_sweep call. Workers are forked, so they
+# inherit them, and they can be closures or lambdas, which couldn't be
+# pickled. Each call has its own entry, so that calls from several threads,
+# or calls nested in a swept function, don't trip over each other.
+_sweep_funcs = {}
+_sweep_funcs_lock = threading.Lock()
+_sweep_tokens = itertools.count()
+
+
+def matrix(spec: dict) -> list:
+    """
+    Expand a sweep matrix, like
+
+    .. code-block:: python
+
+        {"input_fft_length": [1024, 2048], "deripple": [False, True]}
+
+    into every combination of its values, with the last key varying
+    fastest. Values that aren't lists are the same for every combination.
+
+    Returns:
+        list: dicts of parameters
+    """
+    names = list(spec.keys())
+    values = [spec[name] if isinstance(spec[name], (list, tuple))
+              else [spec[name]] for name in names]
+    return [dict(zip(names, combination))
+            for combination in itertools.product(*values)]
+
+
+def adaptive_sweep(evaluate: callable,
+                   lo: int,
+                   hi: int,
+                   metric: callable,
+                   step: int = 1,
+                   n_initial: int = 17,
+                   tolerance: float = 1.0,
+                   n_peaks: int = 3,
+                   max_points: int = 100) -> tuple:
+    """
+    Sweep the integer arguments `lo, lo + step, ..., hi`, starting with a
+    coarse grid and only refining where it matters.
+
+    Arguments get evaluated in batches. After each batch, the interval
+    between two neighbouring arguments gets split in half if their metrics
+    differ by more than `tolerance`, or if either of them is among the
+    `n_peaks` highest local maxima so far. This homes in on edges and the
+    worst case, and leaves flat stretches at the coarse grid. Refinement
+    stops when no interval needs splitting, or after `max_points`
+    arguments.
+
+    Usage:
+
+    .. code-block:: python
+
+        offsets, reports = adaptive_sweep(
+            lambda args: map_sweep(run, args), 1, n_samples,
+            metric=lambda report: report["max_spurious_power"],
+            tolerance=3.0)
+
+    Args:
+        evaluate (callable): takes a list of arguments and returns a list
+            of results
+        lo (int): first argument
+        hi (int): last argument
+        metric (callable): takes a result and returns a number, higher
+            meaning worse
+        step (int): spacing of the finest grid
+        n_initial (int): number of arguments in the coarse grid
+        tolerance (float): largest difference in metrics between
+            neighbours that doesn't get refined
+        n_peaks (int): number of worst cases to refine around
+        max_points (int): maximum number of arguments to evaluate
+    Returns:
+        tuple: arguments evaluated, in increasing order, and their results
+    """
+    def to_grid(x):
+        return lo + int(round((x - lo) / step)) * step
+
+    hi = lo + ((hi - lo) // step) * step
+    todo = sorted({to_grid(x) for x in np.linspace(lo, hi, n_initial)})
+    results = {}
+    while len(todo) > 0:
+        todo = todo[:max_points - len(results)]
+        module_logger.debug(f"adaptive_sweep: evaluating {len(todo)} args")
+        for arg, res in zip(todo, evaluate(todo)):
+            results[arg] = res
+        if len(results) >= max_points:
+            break
+
+        args = sorted(results)
+        metrics = np.array([metric(results[arg]) for arg in args])
+        # local maxima, but not flat stretches, which need no refining
+        padded = np.concatenate([[-np.inf], metrics, [-np.inf]])
+        left, right = padded[:-2], padded[2:]
+        is_peak = ((metrics >= left) & (metrics >= right) &
+                   ((metrics > left) | (metrics > right)))
+        peak_idx = np.flatnonzero(is_peak)
+        peaks = set(peak_idx[np.argsort(metrics[peak_idx])[::-1][:n_peaks]])
+        priority = {}
+        for i in range(len(args) - 1):
+            mid = to_grid((args[i] + args[i+1]) // 2)
+            if not args[i] < mid < args[i+1]:
+                continue
+            diff = abs(metrics[i+1] - metrics[i])
+            if (i in peaks or i + 1 in peaks) and diff > 0:
+                priority[mid] = np.inf
+            elif diff > tolerance:
+                priority[mid] = diff
+        todo = sorted(priority, key=lambda arg: priority[arg], reverse=True)
+
+    args = sorted(results)
+    return args, [results[arg] for arg in args]
+
+
+class SequentialEstimator:
+    """
+    Running estimate of the mean and worst case of a metric, for ending a
+    random sweep once more points wouldn't change the picture.
+
+    The mean has converged once the half width of its confidence interval,
+    from Student's t distribution, is under `tolerance`. The worst case has
+    converged once there is at most a `1 - confidence` chance that the
+    next point exceeds the largest one so far, which for independent
+    points is `1/(n + 1)`, and the largest hasn't changed in the last
+    `patience` points.
+
+    Usage:
+
+    .. code-block:: python
+
+        estimator = SequentialEstimator(confidence=0.95, tolerance=0.5)
+        map_sweep(run, random_offsets,
+                  on_result=lambda idx, r: estimator.update(r["max"]),
+                  stop=estimator.converged)
+
+    Args:
+        confidence (float): confidence level
+        tolerance (float): largest acceptable half width of the confidence
+            interval of the mean
+        min_samples (int): number of points before anything converges
+        patience (int): number of points the largest one has to hold for
+        stat (str): "mean", "max", or "both", what has to converge
+    """
+    def __init__(self,
+                 confidence: float = 0.95,
+                 tolerance: float = 0.5,
+                 min_samples: int = 10,
+                 patience: int = 10,
+                 stat: str = "both"):
+        if stat not in ("mean", "max", "both"):
+            raise ValueError(f"unknown stat {stat}")
+        self.confidence = confidence
+        self.tolerance = tolerance
+        self.min_samples = max(2, min_samples)
+        self.patience = patience
+        self.stat = stat
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.max = -np.inf
+        self._since_max = 0
+
+    def update(self, val: float) -> None:
+        val = float(val)
+        self.count += 1
+        delta = val - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (val - self.mean)
+        if val > self.max:
+            self.max = val
+            self._since_max = 0
+        else:
+            self._since_max += 1
+
+    @property
+    def std(self) -> float:
+        if self.count < 2:
+            return np.inf
+        return np.sqrt(self._m2 / (self.count - 1))
+
+    @property
+    def half_width(self) -> float:
+        """half width of the confidence interval of the mean"""
+        if self.count < 2:
+            return np.inf
+        import scipy.stats
+        t = scipy.stats.t.ppf((1 + self.confidence) / 2, self.count - 1)
+        return t * self.std / np.sqrt(self.count)
+
+    def mean_converged(self) -> bool:
+        return (self.count >= self.min_samples and
+                self.half_width <= self.tolerance)
+
+    def max_converged(self) -> bool:
+        return (self.count >= self.min_samples and
+                1 / (self.count + 1) <= 1 - self.confidence and
+                self._since_max >= self.patience)
+
+    def converged(self) -> bool:
+        if self.stat == "mean":
+            return self.mean_converged()
+        elif self.stat == "max":
+            return self.max_converged()
+        return self.mean_converged() and self.max_converged()
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "std": self.std,
+            "half_width": self.half_width,
+            "max": self.max,
+            "converged": self.converged()
+        }
+
+
+def sweep_dir(output_dir: str, index: int) -> str:
+    """output directory of the `index`th argument of a sweep"""
+    return os.path.join(output_dir, f"sweep.{index}")
+
+
+def _run(token: int, index: int, arg, output_dir: str, keep: bool):
+    work_dir = sweep_dir(output_dir, index)
+    os.makedirs(work_dir, exist_ok=True)
+    try:
+        return _sweep_funcs[token](arg, output_dir=work_dir)
+    finally:
+        if not keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def map_sweep(func: callable,
+              args: list,
+              max_workers: int = None,
+              output_dir: str = None,
+              on_result: callable = None,
+              stop: callable = None,
+              keep: bool = False) -> list:
+    """
+    Call `func` with each of `args` in a pool of worker processes, and get
+    the results in the same order as `args`.
+
+    Each call gets its own output directory, passed as the `output_dir`
+    keyword argument, so that workers don't trip over each other's files.
+    These go in a directory of the sweep's own in `output_dir`, so that
+    sweeps into the same `output_dir` at the same time, from other threads
+    or processes, don't either. Unless `keep` is set, they get removed once
+    the call returns, and the sweep's directory once the sweep is done.
+
+    Calls can be nested, with `func` itself calling `map_sweep`, and can
+    come from several threads at once.
+
+    Sweeps can end early: `stop` gets called after each result comes in,
+    and if it returns True, calls that haven't started yet get cancelled.
+    Calls that are already running get to finish.
+
+    Usage:
+
+    .. code-block:: python
+
+        def run(offset, output_dir):
+            dump_files = pipeline(offset, 1, output_dir=output_dir)
+            return {"offset": offset, "mean": compare(dump_files)}
+
+        reports = map_sweep(run, offsets, output_dir="data")
+
+    Args:
+        func (callable): called as `func(arg, output_dir=...)`
+        args (list): sweep arguments
+        max_workers (int): number of worker processes. Defaults to the
+            number of CPUs. With 1, `func` is called in this process.
+        output_dir (str): directory in which to create the sweep's
+            directory, with the output directories in it, at
+            `sweep_dir(<sweep's directory>, index)`. Defaults to a
+            temporary directory.
+        on_result (callable): called as `on_result(index, result)` in this
+            process as results come in, in the order they finish
+        stop (callable): called without arguments after `on_result`
+        keep (bool): keep output directories
+    Returns:
+        list: result of each call that finished, in the order of `args`
+    """
+    args = list(args)
+    if output_dir is None:
+        keep = False
+        work_dir = tempfile.mkdtemp()
+    else:
+        os.makedirs(output_dir, exist_ok=True)
+        work_dir = tempfile.mkdtemp(prefix="map_sweep.", dir=output_dir)
+    if on_result is None:
+        def on_result(index, result):
+            pass
+    if stop is None:
+        def stop():
+            return False
+    module_logger.debug((f"map_sweep: {len(args)} args, "
+                         f"max_workers={max_workers}, "
+                         f"output_dir={work_dir}"))
+
+    results = {}
+    with _sweep_funcs_lock:
+        token = next(_sweep_tokens)
+        _sweep_funcs[token] = func
+    try:
+        if max_workers == 1:
+            for idx, arg in enumerate(args):
+                results[idx] = _run(token, idx, arg, work_dir, keep)
+                on_result(idx, results[idx])
+                if stop():
+                    break
+            return [results[idx] for idx in sorted(results)]
+
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers,
+            mp_context=multiprocessing.get_context("fork")
+        ) as pool:
+            futures = {pool.submit(_run, token, idx, arg, work_dir, keep):
+                       idx
+                       for idx, arg in enumerate(args)}
+            stopped = False
+            for future in concurrent.futures.as_completed(futures):
+                if future.cancelled():
+                    continue
+                idx = futures[future]
+                if future.exception() is not None:
+                    for other in futures:
+                        other.cancel()
+                    raise future.exception()
+                results[idx] = future.result()
+                module_logger.debug(f"map_sweep: finished {idx}")
+                on_result(idx, results[idx])
+                if not stopped and stop():
+                    module_logger.debug(
+                        f"map_sweep: stopping after {len(results)} args")
+                    stopped = True
+                    for other in futures:
+                        other.cancel()
+        return [results[idx] for idx in sorted(results)]
+    finally:
+        with _sweep_funcs_lock:
+            del _sweep_funcs[token]
+        if not keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
@@ -2,12 +2,8 @@ import os
 import argparse
 import logging
 
-import partialize
-import psr_formats
-import pfb.format_handler
-import pfb.fft_windows
-
 from . import util
+from .dada import LazyDADAFile
 from .config import config, build_dir
 
 __all__ = [
@@ -16,15 +12,18 @@ __all__ = [
 
 module_logger = logging.getLogger(__name__)
 
-fft_window_lookup = {
-    "no_window": lambda a, *args: pfb.fft_windows.no_window(a),
-    "tukey": pfb.fft_windows.tukey_window,
-    "top_hat": pfb.fft_windows.top_hat_window,
-    "hann": lambda a, *args: pfb.fft_windows.hann_window(a),
-}
+
+def fft_window_lookup() -> dict:
+    import pfb.fft_windows
+    return {
+        "no_window": lambda a, *args: pfb.fft_windows.no_window(a),
+        "tukey": pfb.fft_windows.tukey_window,
+        "top_hat": pfb.fft_windows.top_hat_window,
+        "hann": lambda a, *args: pfb.fft_windows.hann_window(a),
+    }
 
 
-@partialize.partialize
+@util.lazy_partialize
 def synthesize(input_data_file_path,
                input_fft_length: int = None,
                input_overlap: int = None,
@@ -74,12 +73,13 @@ def synthesize(input_data_file_path,
 
         util.run_cmd(cmd_str, log_file_path=os.path.join(
             output_dir, log_file_name))
-        return psr_formats.DADAFile(
-            os.path.join(output_dir, output_file_name)).load_data()
+        return LazyDADAFile(os.path.join(output_dir, output_file_name))
 
     elif backend == "python":
+        import pfb.format_handler
+        import psr_formats
         input_data_file = psr_formats.DADAFile(input_data_file_path)
-        fft_window_func = fft_window_lookup[fft_window_str]
+        fft_window_func = fft_window_lookup()[fft_window_str]
         fft_window = fft_window_func(input_fft_length, input_overlap)
         synthesizer = pfb.format_handler.PSRFormatSynthesizer(
             input_overlap=input_overlap,
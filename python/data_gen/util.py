@@ -1,13 +1,13 @@
 import os
 import argparse
-import subprocess
 import shlex
 import json
 import functools
 
-import matplotlib.pyplot as plt
 import numpy as np
 
+from . import metrics
+
 __all__ = [
     "updir",
     "curdir",
@@ -16,7 +16,8 @@ __all__ = [
     "create_output_file_names",
     "matlab_dtype_lookup",
     "coro",
-    "rpartial"
+    "rpartial",
+    "lazy_partialize"
 ]
 
 
@@ -79,11 +80,11 @@ def run_cmd(cmd_str: str, log_file_path: str = None):
     cmd_split = shlex.split(cmd_str)
     if log_file_path is not None:
         with open(log_file_path, "w") as log_file:
-            cmd = subprocess.run(cmd_split,
-                                 stdout=log_file,
-                                 stderr=log_file)
+            cmd = metrics.run(cmd_split,
+                              stdout=log_file,
+                              stderr=log_file)
     else:
-        cmd = subprocess.run(cmd_split)
+        cmd = metrics.run(cmd_split)
 
     if cmd.returncode != 0:
         raise RuntimeError("Exited with non zero status")
@@ -107,21 +108,35 @@ def report2plot(
     desired_keys: list = None,
     output_dir: str = "./",
     output_file_name: str = None,
+    family: str = None,
+    where: dict = None,
     **kwargs
 ) -> None:
     """
     Take a report generated by a testing pipeline and create a plot.
+
+    If `family` is given, `report_file_path` is a report store instead,
+    and the plot is of the results of that family whose parameters match
+    `where`.
     """
     if output_file_name is None:
-        output_file_name = os.path.splitext(
-            os.path.basename(report_file_path))[0] + ".png"
+        if family is not None:
+            output_file_name = f"report.{family}.png"
+        else:
+            output_file_name = os.path.splitext(
+                os.path.basename(report_file_path))[0] + ".png"
     output_file_path = os.path.join(output_dir, output_file_name)
 
     if desired_keys is None:
         desired_keys = ["offset", "freq"]
 
-    with open(report_file_path, "r") as f:
-        report = json.load(f)
+    if family is not None:
+        from .report_store import ReportStore
+        report = ReportStore(report_file_path).group(
+            family, "test_method", where=where)
+    else:
+        with open(report_file_path, "r") as f:
+            report = json.load(f)
 
     data = []
 
@@ -136,6 +151,7 @@ def report2plot(
                 "x": x, "y": y, "test_method": test_method
             })
 
+    import matplotlib.pyplot as plt
     fig, axes = plt.subplots(len(data), 1, **kwargs)
 
     for i in range(len(axes)):
@@ -183,7 +199,25 @@ def coro(func):
 
 
 def rpartial(func, *args, **kwargs):
-    return lambda *a: func(*(a + args), **kwargs)
+    return lambda *a, **kw: func(*(a + args), **{**kwargs, **kw})
+
+
+def lazy_partialize(func):
+    """
+    Like `partialize.partialize`, but `partialize` only gets imported, and
+    `func` decorated, the first time the result gets called.
+    """
+    partialized = None
+
+    @functools.wraps(func)
+    def _inner(*args, **kwargs):
+        nonlocal partialized
+        if partialized is None:
+            import partialize
+            partialized = partialize.partialize(func)
+        return partialized(*args, **kwargs)
+
+    return _inner
 
 
 def create_parser():
@@ -196,6 +230,12 @@ def create_parser():
                         nargs="+", type=str,
                         required=True)
 
+    parser.add_argument("-f", "--family",
+                        dest="family", type=str, required=False,
+                        default=None,
+                        help=("Treat input files as report stores, and plot "
+                              "this family of results"))
+
     parser.add_argument("-od", "--output_dir",
                         dest="output_dir", type=str, required=False,
                         default="./")
@@ -209,4 +249,5 @@ def create_parser():
 if __name__ == "__main__":
     parsed = create_parser().parse_args()
     for file_path in parsed.input_file_paths:
-        report2plot(file_path, output_dir=parsed.output_dir, figsize=(16, 9))
+        report2plot(file_path, output_dir=parsed.output_dir,
+                    family=parsed.family, figsize=(16, 9))
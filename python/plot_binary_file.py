@@ -5,7 +5,9 @@ import logging
 import numpy as np
 import matplotlib.pyplot as plt
 
-from compare_dump_files import load_binary_data, dtype_map
+from compare_dump_files import dtype_map
+from data_gen.plotting import plot_envelope
+from data_gen.pyramid import Pyramid, plot_overview
 
 module_logger = logging.getLogger(__name__)
 
@@ -17,9 +19,9 @@ def plot_binary_files(*file_paths: str, dtype=None, offset=0):
     data = []
     for f in file_paths:
         if f.endswith(".npy"):
-            data.append(np.load(f).flatten())
+            data.append(np.load(f, mmap_mode="r").reshape(-1))
         else:
-            data.append(load_binary_data(f, dtype=dtype, offset=offset))
+            data.append(np.memmap(f, dtype=dtype, mode="r", offset=offset))
 
     iscomplex = np.iscomplexobj(data[0])
     n_z = 2 if iscomplex else 1
@@ -36,12 +38,36 @@ def plot_binary_files(*file_paths: str, dtype=None, offset=0):
             ax = axes[i][z]
             ax.grid(True)
             ax.set_title(os.path.basename(file_paths[i]))
-            ax.plot(n_z_fn[z](data[i]))
+            plot_envelope(ax, data[i], transform=n_z_fn[z], cache_key=(
+                os.path.abspath(file_paths[i]),
+                os.path.getmtime(file_paths[i]),
+                np.dtype(dtype).str, offset, z))
             # ax.set_xlim([10000, 10050])
 
     plt.show()
 
 
+def plot_dump_overviews(*file_paths: str, chan: int = 0, pol: int = 0):
+    """
+    Plot DADA files from their overview pyramids, reading raw data only
+    when zoomed in past the finest pyramid level.
+    """
+    pyramids = [Pyramid(f) for f in file_paths]
+    n_z = max(len(p.components) for p in pyramids)
+
+    fig, axes = plt.subplots(len(file_paths), n_z,
+                             sharex=True, squeeze=False)
+    for i in range(len(file_paths)):
+        for z, component in enumerate(pyramids[i].components):
+            ax = axes[i][z]
+            ax.grid(True)
+            ax.set_title(os.path.basename(file_paths[i]))
+            plot_overview(ax, pyramids[i], chan=chan, pol=pol,
+                          component=component)
+
+    plt.show()
+
+
 def create_parser():
     parser = argparse.ArgumentParser(
         description="Plot the contents of binary file(s)")
@@ -55,7 +81,8 @@ def create_parser():
                         required=True)
 
     parser.add_argument("-dt", "--dtype",
-                        dest="dtype", type=str, required=True,
+                        dest="dtype", type=str, required=False,
+                        default=None,
                         help=("Specify the data type of the binary file. "
                               f"Available types are {list(dtype_map.keys())}"))
 
@@ -64,6 +91,14 @@ def create_parser():
                         default=0,
                         help=("Specify the data location (in bytes) in "
                               "the binary file."))
+
+    parser.add_argument("-c", "--chan",
+                        dest="chan", type=int, required=False, default=0,
+                        help="Channel to plot from .dump files")
+
+    parser.add_argument("-p", "--pol",
+                        dest="pol", type=int, required=False, default=0,
+                        help="Polarization to plot from .dump files")
     return parser
 
 
@@ -74,9 +109,16 @@ def main():
         level = logging.DEBUG
     logging.basicConfig(level=level)
     logging.getLogger("matplotlib").setLevel(logging.ERROR)
+    if all(f.endswith(".dump") for f in parsed.input_file_paths):
+        plot_dump_overviews(
+            *parsed.input_file_paths,
+            chan=parsed.chan,
+            pol=parsed.pol
+        )
+        return
     plot_binary_files(
         *parsed.input_file_paths,
-        dtype=dtype_map[parsed.dtype],
+        dtype=dtype_map.get(parsed.dtype),
         offset=parsed.offset
     )
 
@@ -4,6 +4,8 @@ import argparse
 
 import matplotlib.pyplot as plt
 
+import data_gen
+import data_gen.report_store
 import data_gen.util
 from data_gen.config import matplotlib_config
 
@@ -13,7 +15,42 @@ cur_dir = data_gen.util.curdir(__file__)
 products_dir = os.path.join(data_gen.util.updir(cur_dir, 1), "products")
 
 
-def plot_purity_results(results_path):
+def load_purity_results(store_path: str = None, where: dict = None) -> dict:
+    """
+    Get purity results from a report store, in the same form as a
+    `report.purity.*.json` report. `where` picks out runs by parameter,
+    for example `{"input_fft_length": 1024, "deripple": 1}`.
+    """
+    if store_path is None:
+        store_path = data_gen.report_store.report_store_path
+    if not os.path.exists(store_path):
+        raise FileNotFoundError((f"No report store at {store_path}. Run the "
+                                 "purity tests first, or pass a JSON report "
+                                 "with -i"))
+    store = data_gen.ReportStore(store_path)
+    if "purity" not in store.families():
+        raise ValueError((f"No purity results in {store_path}. Run the "
+                          "purity tests first, or pass a JSON report "
+                          "with -i"))
+    return store.group("purity", "test_method", where=where)
+
+
+def _parse_where(where: list) -> dict:
+    parsed = {}
+    for item in where:
+        key, val = item.split("=", 1)
+        vals = []
+        for v in val.split(","):
+            try:
+                v = json.loads(v)
+            except json.JSONDecodeError:
+                pass
+            vals.append(v)
+        parsed[key] = vals if len(vals) > 1 else vals[0]
+    return parsed
+
+
+def plot_purity_results(results_path: str = None, results: dict = None):
     key_map = {
         "test_complex_sinusoid": "freq",
         "test_time_domain_impulse": "offset"
@@ -37,8 +74,9 @@ def plot_purity_results(results_path):
 
     in_per_row = 4
 
-    with open(results_path, "r") as f:
-        results = json.load(f)
+    if results is None:
+        with open(results_path, "r") as f:
+            results = json.load(f)
 
     def plot_results(x, x_label, dat, dat_labels):
         fig, axes = plt.subplots(len(dat), 1,
@@ -90,7 +128,19 @@ def create_parser():
 
     parser.add_argument("-i", "--input-file",
                         dest="input_file_path",
-                        required=True)
+                        required=False)
+
+    parser.add_argument("-s", "--store",
+                        dest="store_path", type=str, required=False,
+                        default=None,
+                        help=("Read results from a report store instead of "
+                              "a JSON report"))
+
+    parser.add_argument("-w", "--where",
+                        dest="where", nargs="*", type=str, required=False,
+                        default=[],
+                        help=("Pick runs from the report store by parameter, "
+                              "as key=value or key=value1,value2"))
 
     return parser
 
@@ -99,4 +149,8 @@ if __name__ == "__main__":
     parsed = create_parser().parse_args()
     results_path = parsed.input_file_path
     # results_path = os.path.join(products_dir, "report.purity.json")
-    plot_purity_results(results_path)
+    if results_path is None:
+        plot_purity_results(results=load_purity_results(
+            parsed.store_path, where=_parse_where(parsed.where)))
+    else:
+        plot_purity_results(results_path)
@@ -0,0 +1,70 @@
+import unittest
+import logging
+import os
+import shutil
+import tempfile
+
+from data_gen.cache import RunCache
+
+
+class TestRunCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = RunCache(os.path.join(self.tmp_dir, "cache"),
+                              max_size=2048)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def create_file(self, file_name, contents):
+        file_path = os.path.join(self.tmp_dir, file_name)
+        with open(file_path, "wb") as f:
+            f.write(contents)
+        return file_path
+
+    def test_key(self):
+        a = self.create_file("a.dump", b"a" * 100)
+        b = self.create_file("b.dump", b"a" * 100)
+        c = self.create_file("c.dump", b"c" * 100)
+
+        self.assertTrue(self.cache.key("dspsr -V", file_paths=[a]) ==
+                        self.cache.key("dspsr -V", file_paths=[b]))
+        self.assertFalse(self.cache.key("dspsr -V", file_paths=[a]) ==
+                         self.cache.key("dspsr -V", file_paths=[c]))
+        self.assertFalse(self.cache.key("dspsr -V", file_paths=[a]) ==
+                         self.cache.key("dspsr", file_paths=[a]))
+
+    def test_put_get(self):
+        ar = self.create_file("a.ar", b"archive")
+        key = self.cache.key("dspsr")
+        self.assertTrue(self.cache.get(key) is None)
+
+        self.cache.put(key, {"out.ar": ar})
+        cached = self.cache.get(key)
+        self.assertTrue(list(cached.keys()) == ["out.ar"])
+
+        restored = os.path.join(self.tmp_dir, "restored.ar")
+        self.cache.restore(cached, {"out.ar": restored})
+        with open(restored, "rb") as f:
+            self.assertTrue(f.read() == b"archive")
+
+    def test_evict(self):
+        ar = self.create_file("a.ar", b"a" * 1024)
+        keys = [self.cache.key(str(i)) for i in range(3)]
+        self.cache.put(keys[0], {"out.ar": ar})
+        self.cache.put(keys[1], {"out.ar": ar})
+        # keys[0] is now the most recently used entry
+        os.utime(os.path.join(self.cache.cache_dir, keys[1]), (0, 0))
+        self.cache.get(keys[0])
+        self.cache.put(keys[2], {"out.ar": ar})
+
+        self.assertTrue(self.cache.get(keys[1]) is None)
+        self.assertFalse(self.cache.get(keys[0]) is None)
+        self.assertFalse(self.cache.get(keys[2]) is None)
+        self.assertTrue(self.cache.size() <= self.cache.max_size)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from data_gen.checkpoint import Checkpoint
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, "checkpoint.jsonl")
+        self.params = {"input_fft_length": 1024, "deripple": True}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_resume(self):
+        args = np.linspace(1, 1000, 10).astype(int)
+        checkpoint = Checkpoint(self.file_path, self.params)
+        self.assertTrue(len(checkpoint.remaining(args)) == 10)
+        for arg in args[:4]:
+            checkpoint.append(arg, {"arg": arg, "mean": np.float32(arg/2)})
+
+        checkpoint = Checkpoint(self.file_path, self.params)
+        remaining = checkpoint.remaining(args)
+        self.assertTrue(list(remaining) == list(args[4:]))
+        for arg in remaining:
+            checkpoint.append(arg, {"arg": arg, "mean": np.float32(arg/2)})
+        results = Checkpoint(self.file_path, self.params).results(args)
+        self.assertTrue([r["arg"] for r in results] == list(args))
+        self.assertTrue(results[3]["mean"] == args[3]/2)
+
+    def test_params(self):
+        Checkpoint(self.file_path, self.params).append(10, {"mean": 1.0})
+        other = Checkpoint(self.file_path, {**self.params, "deripple": False})
+        self.assertFalse(10 in other)
+        other.append(10, {"mean": 2.0})
+        self.assertTrue(
+            Checkpoint(self.file_path, self.params).get(10)["mean"] == 1.0)
+        # key doesn't depend on parameter order
+        other = Checkpoint(self.file_path, {
+            "deripple": False, "input_fft_length": 1024})
+        self.assertTrue(other.get(10)["mean"] == 2.0)
+
+    def test_partial_line(self):
+        checkpoint = Checkpoint(self.file_path, self.params)
+        checkpoint.append(1, {"mean": 1.0})
+        checkpoint.append(2, {"mean": 2.0})
+        with open(self.file_path, "r") as f:
+            content = f.read()
+        # crash in the middle of writing the last line
+        with open(self.file_path, "w") as f:
+            f.write(content[:-10])
+
+        checkpoint = Checkpoint(self.file_path, self.params)
+        self.assertTrue(checkpoint.remaining([1, 2, 3]) == [2, 3])
+        checkpoint.append(2, {"mean": 2.0})
+        checkpoint = Checkpoint(self.file_path, self.params)
+        self.assertTrue(checkpoint.remaining([1, 2, 3]) == [3])
+        self.assertTrue(checkpoint.get(2)["mean"] == 2.0)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
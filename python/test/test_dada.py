@@ -0,0 +1,68 @@
+import unittest
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from data_gen.dada import LazyDADAFile
+
+
+def write_dada_file(file_path, data, hdr_size=4096):
+    header = "\n".join([
+        f"HDR_SIZE {hdr_size}",
+        f"NCHAN {data.shape[1]}",
+        f"NPOL {data.shape[2]}",
+        f"NDIM {2 if np.iscomplexobj(data) else 1}",
+        f"NBIT {8*data.dtype.itemsize//(2 if np.iscomplexobj(data) else 1)}",
+        "TSAMP 0.025"
+    ]) + "\n"
+    with open(file_path, "wb") as f:
+        f.write(header.encode().ljust(hdr_size, b"\0"))
+        f.write(data.tobytes())
+
+
+class TestLazyDADAFile(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmp_dir, "test.dump")
+        self.data = (np.random.rand(100, 4, 2) +
+                     1j*np.random.rand(100, 4, 2)).astype(np.complex64)
+        write_dada_file(self.file_path, self.data)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_header(self):
+        dada_file = LazyDADAFile(self.file_path)
+        self.assertTrue(dada_file["NCHAN"] == "4")
+        self.assertTrue(dada_file.ndat == 100)
+        self.assertFalse(dada_file.loaded)
+
+    def test_data(self):
+        dada_file = LazyDADAFile(self.file_path).load_data()
+        self.assertTrue(dada_file.data.shape == (100, 4, 2))
+        self.assertTrue(dada_file.data.dtype == np.complex64)
+        self.assertTrue(np.array_equal(dada_file.data, self.data))
+        self.assertTrue(dada_file.loaded)
+
+    def test_copy_on_write(self):
+        dada_file = LazyDADAFile(self.file_path)
+        dada_file.data[:, 0, 0] /= 2.0
+        del dada_file
+        self.assertTrue(np.array_equal(
+            LazyDADAFile(self.file_path).data, self.data))
+
+    def test_large_header(self):
+        write_dada_file(self.file_path, self.data.real.copy(), hdr_size=8192)
+        dada_file = LazyDADAFile(self.file_path)
+        self.assertTrue(dada_file.hdr_size == 8192)
+        self.assertTrue(dada_file.dtype == np.float32)
+        self.assertTrue(np.array_equal(dada_file.data, self.data.real))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
@@ -6,7 +6,11 @@ import time
 
 import numpy as np
 
-from data_gen.generate_test_vector import generate_test_vector
+from data_gen.generate_test_vector import (
+    generate_test_vector,
+    complex_sinusoid,
+    newman_phases
+)
 from data_gen.channelize import channelize
 from data_gen.synthesize import synthesize
 from data_gen.util import curdir
@@ -94,6 +98,29 @@ class TestGenerateTestVector(data_gen_test_case_factory()):
 
         self.time_domain_kwargs["output_file_name"] = original_val
 
+    def test_generate_test_vectors_multiple_impulses(self):
+        generator = generate_test_vector(backend="python", domain_name="time")
+        dada_file = generator(1000, [100, 600], [1, 1], n_pol=2,
+                              output_dir=output_dir, dtype=np.complex64)
+        expected_file_name = ("time_domain_impulse.1000."
+                              "100.000_600.000-1.000_1.000."
+                              "2.single.python.dump")
+        self.assertTrue((os.path.basename(dada_file.file_path) ==
+                         expected_file_name))
+        nonzero = np.flatnonzero(dada_file.data[:, 0, 0])
+        self.assertTrue(list(nonzero) == [100, 600])
+
+        generator = generate_test_vector(backend="matlab", domain_name="time")
+        with self.assertRaises(ValueError):
+            generator(1000, [100, 600], [1, 1], n_pol=2,
+                      output_dir=output_dir)
+
+    def test_newman_phases(self):
+        freqs = list(range(5, 1000, 40))
+        sig = complex_sinusoid(1000, freqs, newman_phases(len(freqs)))
+        crest = np.amax(np.abs(sig)) / np.sqrt(np.mean(np.abs(sig)**2))
+        self.assertTrue(crest < 1.5)
+
 
 # @unittest.skip("")
 class TestChannelize(data_gen_test_case_factory()):
@@ -1,10 +1,14 @@
 import unittest
+import io
 import os
 import logging
+import shutil
+import tempfile
 
 import data_gen
 
 import data_gen.util
+from data_gen import metrics
 
 test_dir = data_gen.util.curdir(__file__)
 base_dir = data_gen.util.updir(test_dir, 2)
@@ -35,6 +39,16 @@ class TestDSPSRUtil(unittest.TestCase):
 
     file_paths = set()
 
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.metrics_file_path = metrics.metrics_file_path
+        metrics.metrics_file_path = os.path.join(
+            self.tmp_dir, "metrics.jsonl")
+
+    def tearDown(self):
+        metrics.metrics_file_path = self.metrics_file_path
+        shutil.rmtree(self.tmp_dir)
+
     def test_run_dspsr(self):
 
         output = data_gen.run_dspsr(
@@ -74,6 +88,15 @@ class TestDSPSRUtil(unittest.TestCase):
         )
         self.__class__.file_paths |= set(output)
 
+    def test_psrtxt_pipe(self):
+        data, log_file_path = data_gen.run_psrtxt(
+            self.psrtxt_test_file_path,
+            output_dir=test_dir,
+            pipe=True
+        )
+        self.assertTrue(data.ndim == 2)
+        self.__class__.file_paths.add(log_file_path)
+
     def test_find_in_log(self):
         val = data_gen.find_in_log(
             self.test_log_file_path,
@@ -91,6 +114,17 @@ class TestDSPSRUtil(unittest.TestCase):
             self.test_load_psrtxt_data_file_path)
         self.assertTrue(data[3, 330] == -0.000184)
 
+    def test_load_psrtxt_stream(self):
+
+        with open(self.test_load_psrtxt_data_file_path, "rb") as f:
+            data = data_gen.load_psrtxt_stream(f, rows=1, chunk_size=64)
+        self.assertTrue(data[3, 330] == -0.000184)
+
+        data = data_gen.load_psrtxt_stream(
+            io.BytesIO(b"0 0 0 1.0 2.0\n0 0 1 3.0 4.0\n\n"))
+        self.assertTrue(data.shape == (5, 2))
+        self.assertTrue(data[4, 1] == 4.0)
+
     @classmethod
     def tearDownClass(cls):
         print(cls.file_paths)
@@ -0,0 +1,75 @@
+import unittest
+import logging
+import threading
+import functools
+
+import data_gen
+from data_gen.executor import Graph
+
+
+class TestGraph(unittest.TestCase):
+
+    def test_parallel_branches(self):
+        # both branches have to be running at the same time to get past
+        # the barrier
+        barrier = threading.Barrier(2, timeout=5)
+
+        def branch(name):
+            barrier.wait()
+            return (f"{name}.ar", f"{name}.log")
+
+        graph = Graph(max_workers=2)
+        graph.add("sim", functools.partial(branch, "sim"))
+        graph.add("inv", functools.partial(branch, "inv"))
+        graph.add("diff", lambda a, b: f"{a}-{b}", "sim", "inv")
+
+        self.assertTrue(graph.run("diff") == ["sim.ar-inv.ar"])
+
+    def test_memoize(self):
+        calls = []
+
+        def f():
+            calls.append(1)
+            return "f.ar"
+
+        graph = Graph()
+        graph.add("f", f)
+        graph.add("g", lambda a: a + ".txt", "f")
+        graph.add("h", lambda a: a + ".out", "f")
+        graph.add("f", lambda: "not called")
+        graph.run("g", "h")
+        graph.run("g")
+
+        self.assertTrue(len(calls) == 1)
+        self.assertTrue(graph["h"] == "f.ar.out")
+
+    def test_unknown_dependency(self):
+        graph = Graph()
+        with self.assertRaises(KeyError):
+            graph.add("g", lambda a: a, "f")
+
+    def test_exception(self):
+
+        def f():
+            raise RuntimeError("f failed")
+
+        graph = Graph()
+        graph.add("f", f)
+        graph.add("g", lambda a: a, "f")
+        with self.assertRaises(RuntimeError):
+            graph.run()
+
+    def test_chain(self):
+        chain = data_gen.BaseRunner.chain(
+            lambda a: (a + ".ar", a + ".log"),
+            lambda a: a + ".txt",
+            len
+        )
+        res = chain("file")
+        self.assertTrue(res[1] == "file.ar.txt")
+        self.assertTrue(res[2] == len("file.ar.txt"))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,62 @@
+import json
+import logging
+import os
+import subprocess
+import sys
+import unittest
+
+cur_dir = os.path.dirname(os.path.abspath(__file__))
+python_dir = os.path.dirname(cur_dir)
+
+# seconds a cold `import data_gen` may take, numpy included
+import_time_budget = float(os.environ.get("DATA_GEN_IMPORT_BUDGET", 1.0))
+
+heavy_modules = [
+    "matplotlib",
+    "scipy",
+    "psr_formats",
+    "pfb",
+    "partialize",
+    "comparator"
+]
+
+_script = """
+import json
+import sys
+import time
+t0 = time.perf_counter()
+import data_gen
+delta = time.perf_counter() - t0
+print(json.dumps({
+    "time": delta,
+    "modules": sorted({name.split(".")[0] for name in sys.modules}),
+    "config_loaded": data_gen.config._config is not None
+}))
+"""
+
+
+def cold_import() -> dict:
+    cmd = subprocess.run([sys.executable, "-c", _script],
+                         cwd=python_dir, capture_output=True, check=True)
+    return json.loads(cmd.stdout.decode())
+
+
+class TestImportTime(unittest.TestCase):
+
+    def test_no_heavy_imports(self):
+        res = cold_import()
+        for name in heavy_modules:
+            self.assertNotIn(name, res["modules"])
+        self.assertFalse(res["config_loaded"])
+
+    def test_import_time_budget(self):
+        # best of a few, so a busy machine doesn't fail the test
+        delta = min(cold_import()["time"] for i in range(3))
+        logging.getLogger(__name__).debug(
+            f"test_import_time_budget: {delta:.3f} s")
+        self.assertLess(delta, import_time_budget)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import logging
+import os
+import sys
+import shutil
+import tempfile
+
+from data_gen import metrics
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.metrics_file_path = metrics.metrics_file_path
+        metrics.metrics_file_path = os.path.join(
+            self.tmp_dir, "metrics.jsonl")
+
+    def tearDown(self):
+        metrics.metrics_file_path = self.metrics_file_path
+        shutil.rmtree(self.tmp_dir)
+
+    def test_run(self):
+        input_file_path = os.path.join(self.tmp_dir, "input.dump")
+        with open(input_file_path, "wb") as f:
+            f.write(b"\0" * 1024)
+
+        cmd = metrics.run([sys.executable, "-c", "pass", input_file_path])
+        self.assertTrue(cmd.returncode == 0)
+        cmd = metrics.run([sys.executable, "-c", "raise SystemExit(3)"])
+        self.assertTrue(cmd.returncode == 3)
+
+        entries = metrics.load_metrics()
+        self.assertTrue(len(entries) == 2)
+        self.assertTrue(entries[0]["input_sizes"][input_file_path] == 1024)
+        self.assertTrue(entries[1]["returncode"] == 3)
+        self.assertTrue(entries[0]["wall_time"] > 0)
+        self.assertTrue(entries[0]["max_rss"] > 0)
+        self.assertTrue(entries[0]["user_time"] >= 0)
+
+        summary = metrics.summarize_metrics(entries)
+        program = os.path.basename(sys.executable)
+        self.assertTrue(summary[program]["count"] == 2)
+
+    def test_run_not_recording(self):
+        def size():
+            if os.path.exists(metrics.default_metrics_file_path):
+                return os.path.getsize(metrics.default_metrics_file_path)
+
+        metrics.metrics_file_path = None
+        size_before = size()
+        cmd = metrics.run([sys.executable, "-c", "pass"])
+        self.assertTrue(cmd.returncode == 0)
+        self.assertTrue(len(os.listdir(self.tmp_dir)) == 0)
+        self.assertTrue(size() == size_before)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,195 @@
+import unittest
+import logging
+import os
+import shutil
+import tempfile
+import types
+
+import numpy as np
+
+import data_gen
+from data_gen import report_store
+from verify import test_purity
+
+test_method_name = "test_time_domain_impulse"
+
+
+def toy_test_case(output_dir):
+    """
+    Create a purity test case with a small filterbank, whose pipeline is a
+    toy periodically time varying linear system standing in for the
+    channelizer and synthesis filterbank.
+    """
+    test_case = test_purity.purity_test_case_factory(
+        test_case_name="TestPurityToy",
+        os_factor="4/3",
+        input_fft_length=64,
+        input_overlap=8,
+        fft_window="no_window",
+        deripple=False,
+        channels=8,
+        fir_filter_taps=81,
+        fir_filter_coeff_file_path="",
+        blocks=6,
+        backend={"test_vectors": "python", "channelize": "python",
+                 "synthesize": "python"},
+        dump_stage="Detection",
+        dm=0.0,
+        period=1.0)
+    rng = np.random.default_rng(0)
+    kernel = rng.standard_normal(test_case.impulse_support)
+    gain = 1.0 + rng.random(test_case.response_period)
+    dump_files = {}
+    pipeline_calls = []
+
+    def dump_file(file_path, data):
+        dump_files[file_path] = types.SimpleNamespace(
+            file_path=file_path, data=data.reshape(-1, 1, 1))
+        return dump_files[file_path]
+
+    def pipeline(offsets, widths, *, domain_name, n_bins=None, output_dir):
+        if n_bins is None:
+            n_bins = test_case.n_samples
+        pipeline_calls.append(n_bins)
+        offsets, widths = np.atleast_1d(offsets), np.atleast_1d(widths)
+        x = np.zeros(n_bins)
+        for offset, width in zip(offsets, widths):
+            x[offset:offset + width] = 1.0
+        file_path = os.path.join(output_dir, f"{len(dump_files)}.dump")
+        return [dump_file(file_path, x),
+                dump_file(file_path + ".channelized", x)]
+
+    def synthesizer(input_file_path, output_dir):
+        x = dump_files[input_file_path].data.flatten()
+        shift = test_case.total_sample_shift
+        half = test_case.impulse_support // 2
+        # only whole blocks come out, fewer than the input can line up with
+        n_out = test_case.block_size * (x.shape[0] // test_case.block_size - 1)
+        idx = np.arange(n_out) + shift
+        y = np.convolve(x, kernel)[half:][idx] * gain[
+            idx % test_case.response_period]
+        return [dump_file(input_file_path + ".inverted", y)]
+
+    def compare_deferred(input_dump_file, inverted_dump_file, *,
+                         test_method_name, arg, window=None):
+        input_dat, inverted_dat = test_case.chop(
+            input_dump_file, inverted_dump_file, window=window)
+        n = min(input_dat.shape[0], inverted_dat.shape[0])
+        input_dat, inverted_dat = input_dat[:n], inverted_dat[:n]
+        diff = np.abs(input_dat - inverted_dat)
+        return {
+            "mean_diff": float(np.mean(diff)),
+            "total_diff": float(np.sum(diff)),
+            "arg": arg,
+            "input_sum": float(np.sum(np.abs(input_dat))),
+            "sum": float(np.sum(np.abs(inverted_dat)))
+        }, inverted_dat
+
+    test_case.pipeline = staticmethod(pipeline)
+    test_case.synthesizer = staticmethod(synthesizer)
+    test_case.compare_deferred = staticmethod(compare_deferred)
+    test_case.output_dir = output_dir
+    test_case.pipeline_calls = pipeline_calls
+    # pick up the toy pipeline
+    test_case.register_test_methods()
+    return test_case
+
+
+class TestPackedImpulses(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self._globals = {name: getattr(test_purity, name) for name in
+                         ["n_test", "products_dir", "max_workers",
+                          "impulses_per_run"]}
+        self._report_store_path = report_store.report_store_path
+        # offsets in front of the compared output, and past the end of the
+        # test vector, as well as ones in the middle
+        test_purity.n_test = 7
+        test_purity.products_dir = self.tmp_dir
+        test_purity.max_workers = 1
+        report_store.report_store_path = os.path.join(
+            self.tmp_dir, "reports.sqlite3")
+
+    def tearDown(self):
+        for name, val in self._globals.items():
+            setattr(test_purity, name, val)
+        report_store.report_store_path = self._report_store_path
+        shutil.rmtree(self.tmp_dir)
+
+    def run_test_method(self, impulses_per_run, products_dir=None):
+        test_purity.impulses_per_run = impulses_per_run
+        if products_dir is not None:
+            test_purity.products_dir = products_dir
+        test_case = toy_test_case(self.tmp_dir)
+        test_case.setUpClass()
+        getattr(test_case(test_method_name), test_method_name)()
+        self.pipeline_calls = test_case.pipeline_calls
+        return test_case.report[test_method_name]
+
+    def test_layout(self):
+        test_case = toy_test_case(self.tmp_dir)
+        period = test_case.response_period
+        self.assertTrue(test_case.packing_slot % period == 0)
+        self.assertTrue(test_case.packing_slot >=
+                        2*test_case.impulse_support + period)
+        self.assertTrue(test_case.packed_start % period == 0)
+        self.assertTrue(test_case.packed_start >= (
+            test_case.total_sample_shift + test_case.impulse_support))
+        self.assertTrue(test_case.packing_step % period == 0)
+        self.assertTrue(test_case.packing_step % test_case.block_size == 0)
+        # much less than a whole test vector per impulse
+        self.assertTrue(test_case.packing_slot < test_case.n_samples)
+
+    def test_packed_matches_unpacked(self):
+        # checkpoints of their own, so nothing gets picked up from the
+        # other runs
+        unpacked = self.run_test_method(
+            1, products_dir=tempfile.mkdtemp(dir=self.tmp_dir))
+        offsets = [res["arg"] for res in unpacked]
+        test_case = toy_test_case(self.tmp_dir)
+        shift = test_case.total_sample_shift
+        self.assertTrue(min(offsets) < shift)
+        # offsets whose response would be cut off in a run of their own
+        n_compared = (test_case.n_samples - test_case.block_size -
+                      shift)
+        n_own = len([arg for arg in offsets
+                     if not shift + test_case.impulse_support <= arg <=
+                     shift + n_compared - test_case.impulse_support])
+        self.assertTrue(0 < n_own < len(offsets))
+
+        for impulses_per_run in [3, 7]:
+            packed = self.run_test_method(
+                impulses_per_run,
+                products_dir=tempfile.mkdtemp(dir=self.tmp_dir))
+            # a packed test vector per job, and runs of their own for the
+            # rest
+            n_jobs = int(np.ceil(len(offsets) / impulses_per_run))
+            self.assertTrue(len(self.pipeline_calls) == n_jobs + n_own)
+            self.assertTrue(len(packed) == len(unpacked))
+            for res_packed, res_unpacked in zip(packed, unpacked):
+                self.assertTrue(res_packed["arg"] == res_unpacked["arg"])
+                for name in ["mean_diff", "total_diff", "input_sum", "sum",
+                             "max_spurious_power", "total_spurious_power",
+                             "mean_spurious_power"]:
+                    self.assertTrue(np.isclose(
+                        res_packed[name], res_unpacked[name]))
+
+    def test_packed_checkpoint(self):
+        self.run_test_method(3)
+        test_case = toy_test_case(self.tmp_dir)
+        params = {**test_case.checkpoint_params,
+                  "test_method": test_method_name}
+        args = test_case.sweeps[test_method_name]["args"]
+        packed = data_gen.Checkpoint(
+            test_case.checkpoint_path,
+            params={**params, "impulses_per_run": 3})
+        unpacked = data_gen.Checkpoint(test_case.checkpoint_path,
+                                       params=params)
+        self.assertTrue(len(packed.remaining(args)) == 0)
+        self.assertTrue(len(unpacked.remaining(args)) == len(args))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+import logging
+
+import numpy as np
+
+from data_gen.pairwise import PairwiseComparison
+
+
+class TestPairwiseComparison(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.arrays = [rng.standard_normal(1000 + i) + 0j for i in range(4)]
+
+    def test_products(self):
+        comp = PairwiseComparison(*self.arrays)
+        res = comp.products("time")
+        self.assertEqual(res["this"]["max"].shape, (4, ))
+        for name in ["mean", "sum", "max", "argmax"]:
+            matrix = res["diff"][name]
+            self.assertTrue(np.all(np.isnan(np.diag(matrix))))
+            self.assertTrue(np.array_equal(matrix, matrix.T, equal_nan=True))
+        diff = np.abs(self.arrays[1][:1000] - self.arrays[3][:1000])
+        self.assertTrue(np.isclose(res["diff"]["mean"][1, 3], np.mean(diff)))
+        self.assertEqual(res["diff"]["argmax"][3, 1], np.argmax(diff))
+
+        res = comp.products("time", window=slice(100, 200))
+        self.assertTrue(np.isclose(res["diff"]["max"][1, 3],
+                                   np.amax(diff[100:200])))
+
+    def test_spectra(self):
+        comp = PairwiseComparison(*self.arrays, fft_size=256, fft_offset=10)
+        res = comp.products("freq")
+        spectra = comp.spectra
+        self.assertIs(comp.spectra, spectra)
+        expected = np.abs(np.fft.fft(self.arrays[0][10:266]) -
+                          np.fft.fft(self.arrays[2][10:266]))
+        self.assertTrue(np.isclose(res["diff"]["max"][0, 2],
+                                   np.amax(expected)))
+        with self.assertRaises(ValueError):
+            comp.products("polar")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,210 @@
+import unittest
+import logging
+import os
+import shutil
+import tempfile
+import types
+
+import numpy as np
+
+import data_gen
+from verify import periodic_response, test_purity
+from verify.util import purity_metrics
+
+
+def toy_test_case(tmp_dir):
+    """
+    Create a stand-in for a purity test case, whose pipeline is a toy
+    periodically time varying linear system that only puts out whole
+    blocks.
+    """
+    rng = np.random.default_rng(0)
+    calls = []
+
+    class ToyTestCase:
+        response_period = 48
+        block_size = 96
+        n_samples = 96 * 4
+        total_sample_shift = 10
+        impulse_support = 40
+        time_domain_args = {"width": 1}
+        checkpoint_path = os.path.join(tmp_dir, "checkpoint.jsonl")
+        checkpoint_params = {"toy": True}
+        param_str = "toy"
+        sweeps = {periodic_response.test_method_name: {
+            "args": list(range(1, 96 * 4 + 1, 7))}}
+        kernel = rng.standard_normal(40)
+        gain = 1.0 + rng.random(48)
+
+        @classmethod
+        def pipeline(cls, offset, width, *, domain_name, n_bins, output_dir):
+            calls.append((n_bins, offset))
+            x = np.zeros(n_bins)
+            x[offset:offset + width] = 1.0
+            dump_file = types.SimpleNamespace(
+                file_path=x, data=x.reshape(-1, 1, 1))
+            return [dump_file, dump_file]
+
+        @classmethod
+        def synthesizer(cls, x, output_dir):
+            n_out = cls.block_size * (x.shape[0] // cls.block_size - 1)
+            idx = np.arange(n_out) + cls.total_sample_shift
+            y = np.convolve(x, cls.kernel)[cls.impulse_support // 2:][idx]
+            y *= cls.gain[idx % cls.response_period]
+            return [types.SimpleNamespace(data=y.reshape(-1, 1, 1))]
+
+        @classmethod
+        def compare(cls, input_dump_file, inverted_dump_file, *,
+                    test_method_name, arg):
+            n = min(input_dump_file.data.shape[0] - cls.total_sample_shift,
+                    inverted_dump_file.data.shape[0])
+            res = purity_metrics(inverted_dump_file.data[:n].flatten())
+            return {
+                "max_spurious_power": res["max_spurious"],
+                "total_spurious_power": res["total_spurious"],
+                "mean_spurious_power": res["mean_spurious"],
+                "arg": arg
+            }
+
+    ToyTestCase.calls = calls
+    return ToyTestCase
+
+
+class TestPeriodicResponse(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self._products_dir = test_purity.products_dir
+        test_purity.products_dir = self.tmp_dir
+        self.test_case = toy_test_case(self.tmp_dir)
+
+    def tearDown(self):
+        test_purity.products_dir = self._products_dir
+        shutil.rmtree(self.tmp_dir)
+
+    def test_layout(self):
+        test_case = self.test_case
+        vector = periodic_response.layout(test_case)
+        period, first, start = (
+            vector["period"], vector["first"], vector["start"])
+        self.assertTrue(period == test_case.response_period)
+        self.assertTrue(first == (test_case.total_sample_shift +
+                                  test_case.impulse_support))
+        self.assertTrue(start % period == 0)
+        self.assertTrue(first <= start < first + period)
+        self.assertTrue(vector["n_bins"] % test_case.block_size == 0)
+        self.assertTrue(vector["n_bins"] >= (
+            test_case.total_sample_shift + start + period +
+            test_case.impulse_support + test_case.block_size))
+
+    def test_predict(self):
+        test_case = self.test_case
+        vector = periodic_response.layout(test_case)
+        period = vector["period"]
+        n_compared = 200
+        # four times as much output compared in the long test vector
+        response = {phase: {
+            "max_spurious_power": float(phase),
+            "total_spurious_power": phase + 1.0,
+            "mean_spurious_power": phase + 2.0,
+            "n_compared": 4*n_compared
+        } for phase in range(period)}
+        shift = test_case.total_sample_shift
+        support = test_case.impulse_support
+        offsets = [1, shift + support - 1, shift + support, 100, 131,
+                   shift + n_compared - support,
+                   shift + n_compared - support + 1, test_case.n_samples]
+        predictions = periodic_response.predict(
+            test_case, response, offsets, n_compared)
+
+        self.assertTrue([p["arg"] for p in predictions] == offsets)
+        self.assertTrue([p["predicted"] for p in predictions] ==
+                        [False, False, True, True, True, True, False, False])
+        for prediction in predictions:
+            phase = prediction["arg"] % period
+            self.assertTrue(prediction["phase"] == phase)
+            if not prediction["predicted"]:
+                self.assertTrue("max_spurious_power" not in prediction)
+                continue
+            self.assertTrue(prediction["max_spurious_power"] == phase)
+            self.assertTrue(prediction["total_spurious_power"] == phase + 1)
+            self.assertTrue(np.isclose(
+                prediction["mean_spurious_power"],
+                phase + 2.0 + 10*np.log10(4)))
+
+        # a phase whose response didn't fit in the long test vector
+        response[100 % period]["n_compared"] = 0
+        predictions = periodic_response.predict(
+            test_case, response, [100], n_compared)
+        self.assertFalse(predictions[0]["predicted"])
+
+    def test_periodic_response(self):
+        test_case = self.test_case
+        offsets = test_case.sweeps[periodic_response.test_method_name]["args"]
+        report = periodic_response.periodic_response(
+            test_case, n_validate=len(offsets), tolerance=1e-6,
+            output_dir=self.tmp_dir, max_workers=1)
+        self.assertTrue(report["valid"])
+        self.assertTrue(report["n_offsets"] == len(offsets))
+        self.assertTrue(report["n_phases"] == len(
+            {offset % report["period"] for offset in offsets}))
+        # whole blocks of output, less than the input lines up with
+        self.assertTrue(report["n_compared"] == 3 * test_case.block_size)
+
+        shift = test_case.total_sample_shift
+        support = test_case.impulse_support
+        predicted = [p["arg"] for p in report["predictions"]
+                     if p["predicted"]]
+        self.assertTrue(predicted == [
+            offset for offset in offsets
+            if shift + support <= offset <=
+            shift + report["n_compared"] - support])
+        self.assertTrue(report["n_predicted"] == len(predicted))
+        # every predicted offset got checked by a direct run
+        self.assertTrue([res["arg"] for res in report["validation"]] ==
+                        predicted)
+        for res in report["validation"]:
+            for name in periodic_response.metrics:
+                self.assertTrue(abs(res[name]) < 1e-6)
+        self.assertTrue(os.path.exists(os.path.join(
+            self.tmp_dir, "report.periodic.toy.json")))
+
+        # runs are checkpointed
+        n_calls = len(test_case.calls)
+        periodic_response.periodic_response(
+            test_case, n_validate=len(offsets), tolerance=1e-6,
+            output_dir=self.tmp_dir, max_workers=1)
+        self.assertTrue(len(test_case.calls) == n_calls)
+
+    def test_default_config(self):
+        test_case = test_purity.TestPurity
+        config = data_gen.config
+        offsets = test_case.sweeps[periodic_response.test_method_name]["args"]
+        # the synthesis puts out a step for each whole block of fine
+        # channel samples
+        n_fine = (test_case.n_samples * config["input_fft_length"] //
+                  test_case.block_size)
+        n_blocks = ((n_fine - 2*config["input_overlap"]) //
+                    (config["input_fft_length"] - 2*config["input_overlap"]))
+        n_compared = min(
+            n_blocks*(test_case.block_size - 2*test_case.output_sample_shift),
+            test_case.n_samples - test_case.total_sample_shift)
+        vector = periodic_response.layout(test_case)
+        n_long = vector["n_bins"] - test_case.block_size
+        response = {phase: {name: 0.0 for name in periodic_response.metrics}
+                    for phase in range(vector["period"])}
+        for phase in response:
+            response[phase]["n_compared"] = n_long
+        predictions = periodic_response.predict(
+            test_case, response, offsets, n_compared)
+        self.assertTrue(sum(p["predicted"] for p in predictions) > 0)
+
+    def test_n_validate(self):
+        with self.assertRaises(ValueError):
+            periodic_response.periodic_response(
+                self.test_case, n_validate=0, output_dir=self.tmp_dir)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import logging
+import os
+import shutil
+import tempfile
+
+import data_gen
+
+from plot_purity_results import load_purity_results
+from verify.util import report_params
+
+
+class TestPlotPurityResults(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store_path = os.path.join(self.tmp_dir, "reports.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_load_purity_results(self):
+        with self.assertRaises(FileNotFoundError):
+            load_purity_results(self.store_path)
+        self.assertFalse(os.path.exists(self.store_path))
+
+        store = data_gen.ReportStore(self.store_path)
+        store.append("dedispersion", {"mean": 1.0})
+        with self.assertRaises(ValueError):
+            load_purity_results(self.store_path)
+
+        store.append("purity", {"arg": 1, "max_spurious_power": -80.0},
+                     params={"test_method": "test_time_domain_impulse",
+                             "deripple": True})
+        res = load_purity_results(self.store_path, where={"deripple": True})
+        self.assertTrue(list(res) == ["test_time_domain_impulse"])
+
+    def test_report_params(self):
+        params = report_params(input_fft_length=2048, kernel_size=16)
+        self.assertTrue(params["input_fft_length"] == 2048)
+        self.assertTrue(params["kernel_size"] == 16)
+        self.assertTrue(params["fft_window"] == data_gen.config["fft_window"])
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
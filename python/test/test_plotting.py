@@ -0,0 +1,48 @@
+import unittest
+import logging
+
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+from data_gen.plotting import minmax_envelope, plot_envelope
+
+
+class TestPlotting(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.y = rng.standard_normal(100003)
+
+    def test_minmax_envelope(self):
+        x, y = minmax_envelope(self.y, 1000, block_size=10000)
+        self.assertEqual(x.shape[0], 2*int(np.ceil(100003 / 101)))
+        self.assertTrue(np.all(np.diff(x) >= 0))
+        self.assertTrue(np.array_equal(self.y[x], y))
+        bucket = 101
+        for k in [0, 500, 990]:
+            chunk = self.y[k*bucket:(k + 1)*bucket]
+            self.assertEqual(y[2*k:2*k + 2].min(), chunk.min())
+            self.assertEqual(y[2*k:2*k + 2].max(), chunk.max())
+
+    def test_short_trace(self):
+        x, y = minmax_envelope(self.y[:100], 1000, transform=np.abs)
+        self.assertTrue(np.array_equal(y, np.abs(self.y[:100])))
+
+    def test_plot_envelope(self):
+        fig, ax = plt.subplots(1, 1)
+        lines = plot_envelope(ax, self.y + 1j, n_pixels=500,
+                              transform=np.imag, cache_key="test")
+        n_points = 2*int(np.ceil(100003 / 201))
+        self.assertEqual(lines[0].get_xdata().shape[0], n_points)
+        self.assertTrue(np.all(lines[0].get_ydata() == 1.0))
+        # reduced trace comes from the cache, not the data
+        lines = plot_envelope(ax, self.y[:10], n_pixels=500, cache_key="test")
+        self.assertEqual(lines[0].get_xdata().shape[0], n_points)
+        plt.close(fig)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
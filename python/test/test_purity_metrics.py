@@ -0,0 +1,114 @@
+import unittest
+import logging
+
+import numpy as np
+
+from verify.util import (
+    purity_metrics,
+    comb_metrics,
+    total_spurious,
+    mean_spurious,
+    max_spurious,
+    spurious,
+    dB
+)
+
+
+def reference_metrics(a):
+    ret = spurious(np.abs(a)**2)
+    return {
+        "total_spurious": dB(np.sum(ret)),
+        "mean_spurious": dB(np.mean(ret)),
+        "max_spurious": dB(np.amax(ret))
+    }
+
+
+class TestPurityMetrics(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.spectra = (rng.standard_normal((8, 1024)) +
+                        1j*rng.standard_normal((8, 1024)))
+        self.spectra[np.arange(8), rng.integers(0, 1024, 8)] = 1000.0
+
+    def test_purity_metrics(self):
+        a = self.spectra[0]
+        res = purity_metrics(a)
+        expected = reference_metrics(a)
+        for key in expected:
+            self.assertTrue(np.allclose(res[key], expected[key]))
+        self.assertTrue(res["peak_bin"] == np.argmax(np.abs(a)))
+        self.assertTrue(np.allclose(res["peak"],
+                                    dB(np.float64(1000.0**2))))
+        self.assertTrue(np.allclose(total_spurious(a),
+                                    expected["total_spurious"]))
+        self.assertTrue(np.allclose(mean_spurious(a),
+                                    expected["mean_spurious"]))
+        self.assertTrue(np.allclose(max_spurious(a),
+                                    expected["max_spurious"]))
+        # doesn't touch its input
+        self.assertTrue(np.all(self.spectra[0] == a))
+
+    def test_purity_metrics_batched(self):
+        res = purity_metrics(self.spectra, axis=-1)
+        for key in ["total_spurious", "mean_spurious", "max_spurious"]:
+            self.assertTrue(res[key].shape == (8, ))
+        for i in range(self.spectra.shape[0]):
+            expected = reference_metrics(self.spectra[i])
+            for key in expected:
+                self.assertTrue(np.allclose(res[key][i], expected[key]))
+
+        res_t = purity_metrics(self.spectra.T, axis=0)
+        self.assertTrue(np.allclose(res_t["max_spurious"],
+                                    res["max_spurious"]))
+
+    def test_purity_metrics_real(self):
+        a = self.spectra[0].real
+        res = purity_metrics(a)
+        expected = reference_metrics(a)
+        for key in expected:
+            self.assertTrue(np.allclose(res[key], expected[key]))
+
+
+class TestCombMetrics(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.spectrum = (rng.standard_normal(1024) +
+                         1j*rng.standard_normal(1024))
+        self.tone_bins = [900, 10, 300, 600]
+        self.spectrum[self.tone_bins] = 1000.0
+
+    def test_comb_metrics(self):
+        res = comb_metrics(self.spectrum, self.tone_bins)
+        self.assertTrue(np.allclose(res["tone"], dB(np.float64(1000.0**2))))
+        # tone at 10 gets the bins from 967 around to 154
+        bins = np.arange(967 - 1024, 155) % 1024
+        expected = reference_metrics(self.spectrum[bins])
+        for key in expected:
+            self.assertTrue(np.allclose(res[key][1], expected[key]))
+        # tone at 600 gets the bins from 450 to 749
+        expected = reference_metrics(self.spectrum[450:750])
+        for key in expected:
+            self.assertTrue(np.allclose(res[key][3], expected[key]))
+
+    def test_comb_metrics_single_tone(self):
+        a = self.spectrum.copy()
+        a[[900, 10, 600]] = 0.0
+        res = comb_metrics(a, [300])
+        expected = purity_metrics(a)
+        for key in ["total_spurious", "mean_spurious", "max_spurious"]:
+            self.assertTrue(np.allclose(res[key][0], expected[key]))
+
+    def test_comb_metrics_reference(self):
+        reference = self.spectrum.copy()
+        reference[650] += 3.0
+        res = comb_metrics(self.spectrum, self.tone_bins,
+                           reference=reference)
+        self.assertTrue(np.allclose(res["total_diff"], [0, 0, 0, 3.0]))
+        self.assertTrue(np.allclose(res["mean_diff"][3], 3.0/300))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,194 @@
+import unittest
+import logging
+import collections
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+import data_gen
+from data_gen import report_store
+from data_gen.dada import write_dada_file
+from verify import purity_sweep, test_purity
+from verify import util as test_util
+
+
+class TestPuritySweep(unittest.TestCase):
+
+    # fir_filter_taps changes the channelized data, and deripple only the
+    # synthesis
+    spec = {
+        "fir_filter_taps": [81, 161],
+        "deripple": [False, True]
+    }
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self._n_test = test_purity.n_test
+        self._products_dir = test_purity.products_dir
+        self._factory = test_purity.purity_test_case_factory
+        self._report_store_path = report_store.report_store_path
+        test_purity.n_test = 3
+        test_purity.products_dir = self.tmp_dir
+        test_purity.purity_test_case_factory = self.stub_factory
+        report_store.report_store_path = os.path.join(
+            self.tmp_dir, "reports.sqlite3")
+        self.calls = collections.defaultdict(list)
+        self._purity_metrics = test_util.purity_metrics
+
+        def purity_metrics(a, axis=None):
+            self.calls["purity_metrics"].append(np.shape(a))
+            return self._purity_metrics(a, axis=axis)
+
+        test_util.purity_metrics = purity_metrics
+
+    @staticmethod
+    def signal(arg, variant):
+        """what the stub comparisons of a variant score"""
+        signal = np.ones(8)
+        signal[int(arg) % 8] = 1.0 + sum(map(int, variant.split("-")))
+        return signal
+
+    def tearDown(self):
+        test_purity.n_test = self._n_test
+        test_purity.products_dir = self._products_dir
+        test_purity.purity_test_case_factory = self._factory
+        test_util.purity_metrics = self._purity_metrics
+        report_store.report_store_path = self._report_store_path
+        shutil.rmtree(self.tmp_dir)
+
+    def stub_factory(self, **kwargs):
+        """
+        Create a test case whose pipeline stages write tiny DADA files that
+        record where their data came from.
+        """
+        test_case = self._factory(**kwargs)
+        taps = kwargs["fir_filter_taps"]
+        variant = f"{taps}-{int(kwargs['deripple'])}"
+
+        def generator(arg, *args, domain_name, output_dir):
+            self.calls["generate"].append((taps, domain_name, arg))
+            file_path = os.path.join(output_dir, f"{domain_name}.{arg}.dump")
+            write_dada_file(file_path, {"ARG": arg, "DOMAIN": domain_name},
+                            data=np.zeros((8, 1, 1), dtype=np.complex64))
+            return data_gen.LazyDADAFile(file_path)
+
+        def channelizer(input_file_path, output_file_name, output_dir):
+            self.calls["channelize"].append((taps, input_file_path))
+            header = data_gen.LazyDADAFile(input_file_path).header
+            file_path = os.path.join(output_dir, output_file_name)
+            write_dada_file(file_path, {**header, "TAPS": taps},
+                            data=np.zeros((8, 1, 1), dtype=np.complex64))
+            return data_gen.LazyDADAFile(file_path)
+
+        def synthesizer(input_file_path, output_file_name, output_dir):
+            file_path = os.path.join(output_dir, output_file_name)
+            self.calls["synthesize"].append((variant, file_path))
+            header = data_gen.LazyDADAFile(input_file_path).header
+            write_dada_file(file_path, {**header, "VARIANT": variant},
+                            data=np.zeros((8, 1, 1), dtype=np.complex64))
+            return [data_gen.LazyDADAFile(file_path)]
+
+        def compare_deferred(input_dump_file, inverted_dump_file,
+                             test_method_name, arg):
+            return {
+                "arg": int(arg),
+                "input_arg": int(input_dump_file["ARG"]),
+                "inverted_arg": int(inverted_dump_file["ARG"]),
+                "taps": int(inverted_dump_file["TAPS"]),
+                "variant": inverted_dump_file["VARIANT"],
+                "test_method": test_method_name
+            }, self.signal(arg, inverted_dump_file["VARIANT"])
+
+        test_case.generator = generator
+        test_case.channelizer = channelizer
+        test_case.synthesizer = synthesizer
+        test_case.compare_deferred = compare_deferred
+        test_case.variant = variant
+        test_case.taps = taps
+        return test_case
+
+    def test_purity_sweep(self):
+        test_cases = purity_sweep.purity_sweep(
+            self.spec, output_dir=self.tmp_dir, max_workers=1)
+        self.assertTrue(len(test_cases) == 4)
+        n_vectors = sum(len(sweep["args"])
+                        for sweep in test_cases[0].sweeps.values())
+
+        # one test vector and channelization per vector and filter, shared
+        # by both deripple variants
+        generated = collections.Counter(self.calls["generate"])
+        self.assertTrue(len(generated) == 2*n_vectors)
+        self.assertTrue(all(count == 1 for count in generated.values()))
+        self.assertTrue(len(self.calls["channelize"]) == 2*n_vectors)
+        for taps, _ in self.calls["channelize"]:
+            self.assertTrue(taps in self.spec["fir_filter_taps"])
+
+        # a synthesis of its own for every variant
+        synthesized = [file_path for _, file_path in self.calls["synthesize"]]
+        self.assertTrue(len(synthesized) == 4*n_vectors)
+        self.assertTrue(len(set(synthesized)) == len(synthesized))
+
+        # purity gets scored once per test vector, for both variants at once
+        self.assertTrue(self.calls["purity_metrics"] ==
+                        [(2, 8)] * 2*n_vectors)
+
+        for test_case in test_cases:
+            for test_method_name, sweep in test_case.sweeps.items():
+                checkpoint = data_gen.Checkpoint(
+                    test_case.checkpoint_path, params={
+                        **test_case.checkpoint_params,
+                        "test_method": test_method_name})
+                results = checkpoint.results(sweep["args"])
+                self.assertTrue(len(results) == len(sweep["args"]))
+                for arg, res in zip(sweep["args"], results):
+                    self.assertTrue(res["arg"] == arg)
+                    self.assertTrue(res["input_arg"] == arg)
+                    self.assertTrue(res["inverted_arg"] == arg)
+                    self.assertTrue(res["taps"] == test_case.taps)
+                    self.assertTrue(res["variant"] == test_case.variant)
+                    self.assertTrue(res["test_method"] == test_method_name)
+                    purity = self._purity_metrics(
+                        self.signal(arg, test_case.variant))
+                    for name in ["max", "total", "mean"]:
+                        self.assertTrue(np.isclose(
+                            res[f"{name}_spurious_power"],
+                            purity[f"{name}_spurious"]))
+
+        # every variant has a checkpoint and report of its own
+        self.assertTrue(len({test_case.checkpoint_path
+                             for test_case in test_cases}) == 4)
+        for test_case in test_cases:
+            self.assertTrue(os.path.exists(os.path.join(
+                self.tmp_dir, f"report.purity.{test_case.param_str}.json")))
+
+        # everything is checkpointed, so running again does nothing
+        self.calls.clear()
+        purity_sweep.purity_sweep(
+            self.spec, output_dir=self.tmp_dir, max_workers=1)
+        self.assertTrue(len(self.calls["generate"]) == 0)
+        self.assertTrue(len(self.calls["synthesize"]) == 0)
+
+    def test_synthesizer_params(self):
+        calls = []
+        _synthesize = data_gen.synthesize
+        data_gen.synthesize = lambda *args, **kwargs: calls.append(kwargs)
+        try:
+            for input_overlap in [128, 256]:
+                test_case = self._factory(**{
+                    **{name: data_gen.config[name]
+                       for name in purity_sweep.factory_params},
+                    "input_fft_length": 2048,
+                    "input_overlap": input_overlap})
+                test_case.synthesizer("channelized.dump", output_dir="./")
+        finally:
+            data_gen.synthesize = _synthesize
+        self.assertTrue([(kwargs["input_fft_length"],
+                          kwargs["input_overlap"]) for kwargs in calls] ==
+                        [(2048, 128), (2048, 256)])
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
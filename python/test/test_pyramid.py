@@ -0,0 +1,62 @@
+import unittest
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from data_gen.dada import write_dada_file
+from data_gen.pyramid import Pyramid, build_pyramid, pyramid_path
+
+
+class TestPyramid(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        self.data = (rng.standard_normal((300000, 2, 2)) +
+                     1j*rng.standard_normal((300000, 2, 2))
+                     ).astype(np.complex64)
+        self.file_path = write_dada_file(
+            os.path.join(self.tmp_dir, "pre_Convolution.dump"), {},
+            data=self.data)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_build_pyramid(self):
+        pyramid = Pyramid(self.file_path)
+        self.assertTrue(os.path.exists(pyramid_path(self.file_path)))
+        self.assertEqual(pyramid.levels, [256, 512, 1024])
+        self.assertEqual(pyramid.components, ["re", "im"])
+        re_max = pyramid.level(512, "re_max")
+        self.assertEqual(re_max.shape, (586, 2, 2))
+        self.assertEqual(re_max[3, 1, 0],
+                         self.data[3*512:4*512, 1, 0].real.max())
+        power = pyramid.level(256, "power_mean")
+        self.assertTrue(np.isclose(
+            power[10, 0, 1], np.mean(np.abs(self.data[2560:2816, 0, 1])**2)))
+
+    def test_envelope(self):
+        pyramid = Pyramid(self.file_path)
+        x, y = pyramid.envelope(0, 300000, 500, chan=1, pol=0)
+        self.assertEqual(y.max(), self.data[:, 1, 0].real.max())
+        self.assertEqual(y.min(), self.data[:, 1, 0].real.min())
+        # zoomed in past the finest level: raw data
+        x, y = pyramid.envelope(1000, 1200, 500, chan=1, pol=1,
+                                component="im")
+        self.assertTrue(np.array_equal(x, np.arange(1000, 1200)))
+        self.assertTrue(np.allclose(y, self.data[1000:1200, 1, 1].imag))
+
+    def test_stale(self):
+        build_pyramid(self.file_path)
+        write_dada_file(self.file_path, {}, data=self.data[:100000])
+        os.utime(self.file_path, ns=(0, 0))
+        pyramid = Pyramid(self.file_path)
+        self.assertEqual(pyramid.ndat, 100000)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from data_gen.report_store import ReportStore
+
+
+class TestReportStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = ReportStore(os.path.join(self.tmp_dir, "reports.db"))
+        self.params = {"input_fft_length": 1024, "deripple": True}
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_append_query(self):
+        rows = [{"offset": i, "mean": np.float32(0.5*i)} for i in range(5)]
+        self.assertEqual(
+            self.store.append("purity", rows, params=self.params), 5)
+        self.store.append("purity", {"freq": 10, "mean": 1.0},
+                          params={"input_fft_length": 2048})
+        res = self.store.query("purity", where={"input_fft_length": 1024})
+        self.assertEqual([row["offset"] for row in res], list(range(5)))
+        self.assertEqual(res[2]["mean"], 1.0)
+        self.assertEqual(res[0]["deripple"], 1)
+        self.assertNotIn("freq", res[0])
+        res = self.store.query(
+            "purity", where={"input_fft_length": [1024, 2048]})
+        self.assertEqual(len(res), 6)
+        self.assertEqual(sorted(self.store.params("purity")),
+                         ["deripple", "input_fft_length"])
+        self.assertEqual(self.store.families(), ["purity"])
+
+    def test_arrays(self):
+        self.store.append("matlab_dspsr", [
+            {"offset": 1, "mean": np.array([1.0, 0.5])},
+            {"offset": 2, "mean": [0.25, 0.125]}
+        ])
+        res = self.store.query("matlab_dspsr")
+        self.assertEqual(res[0]["mean"], [1.0, 0.5])
+        self.assertEqual(res[1]["mean"], [0.25, 0.125])
+        self.assertNotIn("mean_0", res[0])
+
+    def test_complex(self):
+        self.store.append("purity", [
+            {"offset": 1, "diff": 1.0 + 2.0j},
+            {"offset": 2, "diffs": np.array([3.0 - 1.0j, 0.5j],
+                                            dtype=np.complex64)}
+        ])
+        res = self.store.query("purity")
+        self.assertEqual(res[0]["diff"], [1.0, 2.0])
+        self.assertEqual(res[1]["diffs"], [3.0, -1.0, 0.0, 0.5])
+
+    def test_concurrent_new_columns(self):
+        n_procs = 8
+        barrier = multiprocessing.get_context("fork").Barrier(n_procs)
+
+        def append(idx):
+            store = ReportStore(self.store.file_path)
+            for key in range(5):
+                barrier.wait(timeout=30)
+                store.append("purity", {f"key_{key}": idx, "idx": idx})
+
+        procs = [multiprocessing.get_context("fork").Process(
+            target=append, args=(idx, )) for idx in range(n_procs)]
+        for proc in procs:
+            proc.start()
+        for proc in procs:
+            proc.join()
+        self.assertTrue(all(proc.exitcode == 0 for proc in procs))
+        self.assertEqual(len(self.store.query("purity")), 5*n_procs)
+
+    def test_group_columns(self):
+        for method in ["a", "b", "a"]:
+            self.store.append("purity", {"arg": 1.0},
+                              params={"test_method": method})
+        groups = self.store.group("purity", "test_method")
+        self.assertEqual({k: len(v) for k, v in groups.items()},
+                         {"a": 2, "b": 1})
+        columns = self.store.columns("purity", ["arg"],
+                                     where={"test_method": "a"})
+        self.assertTrue(np.array_equal(columns["arg"], [1.0, 1.0]))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+import scipy.signal
+
+from data_gen.spectral import (
+    four_step_fft, welch_spectrum, fast_length, Aligner)
+from data_gen.spectral import _balanced
+
+
+class TestFourStepFFT(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        self.x = rng.standard_normal(3*5*7*11) + \
+            1j*rng.standard_normal(3*5*7*11)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_four_step_fft(self):
+        out = four_step_fft(self.x, block_size=64)
+        self.assertTrue(np.allclose(out, np.fft.fft(self.x)))
+        out = four_step_fft(self.x, inverse=True, block_size=64)
+        self.assertTrue(np.allclose(out, np.fft.ifft(self.x)))
+
+    def test_prime_length(self):
+        out = four_step_fft(self.x[:97])
+        self.assertTrue(np.allclose(out, np.fft.fft(self.x[:97])))
+
+    def test_unbalanced_length(self):
+        # a prime, and twice a prime, go through Bluestein's algorithm
+        for n in [1009, 2*1009]:
+            self.assertFalse(_balanced(n))
+            x = self.x[:n]
+            out = four_step_fft(x, block_size=64, work_dir=self.tmp_dir)
+            self.assertTrue(np.allclose(out, np.fft.fft(x)))
+            out = four_step_fft(x, inverse=True, block_size=64,
+                                work_dir=self.tmp_dir)
+            self.assertTrue(np.allclose(out, np.fft.ifft(x)))
+
+    def test_memmap(self):
+        x_path = os.path.join(self.tmp_dir, "x.npy")
+        out_path = os.path.join(self.tmp_dir, "out.npy")
+        np.save(x_path, self.x.reshape(-1, 3).astype(np.complex64))
+        x = np.load(x_path, mmap_mode="r")
+        out = np.lib.format.open_memmap(
+            out_path, mode="w+", dtype=np.complex64, shape=(x.shape[0], ))
+        four_step_fft(x[:, 1], out=out, block_size=100,
+                      work_dir=self.tmp_dir)
+        del out
+        expected = np.fft.fft(np.load(x_path)[:, 1])
+        self.assertTrue(np.allclose(np.load(out_path),
+                                    expected, atol=1e-3))
+
+
+class TestWelchSpectrum(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.x = rng.standard_normal(10000) + 1j*rng.standard_normal(10000)
+
+    def test_welch_spectrum(self):
+        for overlap, window in [(0, None), (128, "hann"), (200, "hamming")]:
+            expected = scipy.signal.welch(
+                self.x, window="boxcar" if window is None else window,
+                nperseg=256, noverlap=overlap, detrend=False,
+                return_onesided=False, scaling="density")[1]
+            spectrum = welch_spectrum(self.x, 256, overlap=overlap,
+                                      window=window, block_size=1000)
+            self.assertTrue(np.allclose(spectrum, expected))
+
+    def test_bad_overlap(self):
+        with self.assertRaises(ValueError):
+            welch_spectrum(self.x, 256, overlap=256)
+
+
+class TestAligner(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.reference = rng.standard_normal((4, 1009))
+
+    def test_fast_length(self):
+        self.assertEqual(fast_length(1009), 1024)
+        self.assertEqual(fast_length(1000), 1000)
+
+    def test_circular(self):
+        x = np.roll(self.reference[0], 37)
+        aligner = Aligner(self.reference[0], circular=True)
+        self.assertEqual(aligner.lag(x), (37, 37.0))
+        self.assertTrue(np.allclose(aligner.align(x), self.reference[0]))
+        self.assertEqual(aligner.lag(np.roll(x, -50))[0], -13)
+        with self.assertRaises(ValueError):
+            aligner.lag(x[1:])
+
+    def test_linear(self):
+        aligner = Aligner(self.reference[0])
+        x = np.concatenate([np.zeros(5), self.reference[0]])
+        self.assertEqual(aligner.lag(x)[0], 5)
+        self.assertEqual(aligner.lag(self.reference[0, 10:] + 0j)[0], -10)
+        self.assertEqual(len(aligner._spectra), 2)
+
+    def test_stacked(self):
+        x = np.stack([np.roll(self.reference[i], 3*i - 4) for i in range(4)])
+        aligner = Aligner(self.reference, circular=True)
+        lag, sub_lag = aligner.lag(x)
+        self.assertEqual(list(lag), [-4, -1, 2, 5])
+        self.assertTrue(np.allclose(aligner.align(x), self.reference))
+
+    def test_sub_sample(self):
+        t = np.arange(512)
+        reference = np.exp(-0.5*((t - 200) / 10)**2)
+        x = np.exp(-0.5*((t - 203.3) / 10)**2)
+        lag, sub_lag = Aligner(reference).lag(x)
+        self.assertEqual(lag, 3)
+        self.assertAlmostEqual(sub_lag, 3.3, places=2)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import logging
+import os
+import shutil
+import tempfile
+
+import data_gen
+import data_gen.util
+from data_gen import metrics
+from data_gen.dada import write_dada_file
+
+test_dir = data_gen.util.curdir(__file__)
+bin_dir = os.path.join(data_gen.util.updir(test_dir, 1), "bin")
+
+
+class TestStandin(unittest.TestCase):
+    """
+    Run the dspsr_util runners against the stand-in executables
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.path = os.environ["PATH"]
+        os.environ["PATH"] = bin_dir + os.pathsep + cls.path
+        cls.tmp_dir = tempfile.mkdtemp()
+        cls.metrics_file_path = metrics.metrics_file_path
+        metrics.metrics_file_path = os.path.join(
+            cls.tmp_dir, "metrics.jsonl")
+        cls.input_file_path = write_dada_file(
+            os.path.join(cls.tmp_dir, "channelized.dump"),
+            {"TSAMP": 0.025, "OS_FACTOR": "4/3"},
+            shape=(48, 16, 2))
+
+    @classmethod
+    def tearDownClass(cls):
+        os.environ["PATH"] = cls.path
+        metrics.metrics_file_path = cls.metrics_file_path
+        shutil.rmtree(cls.tmp_dir)
+
+    def test_dspsr_with_dump(self):
+        dump_file, ar, log = data_gen.run_dspsr_with_dump(
+            self.input_file_path,
+            output_dir=self.tmp_dir,
+            dump_stage="Detection",
+            extra_args="-IF 1:16:4 -V")
+
+        self.assertTrue(os.path.exists(ar))
+        self.assertTrue(dump_file.ndat == 48 * 16 * 3 // 4)
+        self.assertTrue(dump_file.npol == 4)
+        self.assertTrue(data_gen.find_in_log(
+            log, "output_fft_length") == "192")
+
+    def test_psrdiff_psrtxt(self):
+        ar, log = data_gen.run_dspsr(
+            self.input_file_path,
+            output_dir=self.tmp_dir,
+            output_file_name="psrdiff_input")
+        diff_chain = data_gen.BaseRunner.chain(
+            lambda a: data_gen.run_psrdiff(a, a, output_dir=self.tmp_dir),
+            lambda a: data_gen.run_psrtxt(
+                a, output_dir=self.tmp_dir, pipe=True))
+        data, psrtxt_log = diff_chain(ar)[-1]
+        self.assertTrue(data.shape[0] == 3 + 4)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from data_gen.streaming import OnlineStats, compare_streams, iter_blocks
+
+
+class TestStreaming(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(0)
+        self.a = (rng.standard_normal((1000, 8, 2)) +
+                  1j*rng.standard_normal((1000, 8, 2))).astype(np.complex64)
+        self.b = self.a.copy()
+        self.b[500, 3, 1] += 10.0
+        self.b[700:710] += 1e-3
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_iter_blocks(self):
+        offsets = []
+        n_samples = 0
+        for offset, (block_a, block_b) in iter_blocks(
+                self.a, self.b[:900], block_size=1000):
+            self.assertEqual(block_a.ndim, 1)
+            offsets.append(offset)
+            n_samples += block_a.shape[0]
+        self.assertEqual(n_samples, 900*8*2)
+        self.assertEqual(offsets[1], 62*8*2)
+
+        with self.assertRaises(ValueError):
+            next(iter_blocks(self.a, self.b[:, :4], block_size=1000))
+        with self.assertRaises(ValueError):
+            next(iter_blocks(self.a, self.b.reshape(1000, -1)))
+
+    def test_online_stats_zeros(self):
+        stats = OnlineStats()
+        stats.update(np.zeros(100))
+        for val in stats.products()["quantiles"].values():
+            self.assertTrue(val == 0.0)
+
+        other = OnlineStats()
+        other.update(np.ones(100))
+        stats.merge(other)
+        self.assertTrue(stats.quantile(0.25) == 0.0)
+        self.assertTrue(np.isclose(stats.quantile(0.75), 1.0, rtol=0.03))
+
+    def test_online_stats(self):
+        x = np.abs(self.a).reshape(-1)
+        stats = OnlineStats()
+        for offset, (block,) in iter_blocks(x, block_size=777):
+            stats.update(block, offset)
+        products = stats.products()
+        self.assertEqual(products["count"], x.shape[0])
+        self.assertTrue(np.isclose(products["sum"], np.sum(x)))
+        self.assertTrue(np.isclose(products["mean"], np.mean(x)))
+        self.assertTrue(np.isclose(products["std"], np.std(x)))
+        self.assertEqual(products["argmax"], np.argmax(x))
+        self.assertEqual(products["argmin"], np.argmin(x))
+        for q, val in products["quantiles"].items():
+            self.assertTrue(np.isclose(val, np.quantile(x, q), rtol=0.03))
+
+    def test_merge(self):
+        x = np.abs(self.a).reshape(-1)
+        half = x.shape[0] // 2
+        first, second = OnlineStats(), OnlineStats()
+        first.update(x[:half])
+        second.update(x[half:], half)
+        stats = first.merge(second)
+        self.assertTrue(np.isclose(stats.std, np.std(x)))
+        self.assertEqual(stats.argmax, np.argmax(x))
+
+    def test_compare_streams(self):
+        a_path = os.path.join(self.tmp_dir, "a.npy")
+        b_path = os.path.join(self.tmp_dir, "b.npy")
+        np.save(a_path, self.a)
+        np.save(b_path, self.b)
+        res = compare_streams(
+            np.load(a_path, mmap_mode="r"),
+            np.load(b_path, mmap_mode="r"),
+            block_size=1024, atol=1e-4)
+        self.assertEqual(res["diff"]["argmax"],
+                         np.ravel_multi_index((500, 3, 1), self.a.shape))
+        self.assertTrue(np.isclose(res["diff"]["max"], 10.0, rtol=1e-5))
+        self.assertEqual(res["isclose"]["count"], self.a.size - 1 - 10*8*2)
+        self.assertTrue(np.isclose(
+            res["this"][0]["sum"], np.sum(np.abs(self.a))))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
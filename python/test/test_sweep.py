@@ -0,0 +1,222 @@
+import unittest
+import logging
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+
+from data_gen.sweep import (
+    adaptive_sweep,
+    map_sweep,
+    matrix,
+    sweep_dir,
+    SequentialEstimator
+)
+
+
+class TestSweep(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_map_sweep(self):
+        offset = 10
+
+        def func(arg, output_dir):
+            file_path = os.path.join(output_dir, "out.txt")
+            self.assertFalse(os.path.exists(file_path))
+            with open(file_path, "w") as f:
+                f.write(str(arg))
+            return {"arg": arg, "res": arg + offset, "pid": os.getpid(),
+                    "output_dir": output_dir}
+
+        args = list(range(20))
+        for max_workers in [1, 4]:
+            finished = []
+            res = map_sweep(func, args, max_workers=max_workers,
+                            output_dir=self.tmp_dir,
+                            on_result=lambda idx, r: finished.append(idx))
+            self.assertTrue([r["arg"] for r in res] == args)
+            self.assertTrue([r["res"] for r in res] == [a + 10 for a in args])
+            self.assertTrue(sorted(finished) == args)
+            self.assertTrue(len(set(r["output_dir"] for r in res)) == 20)
+            self.assertTrue(len(os.listdir(self.tmp_dir)) == 0)
+        self.assertTrue(len(set(r["pid"] for r in res)) > 1)
+
+    def test_map_sweep_keep(self):
+
+        def func(arg, output_dir):
+            with open(os.path.join(output_dir, "out.txt"), "w") as f:
+                f.write(str(arg))
+
+        map_sweep(func, range(3), max_workers=2,
+                  output_dir=self.tmp_dir, keep=True)
+        work_dirs = os.listdir(self.tmp_dir)
+        self.assertTrue(len(work_dirs) == 1)
+        for idx in range(3):
+            with open(os.path.join(sweep_dir(
+                    os.path.join(self.tmp_dir, work_dirs[0]), idx),
+                    "out.txt")) as f:
+                self.assertTrue(f.read() == str(idx))
+
+    def test_map_sweep_error(self):
+
+        def func(arg, output_dir):
+            if arg == 3:
+                raise ValueError("bad arg")
+            return arg
+
+        with self.assertRaises(ValueError):
+            map_sweep(func, range(5), max_workers=2)
+
+    def test_map_sweep_reentrant(self):
+
+        def inner(arg, output_dir):
+            return arg * 10
+
+        def outer(arg, output_dir):
+            return sum(map_sweep(inner, range(arg), max_workers=2,
+                                 output_dir=output_dir))
+
+        for max_workers in [1, 2]:
+            res = map_sweep(outer, range(5), max_workers=max_workers)
+            self.assertTrue(res == [10 * sum(range(a)) for a in range(5)])
+
+        results = {}
+
+        def run(offset):
+            results[offset] = map_sweep(
+                lambda arg, output_dir: arg + offset, range(20),
+                max_workers=2)
+
+        threads = [threading.Thread(target=run, args=(offset, ))
+                   for offset in [100, 200]]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for offset in [100, 200]:
+            self.assertTrue(results[offset] ==
+                            [a + offset for a in range(20)])
+
+    def test_map_sweep_shared_output_dir(self):
+        # both sweeps are inside a call at the same time
+        barrier = threading.Barrier(2, timeout=10)
+        listed = {}
+
+        def run(name):
+
+            def func(arg, output_dir):
+                with open(os.path.join(output_dir, f"{name}.txt"), "w"):
+                    pass
+                barrier.wait()
+                listed[name, arg] = os.listdir(output_dir)
+                barrier.wait()
+
+            map_sweep(func, range(3), max_workers=1,
+                      output_dir=self.tmp_dir)
+
+        threads = [threading.Thread(target=run, args=(name, ))
+                   for name in ["a", "b"]]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertTrue(len(listed) == 6)
+        for (name, arg), file_names in listed.items():
+            self.assertTrue(file_names == [f"{name}.txt"])
+        self.assertTrue(len(os.listdir(self.tmp_dir)) == 0)
+
+    def test_matrix(self):
+        res = matrix({"input_fft_length": [1024, 2048],
+                      "fft_window": "tukey",
+                      "deripple": [False, True]})
+        self.assertTrue(len(res) == 4)
+        self.assertTrue(res[1] == {"input_fft_length": 1024,
+                                   "fft_window": "tukey",
+                                   "deripple": True})
+        self.assertTrue(matrix({}) == [{}])
+
+    def test_adaptive_sweep(self):
+        evaluated = []
+
+        def evaluate(args):
+            evaluated.extend(args)
+            # narrow peak on a flat floor, and a step up
+            return [{"max_spurious_power": (
+                -100 + 60*np.exp(-((arg - 7310)/400)**2) +
+                10*(arg > 50000))} for arg in args]
+
+        args, res = adaptive_sweep(
+            evaluate, 1, 100000,
+            metric=lambda r: r["max_spurious_power"],
+            tolerance=3.0, max_points=100)
+        self.assertTrue(len(evaluated) == len(set(evaluated)))
+        self.assertTrue(len(args) <= 100)
+        self.assertTrue(args == sorted(args))
+        worst = args[int(np.argmax([r["max_spurious_power"] for r in res]))]
+        self.assertTrue(abs(worst - 7310) < 20)
+        # flat stretches stay coarse
+        self.assertTrue(len([a for a in args if 60000 < a < 100000]) <= 7)
+
+        args, res = adaptive_sweep(
+            evaluate, 3, 30000,
+            metric=lambda r: r["max_spurious_power"],
+            step=3, max_points=40)
+        self.assertTrue(len(args) == 40)
+        self.assertTrue(all((arg - 3) % 3 == 0 for arg in args))
+        self.assertTrue(min(args) == 3 and max(args) <= 30000)
+
+    def test_map_sweep_stop(self):
+
+        def func(arg, output_dir):
+            return arg
+
+        for max_workers in [1, 2]:
+            finished = []
+            res = map_sweep(func, range(200), max_workers=max_workers,
+                            on_result=lambda idx, r: finished.append(idx),
+                            stop=lambda: len(finished) >= 5)
+            self.assertTrue(5 <= len(res) < 200)
+            self.assertTrue(res == sorted(finished))
+
+    def test_sequential_estimator(self):
+        rng = np.random.default_rng(0)
+        estimator = SequentialEstimator(confidence=0.95, tolerance=0.5)
+        vals = rng.normal(-80.0, 2.0, 1000)
+        for val in vals:
+            estimator.update(val)
+            if estimator.converged():
+                break
+        summary = estimator.summary()
+        self.assertTrue(summary["converged"])
+        # 1/(n + 1) <= 0.05
+        self.assertTrue(summary["count"] >= 19)
+        self.assertTrue(summary["count"] < 1000)
+        self.assertTrue(summary["half_width"] <= 0.5)
+        self.assertTrue(
+            abs(summary["mean"] - np.mean(vals[:summary["count"]])) < 1e-9)
+        self.assertTrue(
+            abs(summary["std"] - np.std(vals[:summary["count"]], ddof=1)) <
+            1e-9)
+        self.assertTrue(abs(summary["mean"] + 80.0) < 1.0)
+
+        estimator = SequentialEstimator(stat="max", patience=5)
+        for val in range(30):
+            estimator.update(val)
+        self.assertFalse(estimator.converged())
+        for val in range(5):
+            estimator.update(0)
+        self.assertTrue(estimator.converged())
+        with self.assertRaises(ValueError):
+            SequentialEstimator(stat="median")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
+    unittest.main()
@@ -0,0 +1,327 @@
+"""
+Predict the purity of the PFB inversion for impulses at any offset, from
+one run per distinct phase.
+
+The channelizer and the synthesis filterbank are linear, and periodically
+time-varying: shifting an impulse by a multiple of the test case's
+`response_period` shifts its response by as much, and changes nothing
+else. So once an impulse's whole response fits in the test vector, its
+purity metrics only depend on its offset modulo the period, its phase.
+
+This runs an impulse at each distinct phase of the offsets asked for, in a
+test vector long enough to hold the whole response, and predicts the
+metrics of the offsets whose whole response also lands in the compared
+output of the test case's own test vector. Offsets too near either end of
+it get truncated responses there, and don't get predicted. Predictions get
+checked against direct runs of a random sample of the offsets, in the test
+case's own test vector.
+
+.. code-block:: bash
+
+    python -m verify.periodic_response -n 10 -w 8
+"""
+import argparse
+import functools
+import json
+import logging
+import os
+
+import numpy as np
+import comparator
+
+import data_gen
+
+from . import test_purity
+
+__all__ = [
+    "layout",
+    "predict",
+    "periodic_response"
+]
+
+module_logger = logging.getLogger(__name__)
+
+test_method_name = "test_time_domain_impulse"
+
+# metrics that have to match their prediction, in dB
+metrics = [
+    "max_spurious_power",
+    "total_spurious_power",
+    "mean_spurious_power"
+]
+
+
+def layout(test_case) -> dict:
+    """
+    Lay out the test vector in which the response of each phase gets
+    measured. `first` is the first offset from which an impulse's whole
+    response lands in the compared output, and `start` the first multiple
+    of the period from there. The vector holds a period of impulses after
+    `start`, and their responses, with a block to spare for the output the
+    synthesis filterbank drops at the end.
+
+    Returns:
+        dict: "period", "first", "start", and "n_bins", the length of the
+            test vector
+    """
+    period = test_case.response_period
+    first = test_case.total_sample_shift + test_case.impulse_support
+    start = period * int(np.ceil(first / period))
+    n_bins = test_case.block_size * (1 + int(np.ceil(
+        (test_case.total_sample_shift + start + period +
+         test_case.impulse_support) / test_case.block_size)))
+    return {
+        "period": period,
+        "first": first,
+        "start": start,
+        "n_bins": n_bins
+    }
+
+
+def _whole(test_case, offset: int, n_compared: int) -> bool:
+    """
+    Whether the whole response of an impulse at `offset` lands in a
+    compared output of `n_compared` samples.
+    """
+    shift, support = test_case.total_sample_shift, test_case.impulse_support
+    return shift + support <= offset <= shift + n_compared - support
+
+
+def _run(test_case, job, output_dir):
+    n_bins, offset = job
+    dump_files = test_case.pipeline(
+        offset, test_case.time_domain_args["width"], domain_name="time",
+        n_bins=n_bins, output_dir=output_dir)
+    inverted_dump = test_case.synthesizer(
+        dump_files[1].file_path, output_dir=output_dir)[0]
+    res = test_case.compare(
+        dump_files[0], inverted_dump,
+        test_method_name=test_method_name, arg=offset)
+    # output samples compared, which the mean metrics are normalized by
+    res["n_compared"] = int(min(
+        dump_files[0].data.shape[0] - test_case.total_sample_shift,
+        inverted_dump.data.shape[0]))
+    return res
+
+
+def predict(test_case,
+            response: dict,
+            offsets: list,
+            n_compared: int) -> list:
+    """
+    Predict the purity metrics of impulses at `offsets` in the test case's
+    own test vector, from the response of each phase.
+
+    Args:
+        test_case: test case from `test_purity.purity_test_case_factory`
+        response (dict): result of a run of each phase, by phase. Phase
+            `phase` is run at offset `layout(test_case)["start"] + phase`.
+        offsets (list): impulse offsets
+        n_compared (int): output samples compared in a run of the test
+            case's own length
+    Returns:
+        list: for each offset, its "arg", "phase", whether it got
+            "predicted", and if so, its predicted metrics
+    """
+    vector = layout(test_case)
+    period, start = vector["period"], vector["start"]
+    predictions = []
+    for offset in offsets:
+        phase = offset % period
+        measured = response[phase]
+        prediction = {"arg": offset, "phase": phase, "predicted": False}
+        if (_whole(test_case, offset, n_compared) and
+                _whole(test_case, start + phase, measured["n_compared"])):
+            prediction["predicted"] = True
+            prediction["max_spurious_power"] = measured["max_spurious_power"]
+            prediction["total_spurious_power"] = (
+                measured["total_spurious_power"])
+            # the same spurious power, spread over the compared output of
+            # the test case's own length
+            prediction["mean_spurious_power"] = (
+                measured["mean_spurious_power"] +
+                10.0*np.log10(measured["n_compared"] / n_compared))
+        predictions.append(prediction)
+    return predictions
+
+
+def periodic_response(test_case=None,
+                      offsets: list = None,
+                      n_validate: int = 10,
+                      tolerance: float = 0.5,
+                      seed: int = 0,
+                      output_dir: str = test_purity.data_dir,
+                      max_workers: int = None) -> dict:
+    """
+    Measure the response of each distinct phase of `offsets`, and predict
+    the purity metrics of every offset whose whole response lands in the
+    compared output of the test case's own test vector from them. Runs get
+    checkpointed, so that this picks up where it left off.
+
+    Usage:
+
+    .. code-block:: python
+
+        report = periodic_response(
+            offsets=range(1, test_purity.TestPurity.n_samples))
+        if not report["valid"]:
+            print(report["max_error"])
+
+    Args:
+        test_case: test case from `test_purity.purity_test_case_factory`.
+            Defaults to `test_purity.TestPurity`.
+        offsets (list): impulse offsets. Defaults to those of the test
+            case's impulse sweep.
+        n_validate (int): number of offsets to check by direct runs in the
+            test case's own test vector. These also tell how much output
+            such runs compare, so there has to be at least one.
+        tolerance (float): largest difference between a predicted and a
+            measured metric, in dB, for the predictions to be valid
+        seed (int): seed for picking the offsets to check
+        output_dir (str): directory in which to run the pipeline
+        max_workers (int): number of worker processes
+    Returns:
+        dict: the layout, the output samples compared in the test case's
+            own test vector, "n_compared", the "predictions" for each
+            offset, the differences from direct runs in "validation", the
+            largest difference of each metric in "max_error", and whether
+            they are all within `tolerance`, "valid"
+    """
+    if n_validate < 1:
+        raise ValueError("Predictions need at least 1 validation run")
+    if test_case is None:
+        test_case = test_purity.TestPurity
+    if offsets is None:
+        offsets = test_case.sweeps[test_method_name]["args"]
+    offsets = [int(offset) for offset in offsets]
+    vector = layout(test_case)
+    period, start = vector["period"], vector["start"]
+
+    phases = sorted({offset % period for offset in offsets})
+    # offsets whose whole response could land in the compared output of the
+    # test case's own test vector, which is at most as long as the vector
+    candidates = [offset for offset in offsets if _whole(
+        test_case, offset,
+        test_case.n_samples - test_case.total_sample_shift)]
+    rng = np.random.default_rng(seed)
+    validate_offsets = sorted(int(offset) for offset in rng.choice(
+        candidates, size=min(n_validate, len(candidates)), replace=False))
+    module_logger.info((f"periodic_response: {len(offsets)} offsets, "
+                        f"{len(phases)} phases of period {period}, "
+                        f"{len(validate_offsets)} validation runs"))
+
+    # runs of each length get checkpointed separately
+    checkpoints = {
+        n_bins: data_gen.Checkpoint(
+            test_case.checkpoint_path, params={
+                **test_case.checkpoint_params,
+                "test_method": test_method_name,
+                "n_bins": n_bins})
+        for n_bins in [vector["n_bins"], test_case.n_samples]}
+    todo = [(n_bins, arg) for n_bins, args in [
+        (vector["n_bins"], [start + phase for phase in phases]),
+        (test_case.n_samples, validate_offsets)]
+        for arg in checkpoints[n_bins].remaining(args)]
+    data_gen.map_sweep(
+        functools.partial(_run, test_case), todo,
+        max_workers=max_workers, output_dir=output_dir,
+        on_result=lambda idx, res: checkpoints[todo[idx][0]].append(
+            todo[idx][1], res))
+
+    response = {phase: checkpoints[vector["n_bins"]].get(start + phase)
+                for phase in phases}
+    measured = {offset: checkpoints[test_case.n_samples].get(offset)
+                for offset in validate_offsets}
+    n_compared = None
+    predictions = []
+    if len(measured) > 0:
+        n_compared = measured[validate_offsets[0]]["n_compared"]
+        predictions = predict(test_case, response, offsets, n_compared)
+    else:
+        module_logger.warning(
+            ("periodic_response: no offset has its whole response in the "
+             "test vector, nothing to predict"))
+
+    validation = []
+    for prediction in predictions:
+        if prediction["arg"] not in measured or not prediction["predicted"]:
+            continue
+        validation.append({
+            "arg": prediction["arg"],
+            "phase": prediction["phase"],
+            **{name: measured[prediction["arg"]][name] - prediction[name]
+               for name in metrics}
+        })
+    max_error = {name: max([abs(res[name]) for res in validation],
+                           default=0.0)
+                 for name in metrics}
+    valid = len(validation) > 0 and all(
+        err <= tolerance for err in max_error.values())
+    if not valid:
+        module_logger.warning(
+            (f"periodic_response: {len(validation)} predictions checked, "
+             f"off by up to {max_error} dB"))
+
+    report = {
+        **vector,
+        "n_compared": n_compared,
+        "n_offsets": len(offsets),
+        "n_phases": len(phases),
+        "n_predicted": sum(p["predicted"] for p in predictions),
+        "predictions": predictions,
+        "validation": validation,
+        "max_error": max_error,
+        "valid": valid
+    }
+    report_path = os.path.join(
+        test_purity.products_dir,
+        f"report.periodic.{test_case.param_str}.json")
+    with open(report_path, "w") as f:
+        json.dump(report, f, cls=comparator.NumpyEncoder)
+    return report
+
+
+def create_parser():
+
+    parser = argparse.ArgumentParser(
+        description=("Predict the purity of impulses at any offset from "
+                     "one run per phase"))
+
+    parser.add_argument("-n", "--n_validate",
+                        dest="n_validate", type=int, required=False,
+                        default=10)
+
+    parser.add_argument("-t", "--tolerance",
+                        dest="tolerance", type=float, required=False,
+                        default=0.5)
+
+    parser.add_argument("-w", "--max_workers",
+                        dest="max_workers", type=int, required=False,
+                        default=None)
+
+    parser.add_argument("-od", "--output_dir",
+                        dest="output_dir", type=str, required=False,
+                        default=test_purity.data_dir)
+
+    parser.add_argument("-v", "--verbose",
+                        dest="verbose", action="store_true")
+
+    return parser
+
+
+if __name__ == "__main__":
+    parsed = create_parser().parse_args()
+    level = logging.INFO
+    if parsed.verbose:
+        level = logging.DEBUG
+    logging.basicConfig(level=level)
+    report = periodic_response(
+        n_validate=parsed.n_validate,
+        tolerance=parsed.tolerance,
+        output_dir=parsed.output_dir,
+        max_workers=parsed.max_workers)
+    module_logger.info((f"{report['n_predicted']} of "
+                        f"{report['n_offsets']} offsets predicted from "
+                        f"{report['n_phases']} phases, "
+                        f"max error {report['max_error']} dB, "
+                        f"valid: {report['valid']}"))
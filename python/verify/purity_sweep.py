@@ -0,0 +1,271 @@
+"""
+Run the purity tests for every combination of parameters in a sweep matrix,
+like the "sweep" entry of test.config.json:
+
+.. code-block:: json
+
+    "sweep": {
+        "input_fft_length": [1024],
+        "input_overlap": [128, 256],
+        "fft_window": ["no_window", "tukey"],
+        "deripple": [false, true]
+    }
+
+Every test vector gets generated and channelized once, and then synthesized
+and compared for each combination of synthesis parameters, instead of
+going through the whole pipeline for each combination. Results end up in
+the same checkpoints, report store and reports as running the test cases
+one after another, so sweeps pick up where they left off.
+
+.. code-block:: bash
+
+    python -m verify.purity_sweep -w 8
+"""
+import argparse
+import functools
+import json
+import logging
+import os
+
+import data_gen
+from data_gen import metrics
+from data_gen.sweep import matrix
+
+from . import test_purity
+
+__all__ = [
+    "compile_sweep",
+    "run_group",
+    "purity_sweep"
+]
+
+module_logger = logging.getLogger(__name__)
+
+factory_params = [
+    "os_factor",
+    "input_fft_length",
+    "input_overlap",
+    "fft_window",
+    "deripple",
+    "channels",
+    "fir_filter_taps",
+    "fir_filter_coeff_file_path",
+    "blocks",
+    "backend",
+    "dump_stage",
+    "dm",
+    "period"
+]
+
+# factory parameters the test vector and channelized data depend on, besides
+# the length of the test vector
+vector_params = [
+    "os_factor",
+    "channels",
+    "fir_filter_taps",
+    "fir_filter_coeff_file_path"
+]
+
+
+def _generate(test_case, sweep, arg, output_dir):
+    return test_case.generator(
+        arg, *sweep["domain_args"],
+        domain_name=sweep["domain_name"], output_dir=output_dir).file_path
+
+
+def _channelize(test_case, output_dir, input_file_path):
+    return test_case.channelizer(
+        input_file_path,
+        output_file_name="channelized." + os.path.basename(input_file_path),
+        output_dir=output_dir).file_path
+
+
+def _synthesize(test_case, output_dir, input_file_path):
+    output_file_name = (f"synthesized.{test_case.param_str}."
+                        f"{os.path.basename(input_file_path)}")
+    return test_case.synthesizer(
+        input_file_path,
+        output_file_name=output_file_name,
+        output_dir=output_dir)[0].file_path
+
+
+def _compare(test_case, job, input_file_path, inverted_file_path):
+    return test_case.compare_deferred(
+        data_gen.LazyDADAFile(input_file_path),
+        data_gen.LazyDADAFile(inverted_file_path),
+        test_method_name=job["test_method"], arg=job["arg"])
+
+
+def compile_sweep(spec: dict = None) -> tuple:
+    """
+    Create a test case for each combination of parameters in `spec`, and
+    group the arguments that haven't been run yet by the test vector and
+    channelization they need.
+
+    Returns:
+        tuple: test cases, and lists of jobs that share a test vector
+    """
+    if spec is None:
+        spec = data_gen.config["sweep"]
+    base = {name: data_gen.config[name] for name in factory_params}
+    test_cases = []
+    groups = {}
+    for idx, variant in enumerate(matrix(spec)):
+        test_case = test_purity.purity_test_case_factory(
+            test_case_name=f"TestPurity{idx}", **{**base, **variant})
+        test_cases.append(test_case)
+        params = {**base, **variant}
+        for test_method_name, sweep in test_case.sweeps.items():
+            checkpoint = data_gen.Checkpoint(
+                test_case.checkpoint_path, params={
+                    **test_case.checkpoint_params,
+                    "test_method": test_method_name})
+            for arg in checkpoint.remaining(sweep["args"]):
+                # everything the test vector and channelized data depend on
+                key = (test_case.n_samples, sweep["domain_name"], arg,
+                       tuple(sweep["domain_args"]),
+                       params["backend"]["test_vectors"],
+                       params["backend"]["channelize"],
+                       *(str(params[name]) for name in vector_params))
+                groups.setdefault(key, []).append({
+                    "test_case": idx,
+                    "test_method": test_method_name,
+                    "arg": arg
+                })
+    groups = list(groups.values())
+    module_logger.debug((f"compile_sweep: {len(test_cases)} test cases, "
+                         f"{len(groups)} test vectors, "
+                         f"{sum(len(g) for g in groups)} syntheses"))
+    return test_cases, groups
+
+
+def run_group(test_cases: list,
+              jobs: list,
+              output_dir: str,
+              max_workers: int = 1) -> list:
+    """
+    Generate and channelize the test vector a group of jobs shares, and
+    then synthesize and compare it for each job. The purity metrics of the
+    whole group get computed at once, from a stack of its signals.
+
+    Returns:
+        list: the sub report of each job
+    """
+    first = test_cases[jobs[0]["test_case"]]
+    sweep = first.sweeps[jobs[0]["test_method"]]
+    graph = data_gen.Graph(max_workers)
+    generate = graph.add("generate", functools.partial(
+        _generate, first, sweep, jobs[0]["arg"], output_dir))
+    channelize = graph.add(
+        "channelize", functools.partial(_channelize, first, output_dir),
+        generate)
+    compare = []
+    for job in jobs:
+        test_case = test_cases[job["test_case"]]
+        synthesize = graph.add(
+            ("synthesize", job["test_case"]),
+            functools.partial(_synthesize, test_case, output_dir),
+            channelize)
+        compare.append(graph.add(
+            ("compare", job["test_case"], job["test_method"]),
+            functools.partial(_compare, test_case, job),
+            generate, synthesize))
+    sub_reports, signals = zip(*graph.run(*compare))
+    return first.score(sub_reports, signals)
+
+
+def purity_sweep(spec: dict = None,
+                 output_dir: str = test_purity.data_dir,
+                 max_workers: int = None,
+                 group_workers: int = 1) -> list:
+    """
+    Run the purity tests for every combination of parameters in `spec`.
+    Groups of jobs that share a test vector run in parallel in
+    `max_workers` processes, and the syntheses in a group in
+    `group_workers` threads.
+
+    Returns:
+        list: test cases, with their `report` filled in
+    """
+    test_cases, groups = compile_sweep(spec)
+    checkpoints = {}
+    for idx, test_case in enumerate(test_cases):
+        for test_method_name in test_case.sweeps:
+            checkpoints[idx, test_method_name] = data_gen.Checkpoint(
+                test_case.checkpoint_path, params={
+                    **test_case.checkpoint_params,
+                    "test_method": test_method_name})
+    new_reports = {key: [] for key in checkpoints}
+
+    def on_result(idx, sub_reports):
+        for job, sub_report in zip(groups[idx], sub_reports):
+            key = (job["test_case"], job["test_method"])
+            checkpoints[key].append(job["arg"], sub_report)
+            new_reports[key].append(sub_report)
+        module_logger.info(
+            f"purity_sweep: finished {idx+1} of {len(groups)} test vectors")
+
+    data_gen.map_sweep(
+        lambda jobs, output_dir: run_group(
+            test_cases, jobs, output_dir, max_workers=group_workers),
+        groups, max_workers=max_workers,
+        output_dir=output_dir, on_result=on_result)
+
+    store = data_gen.ReportStore()
+    for (idx, test_method_name), checkpoint in checkpoints.items():
+        test_case = test_cases[idx]
+        if len(new_reports[idx, test_method_name]) > 0:
+            store.append("purity", new_reports[idx, test_method_name],
+                         params={**test_case.report_params,
+                                 "test_method": test_method_name})
+        test_case.report[test_method_name] = checkpoint.results(
+            test_case.sweeps[test_method_name]["args"])
+    for test_case in test_cases:
+        test_case.tearDownClass()
+    return test_cases
+
+
+def create_parser():
+
+    parser = argparse.ArgumentParser(
+        description="Run the purity tests over a sweep matrix")
+
+    parser.add_argument("-s", "--spec",
+                        dest="spec", type=str, required=False,
+                        default=None,
+                        help=("JSON sweep matrix. Defaults to the \"sweep\" "
+                              "entry of test.config.json"))
+
+    parser.add_argument("-w", "--max_workers",
+                        dest="max_workers", type=int, required=False,
+                        default=None)
+
+    parser.add_argument("-od", "--output_dir",
+                        dest="output_dir", type=str, required=False,
+                        default=test_purity.data_dir)
+
+    parser.add_argument("-m", "--metrics_file",
+                        dest="metrics_file_path", type=str, required=False,
+                        default=None,
+                        help=("Record the resource usage of external "
+                              "processes in this JSONL file"))
+
+    parser.add_argument("-v", "--verbose",
+                        dest="verbose", action="store_true")
+
+    return parser
+
+
+if __name__ == "__main__":
+    parsed = create_parser().parse_args()
+    level = logging.INFO
+    if parsed.verbose:
+        level = logging.DEBUG
+    logging.basicConfig(level=level)
+    if parsed.metrics_file_path is not None:
+        metrics.metrics_file_path = parsed.metrics_file_path
+    spec = None
+    if parsed.spec is not None:
+        spec = json.loads(parsed.spec)
+    purity_sweep(spec, output_dir=parsed.output_dir,
+                 max_workers=parsed.max_workers)
@@ -14,6 +14,7 @@ import psr_formats
 import pfb.rational
 
 import data_gen
+import data_gen.dspsr_util
 import data_gen.util
 from data_gen.config import matplotlib_config
 
@@ -24,16 +25,9 @@ base_dir = data_gen.util.updir(test_dir, 2)
 data_dir = os.path.join(base_dir, "data")
 products_dir = os.path.join(base_dir, "products")
 
-matplotlib_config()
-
+dspsr_cache_dir = os.path.join(data_dir, "dspsr_cache")
 
-def correlate(a, b):
-    # print(f"a.dtype={a.dtype}")
-    # print(f"b.dtype={b.dtype}")
-    f_a = np.fft.fft(a)
-    f_b = np.fft.fft(b)
-    # return f_a*np.conj(f_b)
-    return np.abs(np.fft.ifft(f_a*np.conj(f_b)))
+matplotlib_config()
 
 
 def add_offset(file_path, offset, end=None):
@@ -66,6 +60,10 @@ class TestDedispersion(unittest.TestCase):
 
     @classmethod
     def setUpClass(cls):
+        # identical dspsr runs across reruns only happen once
+        cls._dspsr_cache = data_gen.dspsr_util.DspsrRunner.cache
+        data_gen.dspsr_util.DspsrRunner.cache = data_gen.RunCache(
+            dspsr_cache_dir)
         comp = comparator.SingleDomainComparator(name="time")
         comp.operators["this"] = lambda a: a
         comp.operators["diff"] = lambda a, b: a - b
@@ -111,6 +109,9 @@ class TestDedispersion(unittest.TestCase):
             cls.simulated_pulsar_file_path, sample_shift)
 
         cls.report = {}
+        cls.store = data_gen.ReportStore()
+        cls.report_params = test_util.report_params(
+            kernel_size=cls.kernel_size)
 
     @unittest.skip("")
     def test_simulated_pulsar_folded(self):
@@ -142,32 +143,34 @@ class TestDedispersion(unittest.TestCase):
             output_dir=data_dir
         )
 
-        with data_gen.dispose(f_sim, f_inv, dispose=False) as res:
-            sim_ar = res[0][0]
-            inv_ar = res[1][0]
-            # print(f"simulated archive path: {sim_ar}")
-            # print(f"inverted archive path: {inv_ar}")
-            # print(sim_ar, inv_ar)
-
-            # diff_chain = data_gen.BaseRunner.chain(
-            #     functools.partial(data_gen.run_psrdiff, output_dir=test_dir),
-            #     functools.partial(data_gen.run_psrtxt, output_dir=test_dir),
-            #     data_gen.load_psrtxt_data
-            # )
-            txt_chain = data_gen.BaseRunner.chain(
-                functools.partial(
-                    data_gen.run_psrtxt, output_dir=test_dir),
-                data_gen.load_psrtxt_data
-            )
-            # data_diff = diff_chain(sim_ar, inv_ar)[-1][2:, :]
-            data_sim = txt_chain(sim_ar)[-1][2:, :]
-            data_inv = txt_chain(inv_ar)[-1][2:, :]
+        # both archives get produced at the same time
+        graph = data_gen.Graph()
+        graph.add("sim", f_sim)
+        graph.add("inv", f_inv)
+        txt = functools.partial(
+            data_gen.run_psrtxt, output_dir=test_dir, pipe=True)
+        for name in ["sim", "inv"]:
+            graph.add(f"{name}_data", txt, name)
+        # graph.add("diff", functools.partial(
+        #     data_gen.run_psrdiff, output_dir=test_dir), "sim", "inv")
+
+        with data_gen.dispose(*graph.run("sim", "inv"), dispose=False) as res:
+            # print(f"simulated archive path: {res[0][0]}")
+            # print(f"inverted archive path: {res[1][0]}")
+
+            data_sim, data_inv = graph.run("sim_data", "inv_data")
+            data_sim = data_sim[0][2:, :]
+            data_inv = data_inv[0][2:, :]
             fig, axes = plt.subplots(2, 2, figsize=(10, 10))
             # x = data_diff[0, :]
             x = np.arange(data_sim.shape[1])
 
             report = []
 
+            # align all four Stokes parameters in one go
+            offsets, _ = data_gen.Aligner(
+                data_inv[1:5, :], circular=True).lag(data_sim[1:5, :])
+
             for i in range(2):
                 for j in range(2):
                     axes[i, j].grid(True)
@@ -177,10 +180,7 @@ class TestDedispersion(unittest.TestCase):
                     datum_inv = data_inv[j+2*i + 1, :].copy()
                     datum_inv /= max_val(datum_inv)
 
-
-                    offset = np.argmax(correlate(datum_sim, datum_inv))
-                    # print(f"offset={offset}")
-                    datum_sim = np.roll(datum_sim, -offset)
+                    datum_sim = np.roll(datum_sim, -offsets[j+2*i])
 
                     res_op, res_prod = self.comp(datum_sim, datum_inv)
                     diff = res_op["diff"][1, 0]
@@ -209,6 +209,10 @@ class TestDedispersion(unittest.TestCase):
                 products_dir, "test_simulated_pulsar_folded.png"))
 
             self.report["folded"] = report
+            self.store.append("dedispersion", [
+                {"stokes_param": str(idx), **row}
+                for idx, row in enumerate(report)
+            ], params={**self.report_params, "test_method": "folded"})
 
     # @unittest.skip("")
     def test_simulated_pulsar_no_fold(self):
@@ -238,7 +242,11 @@ class TestDedispersion(unittest.TestCase):
 
         report = []
 
-        with data_gen.dispose(f_sim, f_inv, dispose=False) as res:
+        graph = data_gen.Graph()
+        graph.add("sim", f_sim)
+        graph.add("inv", f_inv)
+
+        with data_gen.dispose(*graph.run("sim", "inv"), dispose=False) as res:
 
             output_fft_length = int(data_gen.find_in_log(
                 res[1][-1], "output_fft_length"))
@@ -306,9 +314,14 @@ class TestDedispersion(unittest.TestCase):
                  f"{stokes_param_name}.{dump_stage}.png")))
 
         self.report["no_fold"] = report
+        self.store.append("dedispersion", [
+            {"stokes_param": "all" if param is None else str(param), **row}
+            for param, row in zip(stokes_params, report)
+        ], params={**self.report_params, "test_method": "no_fold"})
 
     @classmethod
     def tearDownClass(cls):
+        data_gen.dspsr_util.DspsrRunner.cache = cls._dspsr_cache
         with open(
             os.path.join(products_dir, "report.dedispersion.json"), "w"
         ) as f:
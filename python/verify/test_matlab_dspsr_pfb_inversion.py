@@ -16,6 +16,8 @@ import data_gen
 import data_gen.util
 from data_gen.config import matplotlib_config
 
+from . import util as test_util
+
 module_logger = logging.getLogger(__name__)
 
 test_dir = data_gen.util.curdir(__file__)
@@ -110,6 +112,8 @@ class TestMatlabDspsrPfbInversion(unittest.TestCase):
 
         cls.comp = comp
         cls.report = {}
+        cls.store = data_gen.ReportStore()
+        cls.report_params = test_util.report_params()
 
     def compare_dump_files(self, matlab_dump_file, dspsr_dump_file):
         matlab_dat = matlab_dump_file.data.flatten()
@@ -150,8 +154,7 @@ class TestMatlabDspsrPfbInversion(unittest.TestCase):
             sub_report.append({
                 "offset": offset,
                 "mean": mean_diff,
-                "sum": sum_diff,
-                "str": prod_str
+                "sum": sum_diff
             })
 
             module_logger.info((f"test_time_domain_impulse: "
@@ -160,6 +163,8 @@ class TestMatlabDspsrPfbInversion(unittest.TestCase):
 
             self.assertTrue(mean_diff == 1.0)
         self.__class__.report["test_time_domain_impulse"] = sub_report
+        self.store.append("matlab_dspsr", sub_report, params={
+            **self.report_params, "test_method": "test_time_domain_impulse"})
 
     def test_complex_sinusoid(self):
         sub_report = []
@@ -187,8 +192,7 @@ class TestMatlabDspsrPfbInversion(unittest.TestCase):
             sub_report.append({
                 "freq": freq,
                 "mean": mean_diff,
-                "sum": sum_diff,
-                "str": prod_str
+                "sum": sum_diff
             })
             module_logger.info((f"test_complex_sinusoid: "
                                 f"freq={freq}\n"
@@ -196,6 +200,8 @@ class TestMatlabDspsrPfbInversion(unittest.TestCase):
             self.assertTrue(mean_diff == 1.0)
 
         self.__class__.report["test_complex_sinusoid"] = sub_report
+        self.store.append("matlab_dspsr", sub_report, params={
+            **self.report_params, "test_method": "test_complex_sinusoid"})
 
     # @unittest.skip("")
     def test_simulated_pulsar(self):
@@ -231,10 +237,11 @@ class TestMatlabDspsrPfbInversion(unittest.TestCase):
                             f"{prod_str}"))
         sub_report.append({
             "mean": mean_diff,
-            "sum": sum_diff,
-            "str": prod_str
+            "sum": sum_diff
         })
         self.__class__.report["test_simulated_pulsar"] = sub_report
+        self.store.append("matlab_dspsr", sub_report, params={
+            **self.report_params, "test_method": "test_simulated_pulsar"})
 
     @classmethod
     def tearDownClass(cls):
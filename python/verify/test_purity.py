@@ -2,8 +2,8 @@ import unittest
 import logging
 import os
 import functools
+import hashlib
 import json
-import glob
 import typing
 
 import numpy as np
@@ -29,6 +29,36 @@ products_dir = os.path.join(base_dir, "products")
 
 make_plots = False
 n_test = 100
+# worker processes per sweep. Defaults to the number of CPUs
+max_workers = None
+# "grid" runs n_test evenly spaced offsets and frequencies. "adaptive"
+# starts with a coarse grid and refines it where the maximum spurious power
+# changes by more than adaptive_tolerance dB, or peaks, running at most
+# n_test points.
+sweep_mode = "grid"
+adaptive_tolerance = 3.0
+# "sequential" runs up to n_test random offsets and frequencies, and stops
+# once the mean and worst case maximum spurious power have converged, to
+# within sequential_tolerance dB for the mean.
+sequential_confidence = 0.95
+sequential_tolerance = 0.5
+sequential_seed = 0
+# impulses packed into each test vector of test_time_domain_impulse. Each
+# impulse gets a slot of its own in one test vector, a whole number of
+# filterbank periods from the others so that it keeps its offset's phase,
+# and far enough from them that their responses don't overlap. It gets
+# scored over the output its response spans, instead of all of it, with
+# the mean metrics spread over the output a run of its own would have
+# compared. Offsets whose whole response wouldn't land in the output of a
+# run of their own get one. Needs the python test vector backend.
+impulses_per_run = 1
+# with comb_runs above 0, test_complex_sinusoid drives the pipeline with
+# comb_runs frequency combs, each with every comb_runs-th frequency, instead
+# of one run per frequency. Each tone gets scored over the bins of one
+# spectrum of the output nearest to it. Frequencies are whole multiples of
+# blocks, so with a bin_offset of 0 the tones are FFT-orthogonal. Needs the
+# python test vector backend.
+comb_runs = 0
 if n_test == 1:
     make_plots = True
 
@@ -114,6 +144,28 @@ def purity_test_case_factory(
             cls.n_samples = n_samples
             cls.output_sample_shift = output_sample_shift
             cls.total_sample_shift = total_sample_shift
+            # the filterbanks repeat every synthesis step, a whole number of
+            # channelizer steps, so shifting an impulse by a multiple of
+            # this just shifts its response
+            decimation = block_size // input_fft_length
+            synthesis_step = block_size - 2*output_sample_shift
+            cls.response_period = int(np.lcm(decimation, synthesis_step))
+            # samples over which an impulse's response spreads: the
+            # channelizer filter at the input rate, and the overlap of a
+            # synthesis block, which gets dropped either side of it
+            cls.impulse_support = fir_filter_taps + 2*output_sample_shift
+            # slots of packed test vectors are whole multiples of the period,
+            # so that impulses keep their phase, and far enough apart that
+            # the output an impulse's response spans holds nothing else
+            cls.packing_slot = cls.response_period * (int(np.ceil(
+                2*cls.impulse_support / cls.response_period)) + 1)
+            # the first slot, past the output that doesn't get compared
+            cls.packed_start = cls.response_period * int(np.ceil(
+                (total_sample_shift + cls.impulse_support) /
+                cls.response_period))
+            # packed test vectors are longer than the test case's own by a
+            # multiple of this, which makes their output longer by as much
+            cls.packing_step = int(np.lcm(block_size, cls.response_period))
             cls.generator = data_gen.generate_test_vector(
                 backend=backend["test_vectors"],
                 n_bins=cls.n_samples
@@ -140,10 +192,12 @@ def purity_test_case_factory(
             )
             synthesizer = functools.partial(
                 data_gen.synthesize,
+                input_fft_length=input_fft_length,
+                input_overlap=input_overlap,
                 deripple=deripple,
                 backend=backend["synthesize"],
                 fft_window_str=fft_window)
-            cls.synthesizer = lambda a: [synthesizer(a)]
+            cls.synthesizer = lambda a, **kwargs: [synthesizer(a, **kwargs)]
             comp = comparator.MultiDomainComparator(domains={
                 "time": comparator.SingleDomainComparator("time"),
                 "freq": comparator.FrequencyDomainComparator("freq")
@@ -157,17 +211,178 @@ def purity_test_case_factory(
             comp.products["sum"] = lambda a: np.sum(np.abs(a))
             comp.products["max"] = lambda a: np.amax(np.abs(a))
 
-            comp.products["total_spurious"] = test_util.total_spurious
-            comp.products["mean_spurious"] = test_util.mean_spurious
-            comp.products["max_spurious"] = test_util.max_spurious
-
             cls.comp = comp
             cls.report = {}
+            cls.report_params = test_util.report_params(
+                os_factor=str(os_factor),
+                input_fft_length=input_fft_length,
+                input_overlap=input_overlap,
+                fft_window=fft_window,
+                deripple=deripple,
+                channels=channels,
+                blocks=blocks)
+            # everything that goes into a result, for resuming sweeps
+            cls.checkpoint_params = {
+                **cls.report_params,
+                "fir_filter_taps": fir_filter_taps,
+                "fir_filter_coeff_file_path": fir_filter_coeff_file_path,
+                "backend": backend,
+                "dump_stage": dump_stage,
+                "dm": dm,
+                "period": period,
+                "n_test": n_test,
+                "time_domain_args": {
+                    "width": cls.time_domain_args["width"]},
+                "freq_domain_args": {
+                    "phase": cls.freq_domain_args["phase"],
+                    "bin_offset": cls.freq_domain_args["bin_offset"]}
+            }
+            # the rest of the checkpoint parameters go into a hash, so that
+            # variants of a sweep get files of their own
+            params_hash = hashlib.sha256(json.dumps(
+                cls.checkpoint_params, sort_keys=True, default=str
+            ).encode()).hexdigest()[:8]
+            cls.param_str = ".".join([
+                f"fft_length-{input_fft_length}",
+                f"deripple-{1 if deripple else 0}",
+                f"fft_window-{fft_window}",
+                f"input_overlap-{input_overlap}",
+                params_hash
+            ])
+            cls.checkpoint_path = os.path.join(
+                products_dir, f"checkpoint.purity.{cls.param_str}.jsonl")
 
             cls.register_test_methods()
 
+        @classmethod
+        def setUpClass(cls):
+            cls.store = data_gen.ReportStore()
+
+        @classmethod
+        def compare(cls,
+                    input_dump_file,
+                    inverted_dump_file,
+                    *,
+                    test_method_name: str,
+                    arg,
+                    window: tuple = None) -> dict:
+            """
+            Compare a test vector with its inversion, and report the
+            results of one argument of a test method's sweep. With
+            `window`, only compare that range of output samples.
+            """
+            sub_report, signal = cls.compare_deferred(
+                input_dump_file, inverted_dump_file,
+                test_method_name=test_method_name, arg=arg, window=window)
+            return cls.score([sub_report], [signal])[0]
+
+        @classmethod
+        def compare_deferred(cls,
+                             input_dump_file,
+                             inverted_dump_file,
+                             *,
+                             test_method_name: str,
+                             arg,
+                             window: tuple = None) -> tuple:
+            """
+            Like `compare`, but leave the purity metrics out of the sub
+            report, and return the signal they get computed from instead,
+            so that the signals of many comparisons can be scored together
+            with `score`.
+
+            Returns:
+                tuple: sub report, and signal to score
+            """
+            input_dat, inverted_dat = cls.chop(
+                input_dump_file, inverted_dump_file, window=window)
+            res_op_time, res_prod_time = cls.comp.time(
+                input_dat, inverted_dat
+            )
+
+            if make_plots:
+                res_op_freq, res_prod_freq = cls.comp.freq(
+                    input_dat/cls.fft_size, inverted_dat/cls.fft_size
+                )
+                fig, axes = test_util.plot_freq_domain_comparison(
+                    res_op_time, res_op_freq,
+                    subplots_kwargs=dict(figsize=(10, 14)),
+                    labels=["Input data", "InverseFilterbank"])
+                fig.suptitle(f"{test_method_name} {arg}")
+                fig.tight_layout(rect=[0, 0.03, 1, 0.95])
+                fig.savefig(os.path.join(
+                    products_dir, f"{test_method_name}.{arg}.png"))
+
+            report_func = cls.sweeps[test_method_name]["report_func"]
+            sub_report, signal = report_func(res_prod_time, inverted_dat)
+            sub_report["arg"] = arg
+            return sub_report, signal
+
+        @staticmethod
+        def score(sub_reports: list, signals: list) -> list:
+            """
+            Add the purity metrics of each of `signals` to the sub report
+            `compare_deferred` returned with it. Signals of the same length
+            get stacked and scored in one `test_util.purity_metrics` call.
+
+            Returns:
+                list: sub reports
+            """
+            by_length = {}
+            for idx, signal in enumerate(signals):
+                by_length.setdefault(signal.shape[-1], []).append(idx)
+            sub_reports = list(sub_reports)
+            for idxs in by_length.values():
+                res = test_util.purity_metrics(
+                    np.stack([signals[idx] for idx in idxs]), axis=-1)
+                for i, idx in enumerate(idxs):
+                    sub_reports[idx] = {
+                        **sub_reports[idx],
+                        "max_spurious_power": res["max_spurious"][i],
+                        "total_spurious_power": res["total_spurious"][i],
+                        "mean_spurious_power": res["mean_spurious"][i]
+                    }
+            return sub_reports
+
+        @classmethod
+        def compare_comb(cls,
+                         input_dump_file,
+                         inverted_dump_file,
+                         *,
+                         args: list) -> list:
+            """
+            Compare a frequency comb test vector with its inversion, and
+            report the results of each of its tones, at frequencies `args`,
+            from one spectrum of the first polarization.
+            """
+            shift = cls.total_sample_shift
+            n_avail = min(input_dump_file.data.shape[0] - shift,
+                          inverted_dump_file.data.shape[0])
+            # a whole number of blocks keeps the tones FFT-orthogonal
+            n_fft = cls.block_size * (n_avail // cls.block_size)
+            input_spec = np.fft.fft(
+                input_dump_file.data[shift:shift + n_fft, 0, 0]) / n_fft
+            inverted_spec = np.fft.fft(
+                inverted_dump_file.data[:n_fft, 0, 0]) / n_fft
+            tone_bins = np.round(
+                (np.asarray(args) + cls.freq_domain_args["bin_offset"]) *
+                n_fft / cls.n_samples).astype(int)
+            res = test_util.comb_metrics(
+                inverted_spec, tone_bins, reference=input_spec)
+            return [{
+                "mean_diff": float(res["mean_diff"][i]),
+                "total_diff": float(res["total_diff"][i]),
+                "max_spurious_power": float(res["max_spurious"][i]),
+                "total_spurious_power": float(res["total_spurious"][i]),
+                "mean_spurious_power": float(res["mean_spurious"][i]),
+                "tone_power": float(res["tone"][i]),
+                "arg": arg
+            } for i, arg in enumerate(args)]
+
         @classmethod
         def register_test_methods(cls):
+            # what each test method sweeps over, for running sweeps outside
+            # of the test methods, like in purity_sweep
+            cls.sweeps = {}
 
             def test_method_factory(
                 *,
@@ -175,45 +390,181 @@ def purity_test_case_factory(
                 test_vector_args: typing.Union[tuple, list],
                 test_method_name: str,
                 report_func: callable,
+                domain_name: str,
+                domain_args: tuple,
+                bounds: dict
             ):
+                cls.sweeps[test_method_name] = {
+                    "domain_name": domain_name,
+                    "domain_args": domain_args,
+                    "args": test_vector_args,
+                    "bounds": bounds,
+                    "report_func": report_func
+                }
 
                 def _test_method(self):
 
-                    method_report = []
-                    for arg in tqdm(test_vector_args, desc=test_method_name):
-                        dump_files = test_vector_func(arg)
+                    packed = impulses_per_run > 1 and domain_name == "time"
+                    comb = comb_runs > 0 and domain_name == "freq"
+                    method_params = {"test_method": test_method_name}
+                    if comb:
+                        # tones of a comb don't score quite like lone ones
+                        method_params["comb_runs"] = comb_runs
+                    if packed:
+                        method_params["impulses_per_run"] = impulses_per_run
+
+                    def run_packed(job, output_dir):
+                        shift = self.total_sample_shift
+                        support = self.impulse_support
+                        positions = [
+                            self.packed_start + k*self.packing_slot +
+                            arg % self.response_period
+                            for k, arg in enumerate(job)]
+                        n_extra = self.packing_step * int(np.ceil(max(
+                            0, positions[-1] + support + shift +
+                            self.block_size - self.n_samples) /
+                            self.packing_step))
+                        dump_files = self.pipeline(
+                            positions,
+                            [domain_args[0] for _ in positions],
+                            domain_name=domain_name,
+                            n_bins=self.n_samples + n_extra,
+                            output_dir=output_dir)
                         inverted_dump = self.__class__.synthesizer(
-                            dump_files[1].file_path)
+                            dump_files[1].file_path, output_dir=output_dir)
                         inverted_dump = inverted_dump[0]
-
-                        input_dat, inverted_dat = self.chop(
-                            dump_files[0], inverted_dump)
-                        res_op_time, res_prod_time = self.comp.time(
-                            input_dat, inverted_dat
-                        )
-
-                        res_op_freq, res_prod_freq = self.comp.freq(
-                            input_dat/self.fft_size, inverted_dat/self.fft_size
-                        )
-
-                        if make_plots:
-                            fig, axes = test_util.plot_freq_domain_comparison(
-                                res_op_time, res_op_freq,
-                                subplots_kwargs=dict(figsize=(10, 14)),
-                                labels=["Input data", "InverseFilterbank"])
-                            fig.suptitle(f"{test_method_name} {arg}")
-                            fig.tight_layout(rect=[0, 0.03, 1, 0.95])
-                            fig.savefig(os.path.join(
-                                products_dir, f"{test_method_name}.{arg}.png"))
-
-                        sub_report = report_func(res_prod_time, res_prod_freq)
-                        sub_report["arg"] = arg
-                        method_report.append(sub_report)
-
-                        self.files.extend(dump_files)
-                        self.files.append(inverted_dump)
-                        self.dispose()
-                        self.__class__.report[test_method_name] = method_report
+                        n_out = inverted_dump.data.shape[0]
+                        # the output a run of its own would have compared
+                        n_compared = min(self.n_samples - shift,
+                                         n_out - n_extra)
+                        n_packed = min(self.n_samples + n_extra - shift,
+                                       n_out)
+                        windowed = [
+                            k for k, arg in enumerate(job)
+                            if shift + support <= arg <=
+                            shift + n_compared - support and
+                            positions[k] - shift + support <= n_packed]
+                        sub_reports = [None] * len(job)
+                        if len(windowed) > 0:
+                            scored = self.score(*zip(*[
+                                self.compare_deferred(
+                                    dump_files[0], inverted_dump,
+                                    test_method_name=test_method_name,
+                                    arg=job[k],
+                                    window=(positions[k] - shift - support,
+                                            positions[k] - shift + support))
+                                for k in windowed]))
+                            rescale = 10.0*np.log10(2*support / n_compared)
+                            for k, sub_report in zip(windowed, scored):
+                                sub_report["mean_diff"] = (
+                                    sub_report["total_diff"] / n_compared)
+                                sub_report["mean_spurious_power"] += rescale
+                                sub_reports[k] = sub_report
+                        for k, arg in enumerate(job):
+                            if sub_reports[k] is None:
+                                sub_reports[k] = run_job(
+                                    [arg], output_dir, packed=False)[0]
+                        return sub_reports
+
+                    def run_job(job, output_dir, packed=packed):
+                        if packed:
+                            return run_packed(job, output_dir)
+                        if comb:
+                            dump_files = self.pipeline(
+                                list(job),
+                                list(data_gen.newman_phases(len(job))),
+                                domain_args[1],
+                                domain_name=domain_name,
+                                output_file_name=(f"frequency_comb."
+                                                  f"{len(job)}.{job[0]}.dump"),
+                                output_dir=output_dir)
+                        else:
+                            dump_files = test_vector_func(
+                                job[0], output_dir=output_dir)
+                        inverted_dump = self.__class__.synthesizer(
+                            dump_files[1].file_path, output_dir=output_dir)
+                        inverted_dump = inverted_dump[0]
+                        if comb:
+                            return self.compare_comb(
+                                dump_files[0], inverted_dump, args=job)
+                        return [self.compare(
+                            dump_files[0], inverted_dump,
+                            test_method_name=test_method_name,
+                            arg=job[0])]
+
+                    checkpoint = data_gen.Checkpoint(
+                        self.checkpoint_path, params={
+                            **self.checkpoint_params, **method_params})
+
+                    def run_args(sweep_args, estimator=None):
+                        args = checkpoint.remaining(sweep_args)
+                        stop = None
+                        if estimator is not None:
+                            for arg in sweep_args:
+                                if arg in checkpoint:
+                                    estimator.update(checkpoint.get(arg)[
+                                        "max_spurious_power"])
+                            if estimator.converged():
+                                args = []
+                            stop = estimator.converged
+
+                        if comb:
+                            # interleaved, so each comb spans the band
+                            n_jobs = min(comb_runs, len(args))
+                            jobs = [args[i::n_jobs] for i in range(n_jobs)]
+                        else:
+                            per_job = impulses_per_run if packed else 1
+                            jobs = [args[i:i+per_job]
+                                    for i in range(0, len(args), per_job)]
+
+                        def on_result(idx, sub_reports):
+                            for arg, sub_report in zip(jobs[idx],
+                                                       sub_reports):
+                                checkpoint.append(arg, sub_report)
+                                if estimator is not None:
+                                    estimator.update(
+                                        sub_report["max_spurious_power"])
+                            self.store.append(
+                                "purity", sub_reports, params={
+                                    **self.report_params, **method_params})
+                            progress.update(len(sub_reports))
+
+                        with tqdm(total=len(sweep_args),
+                                  initial=len(sweep_args) - len(args),
+                                  desc=test_method_name) as progress:
+                            data_gen.map_sweep(
+                                run_job, jobs,
+                                max_workers=max_workers,
+                                output_dir=self.output_dir,
+                                on_result=on_result,
+                                stop=stop)
+
+                        return [checkpoint.get(arg) for arg in sweep_args
+                                if arg in checkpoint]
+
+                    if sweep_mode == "adaptive":
+                        _, method_report = data_gen.adaptive_sweep(
+                            run_args, **bounds,
+                            metric=lambda r: r["max_spurious_power"],
+                            tolerance=adaptive_tolerance,
+                            max_points=n_test)
+                    elif sweep_mode == "sequential":
+                        rng = np.random.default_rng(sequential_seed)
+                        n_grid = (bounds["hi"] - bounds["lo"]) // \
+                            bounds["step"] + 1
+                        sweep_args = (bounds["lo"] + bounds["step"] *
+                                      rng.choice(n_grid,
+                                                 size=min(n_test, n_grid),
+                                                 replace=False))
+                        estimator = data_gen.SequentialEstimator(
+                            confidence=sequential_confidence,
+                            tolerance=sequential_tolerance)
+                        method_report = run_args(sweep_args, estimator)
+                        module_logger.info(
+                            f"{test_method_name}: {estimator.summary()}")
+                    else:
+                        method_report = run_args(test_vector_args)
+                    self.__class__.report[test_method_name] = method_report
 
                 _test_method.__name__ = test_method_name
                 return _test_method
@@ -224,23 +575,22 @@ def purity_test_case_factory(
                 *time_domain_args)
             time_domain_test_method_name = "test_time_domain_impulse"
 
-            def time_domain_report_func(res_prod_time, res_prod_freq):
+            def time_domain_report_func(res_prod_time, inverted_dat):
                 prod_diff = res_prod_time["diff"][1, 0]
-                prod_this = res_prod_time["this"][1]
 
                 return {
                     "mean_diff": prod_diff["mean"],
-                    "total_diff": prod_diff["sum"],
-                    "max_spurious_power": prod_this["max_spurious"],
-                    "total_spurious_power": prod_this["total_spurious"],
-                    "mean_spurious_power": prod_this["mean_spurious"]
-                }
+                    "total_diff": prod_diff["sum"]
+                }, inverted_dat
 
             setattr(cls, time_domain_test_method_name, test_method_factory(
                 test_vector_func=time_domain_test_vector_func,
                 test_vector_args=cls.time_domain_args["offset"],
                 test_method_name=time_domain_test_method_name,
-                report_func=time_domain_report_func
+                report_func=time_domain_report_func,
+                domain_name="time",
+                domain_args=time_domain_args,
+                bounds={"lo": 1, "hi": cls.n_samples, "step": 1}
             ))
 
             freq_domain_args = (cls.freq_domain_args["phase"],
@@ -250,57 +600,44 @@ def purity_test_case_factory(
                 *freq_domain_args)
             freq_domain_test_method_name = "test_complex_sinusoid"
 
-            def freq_domain_report_func(res_prod_time, res_prod_freq):
+            def freq_domain_report_func(res_prod_time, inverted_dat):
                 prod_diff = res_prod_time["diff"][1, 0]
-                prod_this = res_prod_freq["this"][1]
 
+                # the spectrum comp.freq looks at
                 return {
                     "mean_diff": prod_diff["mean"],
-                    "total_diff": prod_diff["sum"],
-                    "max_spurious_power": prod_this["max_spurious"],
-                    "total_spurious_power": prod_this["total_spurious"],
-                    "mean_spurious_power": prod_this["mean_spurious"]
-                }
+                    "total_diff": prod_diff["sum"]
+                }, np.fft.fft(inverted_dat[:cls.fft_size]/cls.fft_size)
 
             setattr(cls, freq_domain_test_method_name, test_method_factory(
                 test_vector_func=freq_domain_test_vector_func,
                 test_vector_args=cls.freq_domain_args["frequency"],
                 test_method_name=freq_domain_test_method_name,
-                report_func=freq_domain_report_func
+                report_func=freq_domain_report_func,
+                domain_name="freq",
+                domain_args=freq_domain_args,
+                bounds={"lo": blocks, "hi": cls.block_size * blocks,
+                        "step": blocks}
             ))
 
-        def setUp(self):
-            self.files = []
-
-        def dispose(self):
-            for file_path in self.files:
-                if hasattr(file_path, "file_path"):
-                    file_path = file_path.file_path
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-            for file_path in glob.glob(
-                os.path.join(data_dir, "channelized.*")
-            ):
-                os.remove(file_path)
-
-        def chop(self, input_dump_file, inverted_dump_file):
-            input_dat = (input_dump_file.data[self.total_sample_shift:, 0, :]
-                         .flatten())
-            inverted_dat = inverted_dump_file.data.flatten()
+        @classmethod
+        def chop(cls, input_dump_file, inverted_dump_file, window=None):
+            start, stop = 0, None
+            if window is not None:
+                start, stop = window
+            shift = cls.total_sample_shift
+            input_dat = (input_dump_file.data[
+                shift + start:None if stop is None else shift + stop, 0, :]
+                .flatten())
+            inverted_dat = inverted_dump_file.data[start:stop].flatten()
             # inverted_dat /= self.normalize
 
             return input_dat, inverted_dat
 
         @classmethod
         def tearDownClass(cls):
-            param_str = ".".join([
-                f"fft_length-{input_fft_length}",
-                f"deripple-{1 if deripple else 0}",
-                f"fft_window-{fft_window}",
-                f"input_overlap-{input_overlap}"
-            ])
             param_path = os.path.join(
-                products_dir, f"report.purity.{param_str}.json")
+                products_dir, f"report.purity.{cls.param_str}.json")
             with open(param_path, "w") as f:
                 json.dump(cls.report, f, cls=comparator.NumpyEncoder)
 
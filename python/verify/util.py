@@ -1,39 +1,171 @@
 import numpy as np
 import matplotlib.pyplot as plt
 
+import data_gen
+from data_gen.plotting import plot_envelope
+
 __all__ = [
     "spurious",
     "total_spurious",
     "mean_spurious",
     "max_spurious",
+    "purity_metrics",
+    "comb_metrics",
     "dB",
+    "report_params",
     "plot_time_domain_comparison",
     "plot_freq_domain_comparison"
 ]
 
 
+# PFB inversion parameters that identify a run in reports
+report_param_names = [
+    "os_factor",
+    "input_fft_length",
+    "input_overlap",
+    "fft_window",
+    "deripple"
+]
+
+
+def report_params(**params) -> dict:
+    """
+    Parameters to file a verification run's results under in reports and
+    the report store. PFB inversion parameters that aren't given come from
+    `data_gen.config`, and anything else given gets added.
+
+    Usage:
+
+    .. code-block:: python
+
+        store.append("dedispersion", rows,
+                     params=report_params(kernel_size=16384))
+    """
+    res = {name: params[name] if name in params else data_gen.config[name]
+           for name in report_param_names}
+    res.update(params)
+    return res
+
+
 def spurious(a):
     b = a.copy()
     b[np.argmax(b)] = 0.0
     return b
 
 
+def purity_metrics(a, axis=None):
+    """
+    Compute every purity metric of a spectrum at once, taking its power
+    only once. The power of the highest bin is the signal; everything else
+    is spurious.
+
+    With `axis=-1`, a stack of spectra, like one per point of a sweep with
+    shape `(n_tests, n_bins)`, get scored all together. By default the
+    whole array is treated as one spectrum.
+
+    Args:
+        a (np.ndarray): spectrum, or spectra
+        axis (int): axis along which bins lie, or None
+    Returns:
+        dict: "total_spurious", "mean_spurious" and "max_spurious" power, in
+            dB, and "peak" power, in dB, and bin of the highest bin
+    """
+    if axis is None:
+        a = np.ravel(a)
+        axis = -1
+    a = np.moveaxis(np.asarray(a), axis, -1)
+    if np.iscomplexobj(a):
+        power = a.real**2 + a.imag**2
+    else:
+        power = a**2
+    peak_bin = np.argmax(power, axis=-1)[..., np.newaxis]
+    peak = np.take_along_axis(power, peak_bin, axis=-1)[..., 0]
+    total = np.sum(power, axis=-1) - peak
+    # power is a temporary, so knock the peak out in place
+    np.put_along_axis(power, peak_bin, 0.0, axis=-1)
+    return {
+        "total_spurious": dB(total),
+        "mean_spurious": dB(total / power.shape[-1]),
+        "max_spurious": dB(np.amax(power, axis=-1)),
+        "peak": dB(peak),
+        "peak_bin": peak_bin[..., 0]
+    }
+
+
+def comb_metrics(a, tone_bins, reference=None):
+    """
+    Compute the purity metrics of each tone of a frequency comb from one
+    spectrum. Each bin belongs to the tone nearest to it, wrapping around
+    the ends of the spectrum. A tone's own bin is its signal, and the rest
+    of its bins are its spurious power. Leakage that lands nearer another
+    tone counts against that tone.
+
+    Usage:
+
+    .. code-block:: python
+
+        bins = np.arange(16, 1024, 64)
+        res = comb_metrics(np.fft.fft(output)/1024, bins,
+                           reference=np.fft.fft(input)/1024)
+        worst = bins[np.argmax(res["max_spurious"])]
+
+    Args:
+        a (np.ndarray): spectrum, with tones at FFT-orthogonal bins
+        tone_bins (list): bin of each tone
+        reference (np.ndarray): spectrum of the input, for the difference
+            between the two over each tone's bins
+    Returns:
+        dict: "total_spurious", "mean_spurious" and "max_spurious" power,
+            and "tone" power, in dB, one value per tone, in the order of
+            `tone_bins`. With `reference`, "mean_diff" and "total_diff",
+            the mean and sum of the absolute difference of the spectra.
+    """
+    a = np.ravel(a)
+    n = a.shape[0]
+    tone_bins = np.asarray(tone_bins, dtype=int) % n
+    order = np.argsort(tone_bins)
+    tones = tone_bins[order]
+    # each tone's bins run from the midpoint with the tone below it
+    below = np.roll(tones, 1)
+    below[0] -= n
+    starts = (below + tones + 1) // 2
+    # line the first tone's bins up with the start of the arrays, so the
+    # bins of every tone are contiguous
+    rotate = starts[0]
+    starts -= rotate
+    tones -= rotate
+    counts = np.diff(np.append(starts, n))
+
+    power = np.roll(a.real**2 + a.imag**2, -rotate)
+    tone = power[tones]
+    power[tones] = 0.0
+    total = np.add.reduceat(power, starts)
+    res = {
+        "total_spurious": dB(total),
+        "mean_spurious": dB(total / counts),
+        "max_spurious": dB(np.maximum.reduceat(power, starts)),
+        "tone": dB(tone)
+    }
+    if reference is not None:
+        diff = np.roll(np.abs(a - np.ravel(reference)), -rotate)
+        total_diff = np.add.reduceat(diff, starts)
+        res["total_diff"] = total_diff
+        res["mean_diff"] = total_diff / counts
+    # back to the order of tone_bins
+    unsort = np.argsort(order)
+    return {key: val[unsort] for key, val in res.items()}
+
+
 def total_spurious(a):
-    ret = spurious(np.abs(a)**2)
-    val = dB(np.sum(ret))
-    return val
+    return purity_metrics(a)["total_spurious"]
 
 
 def mean_spurious(a):
-    ret = spurious(np.abs(a)**2)
-    val = dB(np.mean(ret))
-    return val
+    return purity_metrics(a)["mean_spurious"]
 
 
 def max_spurious(a):
-    ret = spurious(np.abs(a)**2)
-    val = dB(np.amax(ret))
-    return val
+    return purity_metrics(a)["max_spurious"]
 
 
 def dB(a):
@@ -56,8 +188,8 @@ def plot_freq_domain_comparison(time_operator_result,
     """
     """
     def time_series_plotter(ax, a):
-        ax.plot(np.real(a))
-        ax.plot(np.imag(a))
+        plot_envelope(ax, a, transform=np.real)
+        plot_envelope(ax, a, transform=np.imag)
 
     labels = _default_labels(labels)
     if subplots_kwargs is None:
@@ -73,13 +205,13 @@ def plot_freq_domain_comparison(time_operator_result,
 
     arr = [a, b]
     for i in range(2):
-        axes[idx, i].plot(dB(arr[i]))
+        plot_envelope(axes[idx, i], arr[i], transform=dB)
         axes[idx, i].set_xlabel("Frequency Bin")
         axes[idx, i].set_ylabel("Power (dB)")
         axes[idx, i].set_title(labels[i] + " Power Spectrum")
 
     # axes[idx + 1, 0].plot(np.abs(diff))
-    axes[idx + 1, 0].plot(dB(diff))
+    plot_envelope(axes[idx + 1, 0], diff, transform=dB)
     axes[idx + 1, 0].set_xlabel("Frequency Bin")
     axes[idx + 1, 0].set_ylabel("Power (dB)")
     axes[idx + 1, 0].set_title("Power Spectrum of Difference")
@@ -120,7 +252,7 @@ def plot_time_domain_comparison(operator_result,
         fig, axes = fig_axes
     if time_series_plotter is None:
         def time_series_plotter(ax, a):
-            ax.plot(dB(np.abs(a)))
+            plot_envelope(ax, a, transform=dB)
 
     for ax in axes.flatten():
         ax.grid(True)
@@ -135,7 +267,7 @@ def plot_time_domain_comparison(operator_result,
         axes[0, i].set_title(labels[i])
         axes[0, i].set_ylabel("Power level (dB)")
 
-    axes[1, 0].plot(dB(diff))
+    plot_envelope(axes[1, 0], diff, transform=dB)
     axes[1, 0].set_title("Power of Difference")
     # axes[1, 1].set_ylim([])
     axes[1, 0].set_ylabel("Power (dB)")
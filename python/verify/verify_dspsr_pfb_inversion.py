@@ -5,12 +5,15 @@ import logging
 import os
 
 import data_gen
+import data_gen.dspsr_util
 
 test_dir = data_gen.util.curdir(__file__)
 base_dir = data_gen.util.updir(test_dir, 2)
 data_dir = os.path.join(base_dir, "data")
 products_dir = os.path.join(base_dir, "products")
 
+dspsr_cache_dir = os.path.join(data_dir, "dspsr_cache")
+
 
 class VerifyDSPSRPFBInversion(unittest.TestCase):
 
@@ -40,6 +43,17 @@ class VerifyDSPSRPFBInversion(unittest.TestCase):
             period=data_gen.config["period"]
         )
 
+    @classmethod
+    def setUpClass(cls):
+        # identical dspsr runs across reruns only happen once
+        cls._dspsr_cache = data_gen.dspsr_util.DspsrRunner.cache
+        data_gen.dspsr_util.DspsrRunner.cache = data_gen.RunCache(
+            dspsr_cache_dir)
+
+    @classmethod
+    def tearDownClass(cls):
+        data_gen.dspsr_util.DspsrRunner.cache = cls._dspsr_cache
+
     @classmethod
     def build_test_cases(cls, skips=None):
         if skips is None: